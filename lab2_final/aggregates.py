@@ -0,0 +1,224 @@
+# aggregates.py - суммы заказов и счетчики продаж, поддерживаемые триггерами
+import argparse
+
+from sqlalchemy import (column, create_engine, func, select, table, text,
+                        update)
+
+# orders.total_amount и products.units_sold обновляются триггерами на
+# order_items, поэтому их видят и ORM, и Core-вставки (bulk_seed). Триггеры
+# есть для SQLite и PostgreSQL (там - одна PL/pgSQL-функция на три триггера).
+# ROUND(CAST(... AS NUMERIC), 2): в PostgreSQL нет ROUND(double precision, int).
+# units_sold считает все позиции заказов, независимо от статуса заказа, в том
+# числе перенесенные из order_items в архив (archive.py) и в отключенные
+# месяцы (partitions.py): перенос не меняет продажи товара.
+_ADD_ITEM = """
+    UPDATE orders
+       SET total_amount = ROUND(CAST(COALESCE(total_amount, 0) + COALESCE(NEW.quantity, 0) * NEW.unit_price AS NUMERIC), 2)
+     WHERE id = NEW.order_id;
+    UPDATE products
+       SET units_sold = COALESCE(units_sold, 0) + COALESCE(NEW.quantity, 0)
+     WHERE id = NEW.product_id;
+"""
+
+_REMOVE_ITEM = """
+    UPDATE orders
+       SET total_amount = ROUND(CAST(COALESCE(total_amount, 0) - COALESCE(OLD.quantity, 0) * OLD.unit_price AS NUMERIC), 2)
+     WHERE id = OLD.order_id;
+    UPDATE products
+       SET units_sold = COALESCE(units_sold, 0) - COALESCE(OLD.quantity, 0)
+     WHERE id = OLD.product_id;
+"""
+
+TRIGGERS = {
+    "trg_order_items_insert": f"""
+CREATE TRIGGER IF NOT EXISTS trg_order_items_insert
+AFTER INSERT ON order_items
+BEGIN{_ADD_ITEM}END
+""",
+    "trg_order_items_delete": f"""
+CREATE TRIGGER IF NOT EXISTS trg_order_items_delete
+AFTER DELETE ON order_items
+BEGIN{_REMOVE_ITEM}END
+""",
+    "trg_order_items_update": f"""
+CREATE TRIGGER IF NOT EXISTS trg_order_items_update
+AFTER UPDATE OF order_id, product_id, quantity, unit_price ON order_items
+BEGIN{_REMOVE_ITEM}{_ADD_ITEM}END
+""",
+}
+
+PG_TRIGGER_FUNCTION = "order_items_aggregates"
+
+_PG_FUNCTION_DDL = f"""
+CREATE OR REPLACE FUNCTION {PG_TRIGGER_FUNCTION}() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN{_REMOVE_ITEM}    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN{_ADD_ITEM}    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Те же имена и события, что у триггеров SQLite: отдельный триггер можно
+# снять на время переноса строк (archive.py, partitions.py).
+# CREATE OR REPLACE TRIGGER появился в PostgreSQL 14
+PG_TRIGGERS = {
+    "trg_order_items_insert": "AFTER INSERT ON order_items",
+    "trg_order_items_delete": "AFTER DELETE ON order_items",
+    "trg_order_items_update": "AFTER UPDATE OF order_id, product_id, quantity, unit_price ON order_items",
+}
+
+
+def _pg_trigger_ddl(name):
+    return (f"CREATE OR REPLACE TRIGGER {name} {PG_TRIGGERS[name]} "
+            f"FOR EACH ROW EXECUTE FUNCTION {PG_TRIGGER_FUNCTION}()")
+
+# Заказ переносится в архив или отключенный месяц вместе с позициями, поэтому
+# сумма оставшегося в orders заказа считается только по order_items
+RECONCILE_SQL = {
+    "orders": """
+    UPDATE orders
+       SET total_amount = COALESCE((
+           SELECT ROUND(CAST(SUM(COALESCE(quantity, 0) * unit_price) AS NUMERIC), 2)
+             FROM order_items
+            WHERE order_items.order_id = orders.id
+       ), 0)
+    """,
+}
+
+DRIFT_QUERIES = {
+    "orders": """
+    SELECT count(*) FROM orders
+     WHERE ABS(COALESCE(total_amount, 0) - COALESCE((
+           SELECT ROUND(CAST(SUM(COALESCE(quantity, 0) * unit_price) AS NUMERIC), 2)
+             FROM order_items
+            WHERE order_items.order_id = orders.id
+       ), 0)) > 0.005
+    """,
+}
+
+_products = table("products", column("id"), column("units_sold"))
+
+
+def _items_table(name, schema=None):
+    return table(name, column("product_id"), column("quantity"), schema=schema)
+
+
+def _units_sold(items):
+    return (
+        select(func.coalesce(func.sum(func.coalesce(items.c.quantity, 0)), 0))
+        .where(items.c.product_id == _products.c.id)
+        .scalar_subquery()
+    )
+
+
+def expected_units_sold(conn):
+    """Ожидаемое products.units_sold: order_items, отключенные месяцы и архив"""
+    # Оба модуля сами импортируют aggregates
+    from archive import archived_items
+    from partitions import detached_items_tables
+
+    sources = [_items_table("order_items")]
+    sources.extend(_items_table(name) for name in detached_items_tables(conn))
+    archive = archived_items(conn)
+    if archive is not None:
+        sources.append(archive)
+
+    expected = _units_sold(sources[0])
+    for source in sources[1:]:
+        expected = expected + _units_sold(source)
+    return expected
+
+
+def units_sold_update(conn):
+    """UPDATE products.units_sold для всех товаров (условие можно добавить через .where)"""
+    return update(_products).values(units_sold=expected_units_sold(conn))
+
+
+def triggers_installed(conn):
+    if conn.dialect.name == "sqlite":
+        names = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'order_items'"
+        )).scalars().all()
+    elif conn.dialect.name == "postgresql":
+        names = conn.execute(text(
+            "SELECT tgname FROM pg_trigger WHERE tgrelid = to_regclass('order_items')"
+        )).scalars().all()
+    else:
+        return False
+    return set(TRIGGERS) <= set(names)
+
+
+def create_trigger(conn, name):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(_pg_trigger_ddl(name)))
+    else:
+        conn.execute(text(TRIGGERS[name]))
+
+
+def drop_trigger(conn, name):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON order_items"))
+    else:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def create_triggers(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(_PG_FUNCTION_DDL))
+    for name in TRIGGERS:
+        create_trigger(conn, name)
+
+
+def drop_triggers(conn):
+    """Снять триггеры; функция PostgreSQL остается (drop_trigger_function)"""
+    for name in TRIGGERS:
+        drop_trigger(conn, name)
+
+
+def drop_trigger_function(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {PG_TRIGGER_FUNCTION}()"))
+
+
+def count_drift(conn):
+    """Число заказов и товаров, у которых агрегаты разошлись с позициями заказов"""
+    drift = {name: conn.execute(text(sql)).scalar() for name, sql in DRIFT_QUERIES.items()}
+    drift["products"] = conn.execute(
+        select(func.count()).select_from(_products)
+        .where(func.coalesce(_products.c.units_sold, 0) != expected_units_sold(conn))
+    ).scalar()
+    return drift
+
+
+def reconcile_aggregates(conn):
+    """Полный пересчет orders.total_amount и products.units_sold"""
+    for sql in RECONCILE_SQL.values():
+        conn.execute(text(sql))
+    conn.execute(units_sold_update(conn))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка и пересчет сумм заказов и продаж товаров")
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--archive-path",
+                        help="Файл SQLite с архивом заказов, если архив не в той же БД")
+    parser.add_argument("--check", action="store_true",
+                        help="Только показать число расхождений, ничего не меняя")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if args.archive_path:
+        from archive import configure_archive
+        configure_archive(engine, args.archive_path)
+    with engine.begin() as conn:
+        drift = count_drift(conn)
+        print(f"📊 Расхождения: заказов {drift['orders']}, товаров {drift['products']}")
+        if not args.check:
+            reconcile_aggregates(conn)
+            print("✅ Суммы заказов и счетчики продаж пересчитаны")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# archive.py - перенос завершенных заказов в архив и чтение с учетом архива
+import argparse
+from datetime import datetime, timedelta
+
+import aggregates
+from database_extended import Order, OrderItem
+from sqlalchemy import (Column, DateTime, Index, MetaData, String, Table,
+                        create_engine, delete, event, inspect, select, text,
+                        union_all)
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Архивные таблицы описаны в схеме "archive". Если архив - отдельный файл
+# SQLite, он подключается через ATTACH DATABASE под этим именем; иначе
+# схема переводится в основную через schema_translate_map (configure_archive).
+ARCHIVE_SCHEMA = "archive"
+
+archive_metadata = MetaData()
+
+
+def _archive_table(source, name):
+    # Те же колонки без внешних ключей: архив не зависит от горячих таблиц
+    return Table(
+        name, archive_metadata,
+        *(Column(column.name, column.type, primary_key=column.name == "id",
+                 nullable=column.nullable)
+          for column in source.columns),
+        schema=ARCHIVE_SCHEMA,
+    )
+
+
+orders_archive = _archive_table(Order.__table__, "orders_archive")
+order_items_archive = _archive_table(OrderItem.__table__, "order_items_archive")
+Index("ix_orders_archive_created_at", orders_archive.c.created_at)
+Index("ix_orders_archive_user_id_created_at",
+      orders_archive.c.user_id, orders_archive.c.created_at)
+Index("ix_order_items_archive_order_id", order_items_archive.c.order_id)
+
+# Граница архива лежит в основной базе: чтение проверяет ее, не открывая архив
+archive_watermark = Table(
+    "archive_watermark", MetaData(),
+    Column("name", String(50), primary_key=True),
+    Column("archived_before", DateTime, nullable=False),
+    Column("updated_at", DateTime),
+)
+
+
+def configure_archive(engine, path=None):
+    """Настроить движок: архив в отдельном файле SQLite (path) или в той же БД"""
+    if path is None:
+        engine.update_execution_options(schema_translate_map={ARCHIVE_SCHEMA: None})
+        return engine
+    if engine.dialect.name != "sqlite":
+        raise ValueError("Отдельный файл архива поддерживается только для SQLite")
+
+    @event.listens_for(engine, "connect")
+    def _attach_archive(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS {ARCHIVE_SCHEMA}")
+
+    return engine
+
+
+def _insert_ignore(conn, table):
+    # Повторный запуск после сбоя не падает на уже скопированных строках
+    dialect = sqlite if conn.dialect.name == "sqlite" else postgresql
+    return dialect.insert(table).on_conflict_do_nothing()
+
+
+def _load_watermark(conn):
+    return conn.execute(select(archive_watermark.c.archived_before)).scalar()
+
+
+def _raise_watermark(conn, archived_before):
+    previous = _load_watermark(conn)
+    values = {"archived_before": archived_before, "updated_at": datetime.now()}
+    if previous is None:
+        conn.execute(archive_watermark.insert().values(name="orders", **values))
+    elif previous < archived_before:
+        conn.execute(archive_watermark.update().values(**values))
+
+
+def archive_orders(engine, older_than_days=365, batch_size=1000, now=None):
+    """Перенести завершенные заказы (status != 'pending') старше older_than_days в архив.
+
+    Заказы берутся порциями по batch_size в порядке created_at; порция -
+    одна транзакция: копирование заказов и позиций в архив, удаление из
+    горячих таблиц и сдвиг границы архива. Триггер удаления позиций на время
+    порции снимается: сумма заказа и units_sold товара при переносе не меняются.
+    Возвращает число перенесенных заказов.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+    archive_metadata.create_all(engine)
+    archive_watermark.metadata.create_all(engine)
+
+    order_columns = [column.name for column in Order.__table__.columns]
+    item_columns = [column.name for column in OrderItem.__table__.columns]
+    archived = 0
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(
+                select(Order.id)
+                .where(Order.status != "pending", Order.created_at < cutoff)
+                .order_by(Order.created_at, Order.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not batch:
+                break
+
+            # Граница сдвигается в той же транзакции, что и перенос строк
+            _raise_watermark(conn, cutoff)
+            conn.execute(_insert_ignore(conn, orders_archive).from_select(
+                order_columns,
+                select(*Order.__table__.columns).where(Order.id.in_(batch)),
+            ))
+            conn.execute(_insert_ignore(conn, order_items_archive).from_select(
+                item_columns,
+                select(*OrderItem.__table__.columns).where(OrderItem.order_id.in_(batch)),
+            ))
+
+            suspend_trigger = aggregates.triggers_installed(conn)
+            if suspend_trigger:
+                aggregates.drop_trigger(conn, "trg_order_items_delete")
+            conn.execute(delete(OrderItem).where(OrderItem.order_id.in_(batch)))
+            conn.execute(delete(Order).where(Order.id.in_(batch), Order.created_at < cutoff))
+            if suspend_trigger:
+                aggregates.create_trigger(conn, "trg_order_items_delete")
+        archived += len(batch)
+        print(f"📦 В архиве {archived} заказов")
+    return archived
+
+
+def archived_before(conn):
+    """Заказы старше этой даты могут быть в архиве (None - архива нет)"""
+    if not inspect(conn).has_table(archive_watermark.name):
+        return None
+    return _load_watermark(conn)
+
+
+def read_orders(conn, start, end, user_id=None, status=None):
+    """Заказы за период [start, end) из горячей таблицы и, если нужно, из архива.
+
+    Архив читается, только если start раньше границы архива. В горячей
+    таблице остаются и старые заказы в статусе pending, поэтому она читается
+    всегда. Результат - строки Core, новые заказы первыми.
+    """
+    queries = []
+    boundary = archived_before(conn)
+    sources = [Order.__table__]
+    if boundary is not None and start < boundary:
+        sources.append(orders_archive)
+    for source in sources:
+        stmt = select(*source.columns).where(
+            source.c.created_at >= start, source.c.created_at < end
+        )
+        if user_id is not None:
+            stmt = stmt.where(source.c.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(source.c.status == status)
+        queries.append(stmt)
+
+    stmt = queries[0] if len(queries) == 1 else union_all(*queries)
+    return conn.execute(stmt.order_by(text("created_at DESC"))).all()
+
+
+def read_order_items(conn, order_id, created_at):
+    """Позиции заказа; created_at заказа решает, смотреть ли в архив"""
+    boundary = archived_before(conn)
+    table = OrderItem.__table__
+    rows = conn.execute(select(table).where(table.c.order_id == order_id)).all()
+    if not rows and boundary is not None and created_at < boundary:
+        rows = conn.execute(
+            select(order_items_archive).where(order_items_archive.c.order_id == order_id)
+        ).all()
+    return rows
+
+
+def archived_items(conn):
+    """Таблица архивных позиций, доступная через conn (None - архива нет).
+
+    Движок не обязательно настроен через configure_archive (aggregates.py,
+    bulk_seed.py): архив ищется в схеме archive (ATTACH или схема PostgreSQL),
+    затем в основной базе.
+    """
+    if archived_before(conn) is None:
+        return None
+    inspector = inspect(conn)
+    if inspector.has_table(order_items_archive.name, schema=ARCHIVE_SCHEMA):
+        return order_items_archive
+    if inspector.has_table(order_items_archive.name):
+        return order_items_archive.to_metadata(MetaData(), schema=None)
+    raise RuntimeError(
+        "Архив заказов не подключен: для отдельного файла архива нужен configure_archive()"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос завершенных заказов в архив")
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--archive-path",
+                        help="Файл SQLite для архива (по умолчанию - таблицы в той же БД)")
+    parser.add_argument("--older-than-days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = configure_archive(create_engine(args.url), args.archive_path)
+    try:
+        archived = archive_orders(engine, older_than_days=args.older_than_days,
+                                  batch_size=args.batch_size)
+        print(f"🎉 Перенесено заказов: {archived}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# async_loaders.py - асинхронное наполнение и чтение БД (create_async_engine)
+import argparse
+import asyncio
+import itertools
+import time
+
+import aggregates
+import fulltext
+from bulk_seed import (SeedRandom, ThroughputReport, generate_addresses,
+                       generate_orders, generate_products, generate_users)
+from database_extended import Address, Base, Order, OrderItem, Product, User
+from engines import ASYNC_DATABASE_URL, dispose_async_engines, get_async_engine
+from localities import cache_for
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+
+async def _load_chunk(engine, semaphore, user_ids):
+    # У каждой порции своя сессия: одна AsyncSession не выполняет запросы параллельно
+    async with semaphore, AsyncSession(engine, expire_on_commit=False) as session:
+        stmt = (
+            select(User)
+            .where(User.id.in_(user_ids))
+            .order_by(User.id)
+            .options(selectinload(User.addresses), selectinload(User.orders))
+        )
+        return (await session.scalars(stmt)).all()
+
+
+async def load_users_with_related(url=ASYNC_DATABASE_URL, chunk_size=500, concurrency=4):
+    """Пользователи с адресами и заказами, порциями по chunk_size параллельно.
+
+    Сначала читаются только ключи пользователей, затем порции загружаются
+    одновременно, но не более concurrency запросов сразу. Внутри порции адреса
+    и заказы подгружаются через selectinload, без ленивой загрузки (в async
+    она недоступна).
+    """
+    engine = get_async_engine(url)
+    async with engine.connect() as conn:
+        user_ids = (await conn.scalars(select(User.id).order_by(User.id))).all()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    chunks = [user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size)]
+    results = await asyncio.gather(*(_load_chunk(engine, semaphore, chunk) for chunk in chunks))
+    return [user for chunk in results for user in chunk]
+
+
+def _encode_localities(conn, rows):
+    return cache_for(conn).encode_rows(conn, rows)
+
+
+async def _insert_chunk(engine, semaphore, table, rows, report):
+    # Одна порция - одна транзакция
+    async with semaphore, engine.begin() as conn:
+        await conn.execute(insert(table), rows)
+    report.add(table.name, len(rows))
+
+
+async def _insert_tables(engine, semaphore, rows_by_table, chunk_size, report):
+    """Параллельная вставка независимых таблиц, каждая порциями по chunk_size"""
+    results = await asyncio.gather(*(
+        _insert_chunk(engine, semaphore, table, rows[start:start + chunk_size], report)
+        for table, rows in rows_by_table.items()
+        for start in range(0, len(rows), chunk_size)
+    ), return_exceptions=True)
+    # Ошибка поднимается, когда закончились все порции уровня: иначе
+    # восстановление триггеров шло бы одновременно с оставшимися вставками
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def async_seed_bulk_data(
+    url=ASYNC_DATABASE_URL,
+    users=10_000,
+    addresses_per_user=1,
+    products=1_000,
+    orders_per_user=2,
+    items_per_order=3,
+    chunk_size=5_000,
+    seed=42,
+    concurrency=4,
+    create_schema=False,
+    report_interval=2.0,
+):
+    """Асинхронное наполнение БД генераторами из bulk_seed.
+
+    Таблицы вставляются по уровням внешних ключей: users и products не зависят
+    друг от друга и пишутся одновременно, затем addresses, orders и order_items.
+    Порции внутри уровня - отдельные параллельные транзакции (не больше
+    concurrency сразу). SQLite выполняет запись по одной транзакции, выигрыш от
+    параллельности дает PostgreSQL (asyncpg).
+    """
+    if orders_per_user > 0 and (products <= 0 or addresses_per_user <= 0):
+        raise ValueError("Для заказов нужны товары и хотя бы один адрес на пользователя")
+
+    engine = get_async_engine(url)
+    if create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    # Все строки генерируются заранее: порции уровня пишутся одновременно
+    rng = SeedRandom(seed)
+    product_rows = list(generate_products(rng, products))
+    product_prices = [(row["id"], row["price"]) for row in product_rows]
+    user_rows = list(generate_users(rng, 0, users, with_description=True))
+    address_rows, order_rows, item_rows = [], [], []
+    for user in user_rows:
+        user_addresses = list(generate_addresses(rng, user, addresses_per_user))
+        address_rows.extend(user_addresses)
+        for order, items in generate_orders(rng, user, user_addresses, product_prices,
+                                            orders_per_user, items_per_order):
+            order_rows.append(order)
+            item_rows.extend(items)
+
+    async with engine.begin() as conn:
+        suspended_aggregates = bool(order_rows) and await conn.run_sync(aggregates.triggers_installed)
+        if suspended_aggregates:
+            await conn.run_sync(aggregates.drop_triggers)
+        suspended_search = await conn.run_sync(fulltext.triggers_installed)
+        if suspended_search:
+            await conn.run_sync(fulltext.drop_triggers)
+
+        # Населенные пункты создаются до параллельной вставки адресов
+        await conn.run_sync(_encode_localities, address_rows)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    report = ThroughputReport(interval=report_interval)
+    levels = [
+        {User.__table__: user_rows, Product.__table__: product_rows},
+        {Address.__table__: address_rows},
+        {Order.__table__: order_rows},
+        {OrderItem.__table__: item_rows},
+    ]
+    try:
+        for level in levels:
+            await _insert_tables(engine, semaphore, level, chunk_size, report)
+    finally:
+        # Триггеры возвращаются и после неудачной загрузки, как в seed_bulk_data
+        async with engine.begin() as conn:
+            if suspended_aggregates:
+                await conn.run_sync(aggregates.reconcile_aggregates)
+                await conn.run_sync(aggregates.create_triggers)
+            if suspended_search:
+                await conn.run_sync(fulltext.rebuild_search_index)
+                await conn.run_sync(fulltext.create_triggers)
+
+    report.print_progress()
+    summary = report.summary()
+    print(f"🎉 Вставлено {summary['total_rows']} строк за {summary['seconds']} с "
+          f"({summary['rows_per_second']:,.0f} строк/с)")
+    return summary
+
+
+async def _run(args):
+    try:
+        if args.command == "seed":
+            await async_seed_bulk_data(
+                url=args.url,
+                users=args.users,
+                addresses_per_user=args.addresses_per_user,
+                products=args.products,
+                orders_per_user=args.orders_per_user,
+                items_per_order=args.items_per_order,
+                chunk_size=args.chunk_size,
+                seed=args.seed,
+                concurrency=args.concurrency,
+                create_schema=args.create_schema,
+            )
+        else:
+            started = time.perf_counter()
+            users = await load_users_with_related(args.url, chunk_size=args.chunk_size,
+                                                  concurrency=args.concurrency)
+            elapsed = time.perf_counter() - started
+            addresses = sum(len(user.addresses) for user in users)
+            orders = sum(len(user.orders) for user in users)
+            print(f"✅ Загружено пользователей: {len(users)}, адресов: {addresses}, "
+                  f"заказов: {orders} за {elapsed:.3f} с")
+            for user in itertools.islice(users, args.show):
+                print(f"👤 {user.username}: адресов {len(user.addresses)}, заказов {len(user.orders)}")
+    finally:
+        await dispose_async_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Асинхронное наполнение и чтение БД")
+    parser.add_argument("command", choices=["seed", "load"])
+    parser.add_argument("--url", default=ASYNC_DATABASE_URL)
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Максимум одновременных транзакций или запросов")
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--addresses-per-user", type=int, default=1)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--orders-per-user", type=int, default=2)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--create-schema", action="store_true",
+                        help="Создать таблицы через metadata.create_all (для чистой БД)")
+    parser.add_argument("--show", type=int, default=5,
+                        help="Сколько пользователей вывести после загрузки")
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
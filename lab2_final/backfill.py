@@ -0,0 +1,169 @@
+# backfill.py - онлайн-заполнение данных порциями с возобновлением
+import argparse
+import time
+from datetime import datetime
+
+from aggregates import RECONCILE_SQL, units_sold_update
+from bulk_seed import ThroughputReport
+from ids import id_type
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table,
+                        bindparam, create_engine, text)
+
+# Миграция меняет только схему (например, добавляет nullable-колонку), а
+# данные заполняются этим модулем отдельно: каждая порция - своя короткая
+# транзакция, поэтому таблица не блокируется на все время заполнения.
+
+checkpoint_metadata = MetaData()
+
+backfill_checkpoints = Table(
+    "backfill_checkpoints", checkpoint_metadata,
+    Column("name", String(100), primary_key=True),
+    # Тот же тип, что у ключей: при LAB2_ID_STORAGE=binary это 16 байт
+    Column("last_key", id_type()),
+    Column("rows_done", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime),
+    Column("finished_at", DateTime),
+)
+
+# задача: (таблица, UPDATE для диапазона ключей :first_key..:last_key или
+# функция conn -> Core UPDATE, к которому добавляется условие на диапазон)
+BACKFILLS = {
+    "users_description": (
+        "users",
+        "UPDATE users SET description = 'Пользователь ' || username "
+        "WHERE id BETWEEN :first_key AND :last_key AND description IS NULL",
+    ),
+    "order_totals": (
+        "orders",
+        RECONCILE_SQL["orders"] + " WHERE orders.id BETWEEN :first_key AND :last_key",
+    ),
+    # units_sold включает архив и отключенные месяцы, поэтому UPDATE
+    # собирается под текущую базу
+    "product_units_sold": ("products", units_sold_update),
+}
+
+
+def _load_checkpoint(conn, name):
+    row = conn.execute(
+        backfill_checkpoints.select().where(backfill_checkpoints.c.name == name)
+    ).mappings().first()
+    return dict(row) if row else None
+
+
+def _save_checkpoint(conn, name, last_key, rows_done, finished=False):
+    now = datetime.now()
+    values = {
+        "last_key": last_key,
+        "rows_done": rows_done,
+        "updated_at": now,
+        "finished_at": now if finished else None,
+    }
+    updated = conn.execute(
+        backfill_checkpoints.update()
+        .where(backfill_checkpoints.c.name == name)
+        .values(**values)
+    ).rowcount
+    if not updated:
+        conn.execute(backfill_checkpoints.insert().values(name=name, **values))
+
+
+def run_backfill(engine, name, table, update_sql, batch_size=1000, sleep_seconds=0.0,
+                 max_rows_per_second=None, restart=False, key_column="id",
+                 key_type=None, report_interval=5.0):
+    """Обход таблицы порциями по ключу с сохранением контрольной точки.
+
+    Ключи порции выбираются keyset-запросом (key > последнего обработанного),
+    затем update_sql (текст или функция conn -> UPDATE, см. BACKFILLS)
+    выполняется для диапазона :first_key..:last_key. Порция
+    и контрольная точка фиксируются одной транзакцией, поэтому после остановки
+    запуск с тем же name продолжит с места остановки. Между порциями можно
+    сделать паузу sleep_seconds или ограничить скорость max_rows_per_second.
+    key_type - тип ключа (по умолчанию id_type()): через него ключи читаются
+    и передаются в запросы, как в моделях.
+    """
+    key_type = key_type if key_type is not None else id_type()
+    checkpoint_metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        checkpoint = None if restart else _load_checkpoint(conn, name)
+    if checkpoint and checkpoint["finished_at"]:
+        print(f"✅ {name}: уже выполнено ({checkpoint['rows_done']} строк)")
+        return checkpoint["rows_done"]
+
+    last_key = checkpoint["last_key"] if checkpoint else None
+    rows_done = checkpoint["rows_done"] if checkpoint else 0
+    if checkpoint:
+        print(f"↪️  {name}: продолжаем после ключа {last_key} ({rows_done} строк уже обработано)")
+
+    first_keys_sql = text(
+        f"SELECT {key_column} FROM {table} ORDER BY {key_column} LIMIT :limit"
+    ).columns(**{key_column: key_type})
+    next_keys_sql = text(
+        f"SELECT {key_column} FROM {table} WHERE {key_column} > :last_key "
+        f"ORDER BY {key_column} LIMIT :limit"
+    ).bindparams(bindparam("last_key", type_=key_type)).columns(**{key_column: key_type})
+
+    report = ThroughputReport(interval=report_interval)
+    key_range = (bindparam("first_key", type_=key_type), bindparam("last_key", type_=key_type))
+    if callable(update_sql):
+        with engine.connect() as conn:
+            update_stmt = update_sql(conn)
+        update_stmt = update_stmt.where(
+            update_stmt.table.c[key_column].between(*key_range)
+        )
+    else:
+        update_stmt = text(update_sql).bindparams(*key_range)
+    while True:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            keys_sql = first_keys_sql if last_key is None else next_keys_sql
+            keys = conn.execute(
+                keys_sql, {"last_key": last_key, "limit": batch_size}
+            ).scalars().all()
+            if not keys:
+                _save_checkpoint(conn, name, last_key, rows_done, finished=True)
+                break
+
+            conn.execute(update_stmt, {"first_key": keys[0], "last_key": keys[-1]})
+            last_key = keys[-1]
+            rows_done += len(keys)
+            _save_checkpoint(conn, name, last_key, rows_done)
+
+        report.add(table, len(keys))
+
+        pause = sleep_seconds
+        if max_rows_per_second:
+            pause = max(pause, len(keys) / max_rows_per_second - (time.perf_counter() - started))
+        if pause > 0:
+            time.sleep(pause)
+
+    report.print_progress()
+    print(f"🎉 {name}: обработано {rows_done} строк")
+    return rows_done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Онлайн-заполнение данных порциями")
+    parser.add_argument("job", choices=sorted(BACKFILLS))
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sleep", type=float, default=0.0,
+                        help="Пауза между порциями, секунды")
+    parser.add_argument("--max-rate", type=float,
+                        help="Ограничение скорости, строк в секунду")
+    parser.add_argument("--restart", action="store_true",
+                        help="Начать заново, игнорируя контрольную точку")
+    args = parser.parse_args()
+
+    table, update_sql = BACKFILLS[args.job]
+    engine = create_engine(args.url)
+    try:
+        run_backfill(engine, args.job, table, update_sql,
+                     batch_size=args.batch_size, sleep_seconds=args.sleep,
+                     max_rows_per_second=args.max_rate, restart=args.restart)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
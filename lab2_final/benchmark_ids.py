@@ -0,0 +1,111 @@
+# benchmark_ids.py - скорость вставки при разных схемах первичных ключей
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from ids import UUIDBinary, new_id
+from sqlalchemy import (Column, ForeignKey, MetaData, String, Table,
+                        create_engine, insert)
+
+SCHEMES = {
+    # схема: (тип колонки, генератор ключа)
+    "uuid4-string": (lambda: String(36), lambda: str(uuid.uuid4())),
+    "uuid7-string": (lambda: String(36), new_id),
+    "uuid7-binary": (UUIDBinary, new_id),
+}
+
+
+def _make_table(metadata, column_type):
+    """Таблица в форме addresses: ключ, индексированный внешний ключ и данные"""
+    return Table(
+        "items", metadata,
+        Column("id", column_type(), primary_key=True),
+        Column("parent_id", column_type(), ForeignKey("items.id"), index=True),
+        Column("payload", String(100), nullable=False),
+    )
+
+
+def run_scheme(name, rows, chunk_size, checkpoints=10):
+    column_type, make_key = SCHEMES[name]
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix=f"bench_ids_{name}_")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{db_path}")
+    metadata = MetaData()
+    table = _make_table(metadata, column_type)
+    metadata.create_all(engine)
+
+    rng = random.Random(42)
+    stmt = insert(table)
+    inserted = 0
+    progress = []
+    window_started = started = time.perf_counter()
+    window_rows = 0
+    checkpoint_every = max(rows // checkpoints, chunk_size)
+
+    try:
+        while inserted < rows:
+            size = min(chunk_size, rows - inserted)
+            keys = [make_key() for _ in range(size)]
+            batch = [
+                {"id": key, "parent_id": keys[rng.randrange(index + 1)], "payload": f"row {inserted + index}"}
+                for index, key in enumerate(keys)
+            ]
+            with engine.begin() as conn:
+                conn.execute(stmt, batch)
+            inserted += size
+            window_rows += size
+
+            if window_rows >= checkpoint_every or inserted == rows:
+                now = time.perf_counter()
+                progress.append({
+                    "rows": inserted,
+                    "rows_per_second": round(window_rows / (now - window_started), 1),
+                })
+                window_started, window_rows = now, 0
+
+        elapsed = time.perf_counter() - started
+        result = {
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1),
+            "db_size_bytes": os.path.getsize(db_path),
+            "progress": progress,
+        }
+    finally:
+        engine.dispose()
+        os.remove(db_path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк вставки: uuid4 против UUIDv7")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--scheme", action="append", choices=sorted(SCHEMES),
+                        help="Запустить только указанные схемы (можно несколько раз)")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scheme or SCHEMES:
+        print(f"⏳ {name}: вставка {args.rows} строк...")
+        result = run_scheme(name, args.rows, args.chunk_size)
+        results[name] = result
+        first, last = result["progress"][0], result["progress"][-1]
+        print(f"   {result['rows_per_second']:,.0f} строк/с в среднем | "
+              f"начало {first['rows_per_second']:,.0f} строк/с, конец {last['rows_per_second']:,.0f} строк/с | "
+              f"файл {result['db_size_bytes'] / 1024 / 1024:.1f} МБ")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "chunk_size": args.chunk_size, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✅ Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
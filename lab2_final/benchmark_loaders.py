@@ -0,0 +1,265 @@
+# benchmark_loaders.py - сравнение стратегий загрузки связей
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import sqlalchemy
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import (joinedload, lazyload, selectinload, sessionmaker,
+                            subqueryload)
+
+from bulk_seed import seed_bulk_data
+from database_extended import (Address, Locality, Order, OrderItem, Product,
+                               User)
+from queries import iter_user_records
+
+
+class StatementCounter:
+    """Считает SQL-запросы, отправленные через движок"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+# --- User.addresses ---
+
+def _load_users_orm(session, option):
+    stmt = select(User)
+    if option is not None:
+        stmt = stmt.options(option(User.addresses))
+    users = session.execute(stmt).unique().scalars().all()
+    return sum(len(user.addresses) for user in users)
+
+
+def users_lazyload(session):
+    return _load_users_orm(session, lazyload)
+
+
+def users_selectinload(session):
+    return _load_users_orm(session, selectinload)
+
+
+def users_joinedload(session):
+    return _load_users_orm(session, joinedload)
+
+
+def users_subqueryload(session):
+    return _load_users_orm(session, subqueryload)
+
+
+def users_core_join(session):
+    stmt = (
+        select(User.id, User.username, User.email,
+               Address.street, Locality.city, Locality.country)
+        .join(Address, Address.user_id == User.id)
+        .join(Locality, Locality.id == Address.locality_id)
+    )
+    return len(session.execute(stmt).all())
+
+
+def users_core_records(session):
+    return sum(len(user.addresses) for user in iter_user_records(session))
+
+
+# --- Order -> OrderItem -> Product ---
+
+def _load_orders_orm(session, option):
+    stmt = select(Order).options(
+        option(Order.order_items).options(option(OrderItem.product))
+    )
+    orders = session.execute(stmt).unique().scalars().all()
+    return sum(1 for order in orders for item in order.order_items
+               if item.product is not None)
+
+
+def orders_selectinload(session):
+    return _load_orders_orm(session, selectinload)
+
+
+def orders_joinedload(session):
+    return _load_orders_orm(session, joinedload)
+
+
+def orders_subqueryload(session):
+    return _load_orders_orm(session, subqueryload)
+
+
+def orders_core_join(session):
+    stmt = (
+        select(Order.id, Order.status, OrderItem.quantity, OrderItem.unit_price,
+               Product.name)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Product, Product.id == OrderItem.product_id)
+    )
+    return len(session.execute(stmt).all())
+
+
+STRATEGIES = {
+    "users.lazyload": users_lazyload,
+    "users.selectinload": users_selectinload,
+    "users.joinedload": users_joinedload,
+    "users.subqueryload": users_subqueryload,
+    "users.core_join": users_core_join,
+    "users.core_records": users_core_records,
+    "orders.selectinload": orders_selectinload,
+    "orders.joinedload": orders_joinedload,
+    "orders.subqueryload": orders_subqueryload,
+    "orders.core_join": orders_core_join,
+}
+
+
+def run_strategy(engine, counter, func, repeat):
+    """Замер одной стратегии: время, число запросов и пик памяти.
+
+    tracemalloc заметно замедляет выполнение, поэтому память снимается
+    отдельным прогоном, а время - без трассировки.
+    """
+    Session = sessionmaker(bind=engine)
+    timings, statements = [], []
+    rows = 0
+    for _ in range(repeat):
+        with Session() as session:
+            counter.count = 0
+            started = time.perf_counter()
+            rows = func(session)
+            timings.append(time.perf_counter() - started)
+            statements.append(counter.count)
+
+    with Session() as session:
+        tracemalloc.start()
+        func(session)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "wall_time_s": round(min(timings), 6),
+        "wall_time_median_s": round(statistics.median(timings), 6),
+        "rows_per_second": round(rows / min(timings), 1) if min(timings) else None,
+        "statements": max(statements),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current, previous_path):
+    """Печать изменения времени и памяти относительно прошлого прогона"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\n=== Сравнение с {previous_path} ({previous.get('git_revision')}) ===")
+    for name, result in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if not old:
+            print(f"{name:24} нет в прошлом прогоне")
+            continue
+        time_ratio = result["wall_time_s"] / old["wall_time_s"] if old["wall_time_s"] else 0.0
+        memory_ratio = (result["peak_memory_bytes"] / old["peak_memory_bytes"]
+                        if old["peak_memory_bytes"] else 0.0)
+        print(f"{name:24} время x{time_ratio:5.2f} | память x{memory_ratio:5.2f} | "
+              f"запросы {old['statements']} -> {result['statements']}")
+
+
+def run_benchmark(users=2000, addresses_per_user=3, products=200, orders_per_user=2,
+                  items_per_order=3, repeat=3, strategies=None, db_path=None):
+    own_db = db_path is None
+    if own_db:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_loaders_")
+        os.close(fd)
+        os.remove(db_path)
+
+    url = f"sqlite:///{db_path}"
+    try:
+        if own_db:
+            seed_bulk_data(url=url, users=users, addresses_per_user=addresses_per_user,
+                           products=products, orders_per_user=orders_per_user,
+                           items_per_order=items_per_order, create_schema=True,
+                           report_interval=60.0)
+
+        engine = create_engine(url)
+        counter = StatementCounter(engine)
+        results = {}
+        for name in strategies or STRATEGIES:
+            result = run_strategy(engine, counter, STRATEGIES[name], repeat)
+            results[name] = result
+            print(f"{name:24} {result['wall_time_s'] * 1000:9.1f} мс | "
+                  f"{result['statements']:6} запросов | "
+                  f"{result['peak_memory_bytes'] / 1024 / 1024:7.1f} МБ | "
+                  f"{result['rows']} строк, {result['rows_per_second']:,.0f} строк/с")
+        engine.dispose()
+    finally:
+        if own_db:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "params": {
+            "users": users,
+            "addresses_per_user": addresses_per_user,
+            "products": products,
+            "orders_per_user": orders_per_user,
+            "items_per_order": items_per_order,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк стратегий загрузки связей")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--addresses-per-user", type=int, default=3)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--orders-per-user", type=int, default=2)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES),
+                        help="Запустить только указанные стратегии (можно несколько раз)")
+    parser.add_argument("--output", default="benchmark_loaders.json",
+                        help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        users=args.users,
+        addresses_per_user=args.addresses_per_user,
+        products=args.products,
+        orders_per_user=args.orders_per_user,
+        items_per_order=args.items_per_order,
+        repeat=args.repeat,
+        strategies=args.strategy,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ Результаты сохранены в {args.output}")
+
+    if args.compare:
+        compare_results(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
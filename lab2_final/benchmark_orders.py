@@ -0,0 +1,160 @@
+# benchmark_orders.py - параллельное оформление заказов: пропускная способность и перепродажи
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from bulk_seed import seed_bulk_data
+from database_extended import Address, Order, OrderItem, Product
+from ids import new_id
+from order_service import InsufficientStockError, place_order
+from sqlalchemy import create_engine, event, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+
+def place_order_naive(session, user_id, delivery_address_id, items):
+    """Наивный вариант для сравнения: прочитать остаток, проверить, записать"""
+    for product_id, quantity in items:
+        stock = session.execute(
+            select(Product.stock_quantity).where(Product.id == product_id)
+        ).scalar_one()
+        if stock < quantity:
+            session.rollback()
+            raise InsufficientStockError({product_id})
+        session.execute(
+            update(Product).where(Product.id == product_id)
+            .values(stock_quantity=stock - quantity)
+            .execution_options(synchronize_session=False)
+        )
+    order_id = new_id()
+    session.execute(insert(Order).values(id=order_id, user_id=user_id,
+                                         delivery_address_id=delivery_address_id))
+    for product_id, quantity in items:
+        session.execute(insert(OrderItem).values(
+            id=new_id(), order_id=order_id, product_id=product_id,
+            quantity=quantity, unit_price=0.0,
+        ))
+    session.commit()
+
+
+MODES = {"guarded": place_order, "naive": place_order_naive}
+
+
+def _create_engine(url):
+    engine = create_engine(url, connect_args={"timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    return engine
+
+
+def run_mode(mode, users, products, stock, workers, orders_per_worker, max_items, seed):
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix=f"bench_orders_{mode}_")
+    os.close(fd)
+    os.remove(db_path)
+    url = f"sqlite:///{db_path}"
+    try:
+        seed_bulk_data(url=url, users=users, products=products, create_schema=True,
+                       report_interval=60.0)
+        engine = _create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(update(Product).values(stock_quantity=stock))
+            addresses = conn.execute(select(Address.user_id, Address.id)).all()
+            product_ids = conn.execute(select(Product.id)).scalars().all()
+
+        counters = {"placed": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(worker_number):
+            rng = random.Random(seed + worker_number)
+            for _ in range(orders_per_worker):
+                user_id, address_id = rng.choice(addresses)
+                items = [(product_id, rng.randint(1, 5))
+                         for product_id in rng.sample(product_ids, rng.randint(1, max_items))]
+                with Session(engine) as session:
+                    try:
+                        MODES[mode](session, user_id, address_id, items)
+                        outcome = "placed"
+                    except InsufficientStockError:
+                        outcome = "rejected"
+                    except OperationalError:
+                        # SQLite: database is locked
+                        outcome = "errors"
+                with lock:
+                    counters[outcome] += 1
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with engine.connect() as conn:
+            sold = dict(conn.execute(
+                select(OrderItem.product_id, func.sum(OrderItem.quantity))
+                .group_by(OrderItem.product_id)
+            ).all())
+            remaining = dict(conn.execute(select(Product.id, Product.stock_quantity)).all())
+        engine.dispose()
+
+        # Перепродажа: продано больше, чем было, или остаток не сходится с продажами
+        oversold = sum(1 for product_id, left in remaining.items()
+                       if left < 0 or stock - left != sold.get(product_id, 0))
+        attempts = workers * orders_per_worker
+        return {
+            **counters,
+            "attempts": attempts,
+            "seconds": round(elapsed, 3),
+            "orders_per_second": round(attempts / elapsed, 1),
+            "oversold_products": oversold,
+            "units_sold": sum(sold.values()),
+            "units_available": stock * len(remaining),
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельного оформления заказов")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=500,
+                        help="Начальный остаток каждого товара")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--orders-per-worker", type=int, default=500)
+    parser.add_argument("--max-items", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", action="append", choices=sorted(MODES))
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.mode or ["guarded", "naive"]:
+        result = run_mode(mode, args.users, args.products, args.stock, args.workers,
+                          args.orders_per_worker, args.max_items, args.seed)
+        results[mode] = result
+        print(f"{mode:8} {result['orders_per_second']:8,.0f} заказов/с | "
+              f"оформлено {result['placed']}, отказов {result['rejected']}, "
+              f"ошибок {result['errors']} | продано {result['units_sold']} из "
+              f"{result['units_available']} | перепродано товаров: {result['oversold_products']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmark_search.py - поиск по товарам: LIKE '%...%' против FTS5
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from bulk_seed import seed_bulk_data
+from queries import search_products
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Частое слово из описаний, редкое сочетание слов и почти уникальный номер товара
+DEFAULT_TERMS = ["wireless", "складной titanium подсветка", "123457"]
+
+def _like_search(session, term, count):
+    # Все слова должны встретиться, как и в to_match_query()
+    words = term.split()
+    conditions = " AND ".join(
+        f"(name LIKE :p{i} OR description LIKE :p{i})" for i in range(len(words))
+    )
+    params = {f"p{i}": f"%{word}%" for i, word in enumerate(words)}
+    stmt = text(f"SELECT id, name FROM products WHERE {conditions} LIMIT :count")
+    return session.execute(stmt, {**params, "count": count}).all()
+
+
+def _measure(func, repeat):
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(rows)
+
+
+def run_benchmark(products=1_000_000, terms=None, count=20, repeat=5):
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_search_")
+    os.close(fd)
+    os.remove(db_path)
+    url = f"sqlite:///{db_path}"
+    results = {}
+    try:
+        seed_bulk_data(url=url, users=0, products=products, create_schema=True,
+                       report_interval=30.0)
+        engine = create_engine(url)
+        with Session(engine) as session:
+            for term in terms or DEFAULT_TERMS:
+                like_time, like_rows = _measure(lambda: _like_search(session, term, count), repeat)
+                fts_time, fts_rows = _measure(
+                    lambda: search_products(session, term, count=count, ranked=False), repeat
+                )
+                ranked_time, _ = _measure(
+                    lambda: search_products(session, term, count=count), repeat
+                )
+                results[term] = {
+                    "like_ms": round(like_time * 1000, 3),
+                    "like_rows": like_rows,
+                    "fts_ms": round(fts_time * 1000, 3),
+                    "fts_ranked_ms": round(ranked_time * 1000, 3),
+                    "fts_rows": fts_rows,
+                    "speedup": round(like_time / fts_time, 1) if fts_time else None,
+                }
+                print(f"{term!r:32} LIKE {like_time * 1000:8.2f} мс ({like_rows} строк) | "
+                      f"FTS5 {fts_time * 1000:7.2f} мс, с bm25 {ranked_time * 1000:7.2f} мс "
+                      f"({fts_rows} строк) | x{results[term]['speedup']}")
+        engine.dispose()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска: LIKE против FTS5")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--term", action="append", help="Поисковый запрос (можно несколько раз)")
+    parser.add_argument("--count", type=int, default=20, help="Размер страницы результатов")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.products, args.term, args.count, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"products": args.products, "count": args.count, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✅ Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# bulk_seed.py - массовое наполнение БД для нагрузочного тестирования
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+
+import aggregates
+import database
+import database_extended
+import fulltext
+from ids import uuid7
+from localities import cache_for
+
+FIRST_NAMES = ["john", "jane", "bob", "alice", "charlie", "olga", "ivan",
+               "maria", "peter", "anna", "sergey", "elena", "dmitry", "irina"]
+LAST_NAMES = ["doe", "smith", "wilson", "brown", "davis", "ivanov", "petrova",
+              "sidorov", "kuznetsova", "popov", "volkova", "lebedev"]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr", "Lenina St",
+           "Gagarina Ave", "Mira Ave", "Sadovaya St", "Park Ln"]
+LOCATIONS = [
+    ("New York", "NY", "USA"), ("Los Angeles", "CA", "USA"),
+    ("Chicago", "IL", "USA"), ("Miami", "FL", "USA"), ("Seattle", "WA", "USA"),
+    ("Moscow", None, "Russia"), ("Saint Petersburg", None, "Russia"),
+    ("Kazan", "Tatarstan", "Russia"), ("Berlin", None, "Germany"),
+    ("Munich", "Bavaria", "Germany"), ("Paris", None, "France"),
+    ("London", None, "UK"),
+]
+ZIP_CODES_PER_CITY = 50
+PRODUCT_WORDS = ["Smart", "Classic", "Ultra", "Eco", "Mini", "Pro", "Super",
+                 "Compact", "Wireless", "Portable"]
+PRODUCT_KINDS = ["Phone", "Laptop", "Kettle", "Chair", "Lamp", "Headphones",
+                 "Backpack", "Watch", "Camera", "Speaker"]
+ORDER_STATUSES = ["pending", "paid", "shipped", "delivered", "cancelled"]
+DESCRIPTION_WORDS = [
+    "прочный", "легкий", "компактный", "стальной", "деревянный", "водонепроницаемый",
+    "беспроводной", "энергосберегающий", "складной", "универсальный", "детский",
+    "профессиональный", "домашний", "офисный", "дорожный", "черный", "белый",
+    "красный", "матовый", "глянцевый", "гарантия", "доставка", "подарок", "набор",
+    "аккумулятор", "зарядка", "чехол", "ремень", "подсветка", "таймер",
+    "durable", "lightweight", "waterproof", "wireless", "premium", "budget",
+    "bluetooth", "usb", "ceramic", "titanium",
+]
+
+BASE_TIME = datetime(2024, 1, 1)
+TIME_SPAN_SECONDS = 365 * 24 * 3600
+BASE_TIME_MS = int(BASE_TIME.timestamp() * 1000)
+
+
+class ThroughputReport:
+    """Счетчик вставленных строк с периодическим выводом скорости"""
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self.rows = {}
+        self.started = time.perf_counter()
+        self._last_print = self.started
+
+    def add(self, table, count):
+        self.rows[table] = self.rows.get(table, 0) + count
+        now = time.perf_counter()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.print_progress()
+
+    @property
+    def total_rows(self):
+        return sum(self.rows.values())
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def print_progress(self):
+        elapsed = self.elapsed
+        rate = self.total_rows / elapsed if elapsed else 0.0
+        tables = ", ".join(f"{name}={count}" for name, count in self.rows.items())
+        print(f"⏱  {elapsed:7.1f} с | {self.total_rows} строк | {rate:,.0f} строк/с | {tables}")
+
+    def summary(self):
+        elapsed = self.elapsed
+        return {
+            "rows": dict(self.rows),
+            "total_rows": self.total_rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.total_rows / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def create_seed_engine(url="sqlite:///lab2.db"):
+    """Движок для массовой вставки: без логирования SQL"""
+    engine = create_engine(url, echo=False)
+
+    if engine.dialect.name == "sqlite":
+        # Данные для нагрузочных тестов не требуют полной надежности записи
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+
+    return engine
+
+
+class SeedRandom(random.Random):
+    """Генератор данных с детерминированными UUIDv7-ключами.
+
+    Время в ключах - синтетические часы, которые идут вперед с каждым ключом,
+    поэтому ключи возрастают в порядке вставки, как и у ids.new_id().
+    """
+
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self._id_clock_ms = BASE_TIME_MS
+
+    def next_id(self):
+        self._id_clock_ms += 1
+        return str(uuid7(timestamp_ms=self._id_clock_ms, rng=self))
+
+
+def _make_id(rng):
+    return rng.next_id()
+
+
+def _make_timestamp(rng):
+    return BASE_TIME + timedelta(seconds=rng.randrange(TIME_SPAN_SECONDS))
+
+
+def generate_users(rng, start, count, with_description=False):
+    """Детерминированная генерация пользователей с номерами start..start+count-1"""
+    for number in range(start, start + count):
+        first = FIRST_NAMES[number % len(FIRST_NAMES)]
+        last = LAST_NAMES[(number // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        created_at = _make_timestamp(rng)
+        row = {
+            "id": _make_id(rng),
+            "username": f"{first}_{last}_{number}",
+            "email": f"{first}.{last}.{number}@example.com",
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        if with_description:
+            row["description"] = f"Пользователь {first.title()} {last.title()} №{number}"
+        yield row
+
+
+def generate_addresses(rng, user, count):
+    for index in range(count):
+        location = rng.choice(LOCATIONS)
+        city, state, country = location
+        # У каждого города свой небольшой набор индексов, как в реальных адресах
+        zip_base = 10000 + LOCATIONS.index(location) * 1000
+        created_at = user["created_at"] + timedelta(minutes=index)
+        yield {
+            "id": _make_id(rng),
+            "user_id": user["id"],
+            "street": f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            "city": city,
+            "state": state,
+            "zip_code": str(zip_base + rng.randint(10000, 99999) % ZIP_CODES_PER_CITY),
+            "country": country,
+            "is_primary": index == 0,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_products(rng, count):
+    for number in range(count):
+        created_at = _make_timestamp(rng)
+        name = f"{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_KINDS)} {number}"
+        yield {
+            "id": _make_id(rng),
+            "name": name,
+            "description": f"{name}: {' '.join(rng.sample(DESCRIPTION_WORDS, 8))}",
+            "price": round(rng.uniform(1, 2000), 2),
+            "stock_quantity": rng.randint(0, 10_000),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_orders(rng, user, addresses, products, count, items_per_order):
+    """Заказы пользователя вместе с позициями: [(order, [items])]"""
+    for _ in range(count):
+        created_at = _make_timestamp(rng)
+        order = {
+            "id": _make_id(rng),
+            "user_id": user["id"],
+            "delivery_address_id": rng.choice(addresses)["id"],
+            "status": rng.choice(ORDER_STATUSES),
+            "total_amount": 0.0,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        items = []
+        for product_id, price in rng.sample(products, min(items_per_order, len(products))):
+            quantity = rng.randint(1, 5)
+            order["total_amount"] += quantity * price
+            items.append({
+                "id": _make_id(rng),
+                "order_id": order["id"],
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": price,
+                "created_at": created_at,
+            })
+        order["total_amount"] = round(order["total_amount"], 2)
+        yield order, items
+
+
+def _insert_chunked(conn, table, rows, chunk_size, report):
+    """executemany через Core insert() порциями по chunk_size строк"""
+    stmt = insert(table)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        conn.execute(stmt, chunk)
+        report.add(table.name, len(chunk))
+
+
+def seed_bulk_data(
+    url="sqlite:///lab2.db",
+    users=100_000,
+    addresses_per_user=1,
+    products=0,
+    orders_per_user=0,
+    items_per_order=3,
+    chunk_size=10_000,
+    seed=42,
+    create_schema=False,
+    report_interval=2.0,
+):
+    """Массовое наполнение БД детерминированными тестовыми данными.
+
+    Пользователи обрабатываются порциями по chunk_size, вместе с их адресами,
+    заказами и позициями, поэтому память не растет с числом пользователей.
+    Одна порция - одна транзакция.
+    """
+    extended = products > 0 or orders_per_user > 0
+    if orders_per_user > 0 and (products <= 0 or addresses_per_user <= 0):
+        raise ValueError("Для заказов нужны товары и хотя бы один адрес на пользователя")
+
+    models = database_extended if extended else database
+    engine = create_seed_engine(url)
+    if create_schema:
+        models.Base.metadata.create_all(engine)
+
+    users_table = models.User.__table__
+    addresses_table = models.Address.__table__
+    rng = SeedRandom(seed)
+    report = ThroughputReport(interval=report_interval)
+
+    # Триггеры агрегатов и поискового индекса на время загрузки снимаются,
+    # а данные пересчитываются одним проходом в конце - это быстрее, чем
+    # обновлять их на каждую вставленную строку
+    with engine.begin() as conn:
+        suspended_aggregates = orders_per_user > 0 and aggregates.triggers_installed(conn)
+        if suspended_aggregates:
+            aggregates.drop_triggers(conn)
+        suspended_search = fulltext.triggers_installed(conn)
+        if suspended_search:
+            fulltext.drop_triggers(conn)
+
+    try:
+        # Для заказов в памяти остаются только ключи и цены товаров
+        product_prices = []
+        product_rows = generate_products(rng, products)
+        while chunk := list(itertools.islice(product_rows, chunk_size)):
+            product_prices.extend((row["id"], row["price"]) for row in chunk)
+            with engine.begin() as conn:
+                _insert_chunked(conn, database_extended.Product.__table__,
+                                chunk, chunk_size, report)
+
+        for start in range(0, users, chunk_size):
+            user_rows = list(generate_users(rng, start, min(chunk_size, users - start),
+                                            with_description=extended))
+            address_rows, order_rows, item_rows = [], [], []
+            for user in user_rows:
+                user_addresses = list(generate_addresses(rng, user, addresses_per_user))
+                address_rows.extend(user_addresses)
+                if orders_per_user > 0:
+                    for order, items in generate_orders(rng, user, user_addresses, product_prices,
+                                                        orders_per_user, items_per_order):
+                        order_rows.append(order)
+                        item_rows.extend(items)
+
+            with engine.begin() as conn:
+                _insert_chunked(conn, users_table, user_rows, chunk_size, report)
+                cache_for(conn).encode_rows(conn, address_rows)
+                _insert_chunked(conn, addresses_table, address_rows, chunk_size, report)
+                if order_rows:
+                    _insert_chunked(conn, database_extended.Order.__table__,
+                                    order_rows, chunk_size, report)
+                    _insert_chunked(conn, database_extended.OrderItem.__table__,
+                                    item_rows, chunk_size, report)
+    finally:
+        # Триггеры возвращаются и после неудачной загрузки: уже вставленные
+        # порции зафиксированы, и без триггеров новые заказы остались бы без сумм
+        with engine.begin() as conn:
+            if suspended_aggregates:
+                aggregates.reconcile_aggregates(conn)
+                aggregates.create_triggers(conn)
+            if suspended_search:
+                fulltext.rebuild_search_index(conn)
+                fulltext.create_triggers(conn)
+
+    engine.dispose()
+    report.print_progress()
+    summary = report.summary()
+    print(f"🎉 Вставлено {summary['total_rows']} строк за {summary['seconds']} с "
+          f"({summary['rows_per_second']:,.0f} строк/с)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовое наполнение БД тестовыми данными")
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--addresses-per-user", type=int, default=1)
+    parser.add_argument("--products", type=int, default=0)
+    parser.add_argument("--orders-per-user", type=int, default=0)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--create-schema", action="store_true",
+                        help="Создать таблицы через metadata.create_all (для чистой БД)")
+    args = parser.parse_args()
+
+    seed_bulk_data(
+        url=args.url,
+        users=args.users,
+        addresses_per_user=args.addresses_per_user,
+        products=args.products,
+        orders_per_user=args.orders_per_user,
+        items_per_order=args.items_per_order,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        create_schema=args.create_schema,
+    )
+
+
+if __name__ == "__main__":
+    main()
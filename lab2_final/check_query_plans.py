@@ -0,0 +1,105 @@
+# check_query_plans.py - проверка, что запросы по связям используют индексы
+import argparse
+import os
+import sys
+import tempfile
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (описание, SQL, индекс, который должен появиться в плане после миграции)
+QUERIES = [
+    ("адреса пользователя",
+     "SELECT * FROM addresses WHERE user_id = :id",
+     "ix_addresses_user_id"),
+    ("заказы пользователя по дате",
+     "SELECT * FROM orders WHERE user_id = :id ORDER BY created_at DESC",
+     "ix_orders_user_id_created_at"),
+    ("заказы пользователя за период",
+     "SELECT * FROM orders WHERE user_id = :id AND created_at >= '2024-06-01'",
+     "ix_orders_user_id_created_at"),
+    ("заказы по адресу доставки",
+     "SELECT * FROM orders WHERE delivery_address_id = :id",
+     "ix_orders_delivery_address_id"),
+    ("заказы по статусу",
+     "SELECT * FROM orders WHERE status = 'pending'",
+     "ix_orders_status"),
+    ("позиции заказа",
+     "SELECT * FROM order_items WHERE order_id = :id",
+     "ix_order_items_order_id"),
+    ("продажи товара",
+     "SELECT * FROM order_items WHERE product_id = :id",
+     "ix_order_items_product_id"),
+    ("заказы пользователя с товарами",
+     "SELECT o.id, p.name FROM orders o "
+     "JOIN order_items oi ON oi.order_id = o.id "
+     "JOIN products p ON p.id = oi.product_id "
+     "WHERE o.user_id = :id",
+     "ix_order_items_order_id"),
+]
+
+
+def _alembic_config(url):
+    config = Config(os.path.join(HERE, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def explain(conn, sql):
+    """Текстовые строки EXPLAIN QUERY PLAN для запроса"""
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"id": "x"}).all()
+    return [row[-1] for row in rows]
+
+
+def collect_plans(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        plans = {sql: explain(conn, sql) for _, sql, _ in QUERIES}
+    engine.dispose()
+    return plans
+
+
+def check_query_plans(before="002", after="head"):
+    """Сравнение планов до и после индексной миграции.
+
+    Возвращает True, если после миграции каждый запрос использует свой индекс.
+    """
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="query_plans_")
+    os.close(fd)
+    url = f"sqlite:///{db_path}"
+    config = _alembic_config(url)
+    try:
+        command.upgrade(config, before)
+        plans_before = collect_plans(url)
+        command.upgrade(config, after)
+        plans_after = collect_plans(url)
+    finally:
+        os.remove(db_path)
+
+    ok = True
+    for title, sql, index_name in QUERIES:
+        used = any(index_name in line for line in plans_after[sql])
+        ok = ok and used
+        print(f"{'✅' if used else '❌'} {title}")
+        print(f"   до ({before}):    " + " | ".join(plans_before[sql]))
+        print(f"   после ({after}): " + " | ".join(plans_after[sql]))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN до и после миграции с индексами")
+    parser.add_argument("--before", default="002", help="Ревизия без индексов")
+    parser.add_argument("--after", default="head", help="Ревизия с индексами")
+    args = parser.parse_args()
+
+    if not check_query_plans(args.before, args.after):
+        print("❌ Не все запросы используют индексы")
+        sys.exit(1)
+    print("🎉 Все запросы используют индексы")
+
+
+if __name__ == "__main__":
+    main()
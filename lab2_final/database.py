@@ -1,8 +1,10 @@
 ﻿# database.py (обновленная версия с отношениями)
-import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String, Text
+from ids import id_type, new_id
+from sqlalchemy import (Boolean, Column, DateTime, ForeignKey, Index, Integer,
+                        String, Text, func)
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -12,7 +14,7 @@ class Base(DeclarativeBase):
 class User(Base):
     __tablename__ = 'users'
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(id_type(), primary_key=True, default=new_id)
     username = Column(String(50), nullable=False, unique=True)
     email = Column(String(100), nullable=False, unique=True)
     created_at = Column(DateTime, default=datetime.now)
@@ -21,19 +23,39 @@ class User(Base):
     # Связь один-ко-многим с адресами
     addresses = relationship("Address", back_populates="user")
 
-class Address(Base):
-    __tablename__ = 'addresses'
+class Locality(Base):
+    __tablename__ = 'localities'
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
-    street = Column(String(200), nullable=False)
+    id = Column(Integer, primary_key=True)
     city = Column(String(100), nullable=False)
     state = Column(String(100))
     zip_code = Column(String(20))
     country = Column(String(100), nullable=False)
+
+# NULL в state и zip_code сравнивается как пустая строка: иначе пункты без
+# региона дублировались бы, ведь NULL в уникальном индексе не равен NULL
+Index('ux_localities_key', Locality.country, Locality.city,
+      func.coalesce(Locality.state, ''), func.coalesce(Locality.zip_code, ''),
+      unique=True)
+
+class Address(Base):
+    __tablename__ = 'addresses'
+    
+    id = Column(id_type(), primary_key=True, default=new_id)
+    user_id = Column(id_type(), ForeignKey('users.id'), nullable=False, index=True)
+    street = Column(String(200), nullable=False)
+    # city, state, zip_code, country вынесены в словарь localities
+    locality_id = Column(Integer, ForeignKey('localities.id'), nullable=False, index=True)
     is_primary = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     # Связь многие-к-одному с пользователем
-    user = relationship("User", back_populates="addresses")
\ No newline at end of file
+    user = relationship("User", back_populates="addresses")
+    locality = relationship("Locality", lazy="joined", innerjoin=True)
+
+    # Только для чтения: новый адрес получает locality_id (см. localities.py)
+    city = association_proxy("locality", "city")
+    state = association_proxy("locality", "state")
+    zip_code = association_proxy("locality", "zip_code")
+    country = association_proxy("locality", "country")
\ No newline at end of file
@@ -1,8 +1,13 @@
-import uuid
 from datetime import datetime
 
-from sqlalchemy import (Boolean, Column, DateTime, Float, ForeignKey, Integer,
-                        String, Text)
+from aggregates import TRIGGERS
+from fulltext import source_ddl
+from ids import id_type, new_id
+from partitions import create_default_partition_ddl, create_partitions
+from sqlalchemy import (DDL, Boolean, Column, DateTime, Float, ForeignKey,
+                        ForeignKeyConstraint, Index, Integer, String, Text,
+                        event, func, text)
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -12,7 +17,7 @@ class Base(DeclarativeBase):
 class User(Base):
     __tablename__ = 'users'
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(id_type(), primary_key=True, default=new_id)
     username = Column(String(50), nullable=False, unique=True)
     email = Column(String(100), nullable=False, unique=True)
     description = Column(Text, nullable=True)  # Новое поле
@@ -22,31 +27,53 @@ class User(Base):
     addresses = relationship("Address", back_populates="user")
     orders = relationship("Order", back_populates="user")
 
-class Address(Base):
-    __tablename__ = 'addresses'
+class Locality(Base):
+    __tablename__ = 'localities'
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
-    street = Column(String(200), nullable=False)
+    id = Column(Integer, primary_key=True)
     city = Column(String(100), nullable=False)
     state = Column(String(100))
     zip_code = Column(String(20))
     country = Column(String(100), nullable=False)
+
+# NULL в state и zip_code сравнивается как пустая строка: иначе пункты без
+# региона дублировались бы, ведь NULL в уникальном индексе не равен NULL
+Index('ux_localities_key', Locality.country, Locality.city,
+      func.coalesce(Locality.state, ''), func.coalesce(Locality.zip_code, ''),
+      unique=True)
+
+class Address(Base):
+    __tablename__ = 'addresses'
+    
+    id = Column(id_type(), primary_key=True, default=new_id)
+    user_id = Column(id_type(), ForeignKey('users.id'), nullable=False, index=True)
+    street = Column(String(200), nullable=False)
+    # city, state, zip_code, country вынесены в словарь localities
+    locality_id = Column(Integer, ForeignKey('localities.id'), nullable=False, index=True)
     is_primary = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     user = relationship("User", back_populates="addresses")
+    locality = relationship("Locality", lazy="joined", innerjoin=True)
+
+    # Только для чтения: новый адрес получает locality_id (см. localities.py)
+    city = association_proxy("locality", "city")
+    state = association_proxy("locality", "state")
+    zip_code = association_proxy("locality", "zip_code")
+    country = association_proxy("locality", "country")
     orders = relationship("Order", back_populates="delivery_address")
 
 class Product(Base):
     __tablename__ = 'products'
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(id_type(), primary_key=True, default=new_id)
     name = Column(String(100), nullable=False)
     description = Column(Text)
     price = Column(Float, nullable=False)
     stock_quantity = Column(Integer, default=0)
+    # Поддерживается триггерами на order_items (см. aggregates.py)
+    units_sold = Column(Integer, nullable=False, default=0, server_default='0')
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -54,28 +81,66 @@ class Product(Base):
 
 class Order(Base):
     __tablename__ = 'orders'
+    # Составной индекс покрывает и выборку по одному user_id.
+    # PostgreSQL секционирует таблицу по месяцам created_at (см. partitions.py):
+    # ключ раздела обязан входить в первичный ключ, а уникальный индекс по
+    # одному id (цель внешнего ключа order_items) возможен только в SQLite
+    __table_args__ = (
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_orders_created_at', 'created_at'),
+        Index('ux_orders_id', 'id', unique=True).ddl_if(dialect='sqlite'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
-    delivery_address_id = Column(String(36), ForeignKey('addresses.id'), nullable=False)
-    status = Column(String(50), default='pending')
+    id = Column(id_type(), primary_key=True, default=new_id)
+    user_id = Column(id_type(), ForeignKey('users.id'), nullable=False)
+    delivery_address_id = Column(id_type(), ForeignKey('addresses.id'), nullable=False, index=True)
+    status = Column(String(50), default='pending', index=True)
+    # Сумма позиций заказа, поддерживается триггерами на order_items
     total_amount = Column(Float, default=0.0)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, primary_key=True, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
+    # Для ORM заказ по-прежнему определяется одним id
+    __mapper_args__ = {'primary_key': [id]}
+
     user = relationship("User", back_populates="orders")
     delivery_address = relationship("Address", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order")
 
 class OrderItem(Base):
     __tablename__ = 'order_items'
+    # На секционированную orders в PostgreSQL ссылаться можно только по (id, created_at)
+    __table_args__ = (
+        ForeignKeyConstraint(['order_id'], ['orders.id']).ddl_if(dialect='sqlite'),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey('orders.id'), nullable=False)
-    product_id = Column(String(36), ForeignKey('products.id'), nullable=False)
+    id = Column(id_type(), primary_key=True, default=new_id)
+    order_id = Column(id_type(), nullable=False, index=True)
+    product_id = Column(id_type(), ForeignKey('products.id'), nullable=False, index=True)
     quantity = Column(Integer, default=1)
     unit_price = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
 
     order = relationship("Order", back_populates="order_items")
-    product = relationship("Product", back_populates="order_items")
\ No newline at end of file
+    product = relationship("Product", back_populates="order_items")
+
+# Триггеры агрегатов создаются вместе с таблицей при metadata.create_all
+for _trigger_sql in TRIGGERS.values():
+    event.listen(
+        OrderItem.__table__,
+        "after_create",
+        DDL(_trigger_sql).execute_if(dialect="sqlite"),
+    )
+
+# Полнотекстовый индекс FTS5 (см. fulltext.py)
+for _table in (User.__table__, Product.__table__):
+    for _search_sql in source_ddl(_table.name):
+        event.listen(_table, "after_create", DDL(_search_sql).execute_if(dialect="sqlite"))
+
+# Помесячные разделы orders в PostgreSQL: с текущего месяца вперед и раздел по умолчанию
+@event.listens_for(Order.__table__, "after_create")
+def _create_order_partitions(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        create_partitions(connection)
+        connection.execute(text(create_default_partition_ddl()))
@@ -0,0 +1,139 @@
+# fulltext.py - полнотекстовый индекс FTS5 по товарам и пользователям
+import argparse
+import re
+
+from sqlalchemy import create_engine, text
+
+# Внешние content-таблицы: FTS хранит только индекс и ссылается на rowid
+# исходной строки. У products и users нет INTEGER PRIMARY KEY, и VACUUM или
+# пересоздание таблицы (batch-миграция) может перенумеровать rowid - индекс
+# молча начнет указывать на чужие строки. Поэтому VACUUM запускается только
+# через vacuum() (python fulltext.py --vacuum), а после batch-миграций
+# users/products вызывается rebuild_search_index().
+FTS_TABLES = {
+    "products_fts": ("products", ["name", "description"]),
+    "users_fts": ("users", ["username", "description"]),
+}
+
+
+def _table_ddl(fts_table, source, columns):
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{', '.join(columns)}, content='{source}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def _trigger_ddl(fts_table, source, columns):
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    insert_new = f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.rowid, {new_values});"
+    delete_old = (f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) "
+                  f"VALUES ('delete', old.rowid, {old_values});")
+    return {
+        f"{fts_table}_ai": f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} "
+                           f"BEGIN {insert_new} END",
+        f"{fts_table}_ad": f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} "
+                           f"BEGIN {delete_old} END",
+        # Только текстовые колонки: частые обновления units_sold индекс не трогают
+        f"{fts_table}_au": f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {names} "
+                           f"ON {source} BEGIN {delete_old} {insert_new} END",
+    }
+
+
+TABLES_DDL = {fts_table: _table_ddl(fts_table, source, columns)
+              for fts_table, (source, columns) in FTS_TABLES.items()}
+TRIGGERS = {name: sql
+            for fts_table, (source, columns) in FTS_TABLES.items()
+            for name, sql in _trigger_ddl(fts_table, source, columns).items()}
+
+
+def source_ddl(source):
+    """DDL индекса и триггеров для одной исходной таблицы (для metadata.create_all)"""
+    statements = []
+    for fts_table, (table_source, columns) in FTS_TABLES.items():
+        if table_source == source:
+            statements.append(TABLES_DDL[fts_table])
+            statements.extend(_trigger_ddl(fts_table, source, columns).values())
+    return statements
+
+
+def create_search_index(conn):
+    for sql in TABLES_DDL.values():
+        conn.execute(text(sql))
+    create_triggers(conn)
+
+
+def drop_search_index(conn):
+    drop_triggers(conn)
+    for fts_table in FTS_TABLES:
+        conn.execute(text(f"DROP TABLE IF EXISTS {fts_table}"))
+
+
+def create_triggers(conn):
+    for sql in TRIGGERS.values():
+        conn.execute(text(sql))
+
+
+def drop_triggers(conn):
+    for name in TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def triggers_installed(conn):
+    if conn.dialect.name != "sqlite":
+        return False
+    names = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    return set(TRIGGERS) <= set(names)
+
+
+def rebuild_search_index(conn):
+    """Полное перестроение индекса по текущему содержимому таблиц"""
+    for fts_table in FTS_TABLES:
+        conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+
+def vacuum(engine):
+    """VACUUM базы и перестроение поискового индекса по новым rowid"""
+    # VACUUM не выполняется внутри транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    with engine.begin() as conn:
+        if triggers_installed(conn):
+            rebuild_search_index(conn)
+
+
+def to_match_query(query):
+    """Безопасный MATCH-запрос из пользовательского текста.
+
+    Каждое слово берется в кавычки (синтаксис FTS5 в тексте не срабатывает),
+    слова объединяются через AND. Последнее слово ищется по префиксу, как при
+    наборе запроса; префикс для всех слов заметно замедляет частые запросы.
+    """
+    tokens = [f'"{token}"' for token in re.findall(r"\w+", query)]
+    if tokens:
+        tokens[-1] += "*"
+    return " ".join(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обслуживание полнотекстового индекса")
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Выполнить VACUUM и перестроить индекс")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if args.vacuum:
+        vacuum(engine)
+        print("🧹 VACUUM выполнен, поисковый индекс перестроен")
+    else:
+        with engine.begin() as conn:
+            rebuild_search_index(conn)
+        print("🔄 Поисковый индекс перестроен")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ids.py - упорядоченные по времени идентификаторы (UUIDv7)
+import os
+import random
+import threading
+import time
+import uuid
+
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+# Хранение ключей: "string" - String(36) как раньше, "binary" - 16 байт
+ID_STORAGE = os.getenv("LAB2_ID_STORAGE", "string")
+
+_RAND_A_MAX = 0xFFF
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7(timestamp_ms=None, rng=None):
+    """UUID версии 7: 48 бит времени в мс, затем случайные биты.
+
+    Без timestamp_ms используется текущее время, а 12 бит rand_a работают как
+    счетчик внутри миллисекунды, поэтому значения монотонно возрастают даже
+    при генерации тысяч ключей в одну мс. rng (random.Random) позволяет
+    получать детерминированные ключи.
+    """
+    global _last_ms, _counter
+
+    if timestamp_ms is None:
+        with _lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > _last_ms:
+                _last_ms = now_ms
+                # Случайное начало счетчика, но с запасом до переполнения
+                _counter = random.getrandbits(11)
+            else:
+                _counter += 1
+                if _counter > _RAND_A_MAX:
+                    _last_ms += 1
+                    _counter = 0
+            timestamp_ms = _last_ms
+            rand_a = _counter
+    else:
+        rand_a = rng.getrandbits(12) if rng else random.getrandbits(12)
+
+    rand_b = rng.getrandbits(62) if rng else int.from_bytes(os.urandom(8), "big") >> 2
+    value = ((timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+             | 0x7 << 76
+             | rand_a << 64
+             | 0b10 << 62
+             | rand_b)
+    return uuid.UUID(int=value)
+
+
+def new_id():
+    """Значение по умолчанию для первичных ключей моделей"""
+    return str(uuid7())
+
+
+def uuid7_timestamp_ms(value):
+    """Время создания, зашитое в UUIDv7 (мс с начала эпохи)"""
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(bytes=value) if isinstance(value, bytes) else uuid.UUID(value)
+    return value.int >> 80
+
+
+class UUIDBinary(TypeDecorator):
+    """UUID в 16 байтах (BLOB в SQLite, нативный UUID в PostgreSQL).
+
+    В Python значения остаются строками вида 'xxxxxxxx-xxxx-...', поэтому код,
+    работающий со String(36)-ключами, менять не нужно.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return None if value is None else str(value)
+        if isinstance(value, str):
+            # Быстрее, чем uuid.UUID(value).bytes, - важно при массовой вставке
+            return bytes.fromhex(value.replace("-", ""))
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return str(uuid.UUID(bytes=value))
+
+
+def id_type():
+    """Тип колонки для первичных и внешних ключей (см. LAB2_ID_STORAGE)"""
+    if ID_STORAGE == "binary":
+        return UUIDBinary()
+    return String(36)
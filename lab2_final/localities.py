@@ -0,0 +1,182 @@
+# localities.py - словарь населенных пунктов (city, state, zip_code, country)
+from database_extended import Address, Locality, Order
+from sqlalchemy import event, func, insert, select, tuple_
+
+LOOKUP_CHUNK_SIZE = 500
+
+# Ключ населенного пункта: пустая строка вместо NULL, как в уникальном
+# индексе ux_localities_key, иначе пункты без региона не совпадали бы друг с другом
+_KEY_COLUMNS = (
+    Locality.country,
+    Locality.city,
+    func.coalesce(Locality.state, ""),
+    func.coalesce(Locality.zip_code, ""),
+)
+
+LOCALITY_FIELDS = ("city", "state", "zip_code", "country")
+
+# Ключи, найденные или созданные в незафиксированной транзакции соединения
+_PENDING = "locality_pending"
+
+
+def locality_key(city, state, zip_code, country):
+    return country, city, state or "", zip_code or ""
+
+
+class LocalityCache:
+    """Кэш интернирования: ключ населенного пункта -> localities.id.
+
+    Известные ключи не ходят в БД, неизвестные ищутся и при необходимости
+    создаются пачкой. Кэш принадлежит одной базе данных. Найденные в
+    транзакции идентификаторы до ее фиксации видит только это соединение
+    (conn.info), в общий кэш они попадают при COMMIT, а при откате
+    отбрасываются: id откатившихся вставок в кэше не остаются.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def clear(self):
+        self._ids.clear()
+
+    def _lookup(self, conn, keys):
+        pending = conn.info.setdefault(_PENDING, {})
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            rows = conn.execute(
+                select(Locality.id, *_KEY_COLUMNS).where(tuple_(*_KEY_COLUMNS).in_(chunk))
+            )
+            for locality_id, *key in rows:
+                pending[tuple(key)] = locality_id
+
+    def get_ids(self, conn, keys):
+        """Идентификаторы для набора ключей locality_key(); недостающие создаются"""
+        keys = set(keys)
+        pending = conn.info.get(_PENDING, {})
+        missing = [key for key in keys if key not in self._ids and key not in pending]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self._lookup(conn, missing)
+            pending = conn.info[_PENDING]
+            # Найденные ключи лежат в pending, а не в общем кэше
+            new = [key for key in missing if key not in pending]
+            if new:
+                conn.execute(insert(Locality), [
+                    {"country": country, "city": city, "state": state or None,
+                     "zip_code": zip_code or None}
+                    for country, city, state, zip_code in new
+                ])
+                self._lookup(conn, new)
+        return {key: self._ids[key] if key in self._ids else pending[key] for key in keys}
+
+    def get_id(self, conn, city, country, state=None, zip_code=None):
+        key = locality_key(city, state, zip_code, country)
+        return self.get_ids(conn, [key])[key]
+
+    def encode_rows(self, conn, rows):
+        """Заменить в строках адресов city/state/zip_code/country на locality_id"""
+        keys = [locality_key(*(row.pop(field, None) for field in LOCALITY_FIELDS)) for row in rows]
+        ids = self.get_ids(conn, keys)
+        for row, key in zip(rows, keys):
+            row["locality_id"] = ids[key]
+        return rows
+
+
+_caches = {}
+
+
+def _publish_pending(conn):
+    pending = conn.info.pop(_PENDING, None)
+    if pending:
+        cache_for(conn)._ids.update(pending)
+
+
+def _discard_pending(conn, *args):
+    # Откат до точки сохранения тоже сбрасывает все: лишний поиск дешевле
+    # неверного id в кэше
+    conn.info.pop(_PENDING, None)
+
+
+def cache_for(bind):
+    """Общий на процесс кэш для базы данных движка или соединения bind"""
+    engine = bind.engine
+    url = str(engine.url)
+    if url not in _caches:
+        _caches[url] = LocalityCache()
+    if not event.contains(engine, "commit", _publish_pending):
+        event.listen(engine, "commit", _publish_pending)
+        event.listen(engine, "rollback", _discard_pending)
+        event.listen(engine, "rollback_savepoint", _discard_pending)
+    return _caches[url]
+
+
+def locality_id(session, city, country, state=None, zip_code=None):
+    """locality_id для нового адреса в ORM-сессии"""
+    conn = session.connection()
+    return cache_for(conn).get_id(conn, city, country, state=state, zip_code=zip_code)
+
+
+def addresses_per_country(session):
+    """Число адресов по странам: группировка по целому locality_id, затем по стране"""
+    per_locality = (
+        select(Address.locality_id, func.count().label("addresses"))
+        .group_by(Address.locality_id)
+        .subquery()
+    )
+    stmt = (
+        select(Locality.country, func.sum(per_locality.c.addresses).label("addresses"))
+        .join(per_locality, per_locality.c.locality_id == Locality.id)
+        .group_by(Locality.country)
+        .order_by(func.sum(per_locality.c.addresses).desc())
+    )
+    return session.execute(stmt).all()
+
+
+def addresses_per_city(session, country=None):
+    """Число адресов по городам (country, city), при желании в одной стране"""
+    per_locality = (
+        select(Address.locality_id, func.count().label("addresses"))
+        .group_by(Address.locality_id)
+        .subquery()
+    )
+    stmt = (
+        select(Locality.country, Locality.city,
+               func.sum(per_locality.c.addresses).label("addresses"))
+        .join(per_locality, per_locality.c.locality_id == Locality.id)
+        .group_by(Locality.country, Locality.city)
+        .order_by(func.sum(per_locality.c.addresses).desc())
+    )
+    if country is not None:
+        stmt = stmt.where(Locality.country == country)
+    return session.execute(stmt).all()
+
+
+def orders_per_country(session, start=None, end=None):
+    """Число заказов и выручка по странам доставки, при желании за период [start, end)"""
+    per_locality = (
+        select(Address.locality_id,
+               func.count(Order.id).label("orders"),
+               func.sum(Order.total_amount).label("revenue"))
+        .join(Order, Order.delivery_address_id == Address.id)
+        .group_by(Address.locality_id)
+    )
+    if start is not None:
+        per_locality = per_locality.where(Order.created_at >= start)
+    if end is not None:
+        per_locality = per_locality.where(Order.created_at < end)
+    per_locality = per_locality.subquery()
+    stmt = (
+        select(Locality.country,
+               func.sum(per_locality.c.orders).label("orders"),
+               func.round(func.sum(per_locality.c.revenue), 2).label("revenue"))
+        .join(per_locality, per_locality.c.locality_id == Locality.id)
+        .group_by(Locality.country)
+        .order_by(func.sum(per_locality.c.revenue).desc())
+    )
+    return session.execute(stmt).all()
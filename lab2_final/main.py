@@ -1,7 +1,7 @@
 # main.py
 import os
 
-from queries import query_related_data
+from queries import query_related_data, query_related_data_streaming
 from seed_data import seed_initial_data
 
 
@@ -19,7 +19,8 @@ def main():
         print("\nВыберите действие:")
         print("1 - Наполнить БД тестовыми данными")
         print("2 - Вывести связанные данные")
-        print("3 - Выйти")
+        print("3 - Вывести связанные данные потоково (большие таблицы)")
+        print("4 - Выйти")
         
         choice = input("\nВаш выбор: ").strip()
         
@@ -30,6 +31,9 @@ def main():
             print("\n📊 Выводим связанные данные...")
             query_related_data()
         elif choice == "3":
+            print("\n📊 Выводим связанные данные пачками...")
+            query_related_data_streaming()
+        elif choice == "4":
             print("👋 Выход из программы")
             break
         else:
@@ -7,7 +7,11 @@ from sqlalchemy import engine_from_config, pool
 
 sys.path.append(os.getcwd())
 
-from database import Base
+from archive import archive_metadata, archive_watermark
+from backfill import backfill_checkpoints
+from database_extended import Base
+from fulltext import FTS_TABLES
+from partitions import is_partition_table
 
 config = context.config
 
@@ -16,11 +20,24 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+SERVICE_TABLES = {backfill_checkpoints.name, archive_watermark.name,
+                  *(table.name for table in archive_metadata.tables.values())}
+
+def include_name(name, type_, parent_names):
+    # Таблицы FTS5 с их служебными таблицами, контрольные точки backfill,
+    # архив заказов и отключенные разделы orders не описываются моделями
+    if type_ == 'table':
+        return (not name.startswith(tuple(FTS_TABLES))
+                and name not in SERVICE_TABLES
+                and not is_partition_table(name))
+    return True
+
 def run_migrations_offline():
     url = config.get_main_option('sqlalchemy.url')
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={'paramstyle': 'named'},
     )
@@ -36,7 +53,8 @@ def run_migrations_online():
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
-            target_metadata=target_metadata
+            target_metadata=target_metadata,
+            include_name=include_name,
         )
         with context.begin_transaction():
             context.run_migrations()
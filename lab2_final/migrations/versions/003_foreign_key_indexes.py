@@ -0,0 +1,34 @@
+"""indexes for foreign keys and order lookups
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 12:30:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_addresses_user_id', 'addresses', ['user_id'])
+    # Составной индекс покрывает и поиск по одному user_id (левый префикс),
+    # поэтому отдельный ix_orders_user_id не нужен
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'])
+    op.create_index('ix_orders_delivery_address_id', 'orders', ['delivery_address_id'])
+    op.create_index('ix_orders_status', 'orders', ['status'])
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'])
+
+
+def downgrade():
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_status', table_name='orders')
+    op.drop_index('ix_orders_delivery_address_id', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    op.drop_index('ix_addresses_user_id', table_name='addresses')
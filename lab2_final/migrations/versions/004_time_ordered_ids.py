@@ -0,0 +1,162 @@
+"""time-ordered UUIDv7 primary keys
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 14:00:00
+
+Переписывает существующие uuid4-ключи на UUIDv7, время в которых берется из
+created_at строки, и обновляет все внешние ключи. Хранение ключей берется из
+ids.ID_STORAGE, как в моделях и миграции 007: LAB2_ID_STORAGE=binary
+переводит ключи в 16 байт.
+В других СУБД ключи на месте не переписываются: миграция применима к
+пустой схеме и меняет только типы ключевых колонок.
+
+"""
+import uuid
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+from ids import ID_STORAGE, UUIDBinary, uuid7
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# таблица -> колонки других таблиц, которые на нее ссылаются
+KEY_REFERENCES = {
+    'users': [('addresses', 'user_id'), ('orders', 'user_id')],
+    'addresses': [('orders', 'delivery_address_id')],
+    'products': [('order_items', 'product_id')],
+    'orders': [('order_items', 'order_id')],
+    'order_items': [],
+}
+
+BATCH_SIZE = 10_000
+
+
+def _can_rewrite_keys(conn):
+    """Нужно ли переписывать ключи на месте; в непустой не-SQLite базе - ошибка"""
+    # Первичные ключи обновляются на месте, пока на них ссылаются внешние ключи:
+    # это допустимо только при выключенной проверке FK, как в SQLite по умолчанию.
+    # В пустой схеме других СУБД переписывать нечего, меняются только типы колонок
+    if conn.dialect.name == 'sqlite':
+        return True
+    for table in KEY_REFERENCES:
+        if conn.execute(sa.text(f'SELECT 1 FROM {table} LIMIT 1')).first() is not None:
+            raise RuntimeError(
+                f"Таблица {table} не пуста: переписать ключи на месте можно только в SQLite"
+            )
+    return False
+
+
+def _created_at_ms(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp() * 1000)
+
+
+def _rewrite_keys(conn, convert):
+    """Замена ключей во всех таблицах по таблицам соответствия old_id -> new_id"""
+    for table in KEY_REFERENCES:
+        map_table = f'_key_map_{table}'
+        conn.execute(sa.text(f'CREATE TEMPORARY TABLE {map_table} (old_id PRIMARY KEY, new_id)'))
+        insert_map = sa.text(f'INSERT INTO {map_table} (old_id, new_id) VALUES (:old_id, :new_id)')
+        result = conn.execute(sa.text(f'SELECT id, created_at FROM {table} ORDER BY created_at'))
+        while True:
+            rows = result.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            conn.execute(insert_map, [
+                {'old_id': key, 'new_id': convert(key, created_at)} for key, created_at in rows
+            ])
+
+    for table, references in KEY_REFERENCES.items():
+        map_table = f'_key_map_{table}'
+        for child, column in references:
+            conn.execute(sa.text(
+                f'UPDATE {child} SET {column} = '
+                f'(SELECT new_id FROM {map_table} WHERE old_id = {child}.{column})'
+            ))
+        conn.execute(sa.text(
+            f'UPDATE {table} SET id = (SELECT new_id FROM {map_table} WHERE old_id = {table}.id)'
+        ))
+
+    for table in KEY_REFERENCES:
+        conn.execute(sa.text(f'DROP TABLE _key_map_{table}'))
+
+
+def _key_columns():
+    columns = {table: ['id'] for table in KEY_REFERENCES}
+    for references in KEY_REFERENCES.values():
+        for child, column in references:
+            columns[child].append(column)
+    return columns
+
+
+def _alter_key_types(conn, new_type, old_type, cast):
+    if conn.dialect.name != 'sqlite':
+        _alter_key_types_in_place(conn, new_type, old_type, cast)
+        return
+    # Все ключевые колонки таблицы меняются за одно пересоздание таблицы
+    for table, table_columns in _key_columns().items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in table_columns:
+                batch_op.alter_column(column, type_=new_type, existing_type=old_type,
+                                      existing_nullable=False)
+
+
+def _alter_key_types_in_place(conn, new_type, old_type, cast):
+    """ALTER COLUMN ... TYPE в PostgreSQL: внешние ключи снимаются на время смены типов"""
+    inspector = sa.inspect(conn)
+    foreign_keys = [
+        (table, fk) for table in KEY_REFERENCES for fk in inspector.get_foreign_keys(table)
+    ]
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk['name'], table, type_='foreignkey')
+    for table, table_columns in _key_columns().items():
+        for column in table_columns:
+            op.alter_column(table, column, type_=new_type, existing_type=old_type,
+                            existing_nullable=False, postgresql_using=f'{column}::{cast}')
+    for table, fk in foreign_keys:
+        op.create_foreign_key(fk['name'], table, fk['referred_table'],
+                              fk['constrained_columns'], fk['referred_columns'],
+                              **fk.get('options', {}))
+
+
+def _key_storage_is_binary(conn):
+    column = next(c for c in sa.inspect(conn).get_columns('users') if c['name'] == 'id')
+    type_name = str(column['type']).upper()
+    return isinstance(column['type'], (sa.LargeBinary, sa.Uuid)) or 'BLOB' in type_name or 'UUID' in type_name
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Тот же источник, что у id_type(): иначе 007 пересоздал бы orders
+    # со строковыми ключами поверх уже бинарных
+    binary = ID_STORAGE == 'binary'
+
+    def to_uuid7(old_id, created_at):
+        new_id = uuid7(timestamp_ms=_created_at_ms(created_at))
+        return new_id.bytes if binary else str(new_id)
+
+    if _can_rewrite_keys(conn):
+        _rewrite_keys(conn, to_uuid7)
+    if binary:
+        _alter_key_types(conn, UUIDBinary(), sa.String(length=36), 'uuid')
+
+
+def downgrade():
+    # Исходные uuid4-значения не восстанавливаются: UUIDv7 в String(36)
+    # остаются корректными ключами, возвращается только строковое хранение
+    conn = op.get_bind()
+    if not _key_storage_is_binary(conn):
+        return
+
+    if _can_rewrite_keys(conn):
+        _rewrite_keys(conn, lambda old_id, created_at: str(uuid.UUID(bytes=old_id)))
+    _alter_key_types(conn, sa.String(length=36), UUIDBinary(), 'text')
@@ -0,0 +1,35 @@
+"""incrementally maintained order totals and product sales
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 15:00:00
+
+"""
+import sqlalchemy as sa
+from aggregates import (create_triggers, drop_trigger_function, drop_triggers,
+                        reconcile_aggregates)
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('products',
+        sa.Column('units_sold', sa.Integer(), server_default='0', nullable=False)
+    )
+    conn = op.get_bind()
+    # SQLite - триггеры на SQL, PostgreSQL - триггеры на PL/pgSQL-функции
+    create_triggers(conn)
+    reconcile_aggregates(conn)
+
+
+def downgrade():
+    conn = op.get_bind()
+    drop_triggers(conn)
+    drop_trigger_function(conn)
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_column('units_sold')
@@ -0,0 +1,32 @@
+"""FTS5 full-text index for products and users
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+from fulltext import (create_search_index, drop_search_index,
+                      rebuild_search_index)
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    # FTS5 есть только в SQLite; на других СУБД поиск не создается
+    if conn.dialect.name != 'sqlite':
+        return
+    create_search_index(conn)
+    rebuild_search_index(conn)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'sqlite':
+        return
+    drop_search_index(conn)
@@ -0,0 +1,139 @@
+"""monthly range partitioning of orders by created_at
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 17:00:00
+
+PostgreSQL: orders пересоздается как PARTITION BY RANGE (created_at) с
+первичным ключом (id, created_at), разделами на каждый месяц существующих
+данных и на несколько месяцев вперед, и разделом по умолчанию. Внешний ключ
+order_items.order_id удаляется: на секционированную таблицу можно ссылаться
+только по (id, created_at).
+
+SQLite: created_at входит в первичный ключ, id остается уникальным (на него
+ссылается order_items), добавляется индекс по created_at для выборок за месяц.
+
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from aggregates import create_triggers, drop_triggers
+from alembic import op
+from ids import id_type
+from partitions import (add_months, create_default_partition_ddl,
+                        create_partition_ddl, month_start)
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+ORDER_INDEXES = [
+    ('ix_orders_user_id_created_at', ['user_id', 'created_at']),
+    ('ix_orders_delivery_address_id', ['delivery_address_id']),
+    ('ix_orders_status', ['status']),
+]
+
+COLUMNS = 'id, user_id, delivery_address_id, status, total_amount, created_at, updated_at'
+
+
+def _order_columns():
+    return [
+        sa.Column('id', id_type(), nullable=False),
+        sa.Column('user_id', id_type(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('delivery_address_id', id_type(), sa.ForeignKey('addresses.id'), nullable=False),
+        sa.Column('status', sa.String(length=50)),
+        sa.Column('total_amount', sa.Float()),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]
+
+
+def _fill_created_at(conn):
+    conn.execute(sa.text(
+        'UPDATE orders SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) '
+        'WHERE created_at IS NULL'
+    ))
+
+
+def _order_items_fk_name(conn):
+    for fk in sa.inspect(conn).get_foreign_keys('order_items'):
+        if fk['referred_table'] == 'orders':
+            return fk['name']
+    return None
+
+
+def _upgrade_postgresql(conn):
+    fk_name = _order_items_fk_name(conn)
+    if fk_name:
+        op.drop_constraint(fk_name, 'order_items', type_='foreignkey')
+
+    op.create_table(
+        'orders_partitioned', *_order_columns(),
+        sa.PrimaryKeyConstraint('id', 'created_at', name='orders_partitioned_pkey'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    first, last = conn.execute(sa.text('SELECT min(created_at), max(created_at) FROM orders')).one()
+    current = month_start(datetime.now())
+    start = month_start(first) if first else current
+    end = max(month_start(last), current) if last else current
+    end = add_months(end, MONTHS_AHEAD)
+    while start <= end:
+        conn.execute(sa.text(create_partition_ddl(start, table='orders_partitioned')))
+        start = add_months(start, 1)
+    conn.execute(sa.text(create_default_partition_ddl(table='orders_partitioned')))
+
+    conn.execute(sa.text(f'INSERT INTO orders_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM orders'))
+    op.drop_table('orders')
+    op.rename_table('orders_partitioned', 'orders')
+    conn.execute(sa.text('ALTER TABLE orders RENAME CONSTRAINT orders_partitioned_pkey TO orders_pkey'))
+    for name, columns in ORDER_INDEXES + [('ix_orders_created_at', ['created_at'])]:
+        op.create_index(name, 'orders', columns)
+
+
+def _downgrade_postgresql(conn):
+    op.create_table('orders_plain', *_order_columns(),
+                    sa.PrimaryKeyConstraint('id', name='orders_plain_pkey'))
+    conn.execute(sa.text(f'INSERT INTO orders_plain ({COLUMNS}) SELECT {COLUMNS} FROM orders'))
+    # Разделы удаляются вместе с родительской таблицей; отключенные остаются
+    op.drop_table('orders')
+    op.rename_table('orders_plain', 'orders')
+    conn.execute(sa.text('ALTER TABLE orders RENAME CONSTRAINT orders_plain_pkey TO orders_pkey'))
+    for name, columns in ORDER_INDEXES:
+        op.create_index(name, 'orders', columns)
+    op.create_foreign_key(None, 'order_items', 'orders', ['order_id'], ['id'])
+
+
+def upgrade():
+    conn = op.get_bind()
+    _fill_created_at(conn)
+    if conn.dialect.name == 'postgresql':
+        _upgrade_postgresql(conn)
+        return
+
+    # Триггеры order_items ссылаются на orders и мешают пересозданию таблицы
+    drop_triggers(conn)
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_primary_key('pk_orders', ['id', 'created_at'])
+        batch_op.create_index('ux_orders_id', ['id'], unique=True)
+        batch_op.create_index('ix_orders_created_at', ['created_at'])
+    create_triggers(conn)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        _downgrade_postgresql(conn)
+        return
+
+    drop_triggers(conn)
+    with op.batch_alter_table('orders', recreate='always') as batch_op:
+        batch_op.drop_index('ix_orders_created_at')
+        batch_op.drop_index('ux_orders_id')
+        batch_op.create_primary_key('pk_orders', ['id'])
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+    create_triggers(conn)
@@ -0,0 +1,86 @@
+"""dictionary-encoded address localities
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 18:00:00
+
+city, state, zip_code и country из addresses переносятся в таблицу
+localities без повторов, адрес ссылается на нее целым locality_id.
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# Совпадение пункта без учета NULL, как в уникальном индексе ux_localities_key
+SAME_LOCALITY = (
+    "localities.country = addresses.country AND localities.city = addresses.city "
+    "AND COALESCE(localities.state, '') = COALESCE(addresses.state, '') "
+    "AND COALESCE(localities.zip_code, '') = COALESCE(addresses.zip_code, '')"
+)
+
+
+def upgrade():
+    op.create_table(
+        'localities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('city', sa.String(length=100), nullable=False),
+        sa.Column('state', sa.String(length=100), nullable=True),
+        sa.Column('zip_code', sa.String(length=20), nullable=True),
+        sa.Column('country', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ux_localities_key', 'localities', [
+        'country', 'city', sa.text("COALESCE(state, '')"), sa.text("COALESCE(zip_code, '')"),
+    ], unique=True)
+
+    op.execute(
+        "INSERT INTO localities (country, city, state, zip_code) "
+        "SELECT country, city, NULLIF(COALESCE(state, ''), ''), NULLIF(COALESCE(zip_code, ''), '') "
+        "FROM addresses "
+        "GROUP BY country, city, COALESCE(state, ''), COALESCE(zip_code, '')"
+    )
+    op.add_column('addresses', sa.Column('locality_id', sa.Integer(), nullable=True))
+    op.execute(
+        f"UPDATE addresses SET locality_id = "
+        f"(SELECT localities.id FROM localities WHERE {SAME_LOCALITY})"
+    )
+
+    with op.batch_alter_table('addresses') as batch_op:
+        batch_op.alter_column('locality_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_addresses_locality_id', 'localities',
+                                    ['locality_id'], ['id'])
+        batch_op.create_index('ix_addresses_locality_id', ['locality_id'])
+        batch_op.drop_column('city')
+        batch_op.drop_column('state')
+        batch_op.drop_column('zip_code')
+        batch_op.drop_column('country')
+
+
+def downgrade():
+    with op.batch_alter_table('addresses') as batch_op:
+        batch_op.add_column(sa.Column('city', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('state', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('zip_code', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('country', sa.String(length=100), nullable=True))
+
+    for column in ('city', 'state', 'zip_code', 'country'):
+        op.execute(
+            f"UPDATE addresses SET {column} = "
+            f"(SELECT localities.{column} FROM localities WHERE localities.id = addresses.locality_id)"
+        )
+
+    with op.batch_alter_table('addresses') as batch_op:
+        batch_op.alter_column('city', existing_type=sa.String(length=100), nullable=False)
+        batch_op.alter_column('country', existing_type=sa.String(length=100), nullable=False)
+        batch_op.drop_index('ix_addresses_locality_id')
+        batch_op.drop_constraint('fk_addresses_locality_id', type_='foreignkey')
+        batch_op.drop_column('locality_id')
+
+    op.drop_index('ux_localities_key', table_name='localities')
+    op.drop_table('localities')
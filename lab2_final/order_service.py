@@ -0,0 +1,75 @@
+# order_service.py - оформление заказа с атомарным резервированием остатков
+from collections import Counter
+
+from database_extended import Order, OrderItem, Product
+from ids import new_id
+from sqlalchemy import case, insert, update
+
+
+class InsufficientStockError(ValueError):
+    """Недостаточно товара на складе; заказ не создан"""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Недостаточно товара на складе: {', '.join(self.product_ids)}")
+
+
+def place_order(session, user_id, delivery_address_id, items):
+    """Создать заказ, списав остатки всех товаров одним UPDATE.
+
+    items - пары (product_id, quantity). Остатки уменьшаются одним
+    UPDATE ... WHERE stock_quantity >= :qty RETURNING для всех товаров сразу:
+    проверка и списание атомарны, поэтому параллельные заказы не уводят остаток
+    в минус. Если вернулось меньше строк, чем товаров, транзакция
+    откатывается и выбрасывается InsufficientStockError. Позиции вставляются
+    одним многострочным INSERT; сумму заказа и units_sold поддерживают
+    триггеры (aggregates.py).
+
+    Если у сессии уже открыта транзакция, заказ оформляется внутри SAVEPOINT,
+    а фиксирует внешнюю транзакцию вызывающий код.
+    """
+    quantities = Counter()
+    for product_id, quantity in items:
+        if quantity <= 0:
+            raise ValueError(f"Некорректное количество {quantity} для товара {product_id}")
+        quantities[product_id] += quantity
+    if not quantities:
+        raise ValueError("Заказ без позиций")
+
+    requested = case(dict(quantities), value=Product.id)
+    reserve = (
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock_quantity >= requested)
+        .values(stock_quantity=Product.stock_quantity - requested)
+        .returning(Product.id, Product.price)
+        .execution_options(synchronize_session=False)
+    )
+
+    transaction = session.begin_nested() if session.in_transaction() else session.begin()
+    with transaction:
+        prices = dict(session.execute(reserve).all())
+        if len(prices) < len(quantities):
+            # Исключение откатывает транзакцию вместе с частичным списанием
+            raise InsufficientStockError(set(quantities) - set(prices))
+
+        order_id = new_id()
+        session.execute(insert(Order).values(
+            id=order_id,
+            user_id=user_id,
+            delivery_address_id=delivery_address_id,
+            status="pending",
+            total_amount=0.0,
+        ))
+        session.execute(insert(OrderItem).values([
+            {
+                "id": new_id(),
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": prices[product_id],
+            }
+            for product_id, quantity in quantities.items()
+        ]))
+
+    total = round(sum(prices[product_id] * quantity for product_id, quantity in quantities.items()), 2)
+    return {"order_id": order_id, "total_amount": total, "items": dict(quantities)}
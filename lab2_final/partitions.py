@@ -0,0 +1,186 @@
+# partitions.py - помесячные разделы таблицы orders по created_at
+import argparse
+import re
+from datetime import datetime
+
+import aggregates
+from sqlalchemy import create_engine, inspect, text
+
+# PostgreSQL: orders - секционированная таблица (PARTITION BY RANGE (created_at)),
+# на каждый месяц свой раздел orders_pYYYY_MM и раздел orders_default для строк
+# вне созданных месяцев. Запрос с условием на created_at читает только
+# подходящие разделы (partition pruning).
+#
+# SQLite декларативного секционирования не имеет. Месяц - это диапазон
+# created_at внутри orders, который читается диапазонным сканом по
+# ix_orders_created_at, а отключенный месяц переносится в отдельную таблицу
+# orders_pYYYY_MM, как отключенный раздел в PostgreSQL, вместе с позициями
+# этих заказов (order_items_pYYYY_MM).
+PARTITIONED_TABLE = "orders"
+PARTITION_KEY = "created_at"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+ITEMS_TABLE = "order_items"
+
+_PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_p(\d{{4}})_(\d{{2}})$")
+_ITEMS_PARTITION_NAME = re.compile(rf"^{ITEMS_TABLE}_p\d{{4}}_\d{{2}}$")
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(start, months):
+    month = start.month - 1 + months
+    return datetime(start.year + month // 12, month % 12 + 1, 1)
+
+
+def month_bounds(value):
+    """Границы месяца [начало, начало следующего) для даты value"""
+    start = month_start(value)
+    return start, add_months(start, 1)
+
+
+def partition_name(start):
+    return f"{PARTITIONED_TABLE}_p{start:%Y_%m}"
+
+
+def items_partition_name(start):
+    return f"{ITEMS_TABLE}_p{start:%Y_%m}"
+
+
+def is_partition_table(name):
+    """Раздел или отключенный месяц: такие таблицы не описываются моделями"""
+    return (name == DEFAULT_PARTITION or _PARTITION_NAME.match(name) is not None
+            or _ITEMS_PARTITION_NAME.match(name) is not None)
+
+
+def detached_items_tables(conn):
+    """Таблицы order_items_pYYYY_MM с позициями отключенных месяцев (только SQLite)"""
+    if conn.dialect.name != "sqlite":
+        return []
+    names = inspect(conn).get_table_names()
+    return sorted(name for name in names if _ITEMS_PARTITION_NAME.match(name))
+
+
+def _partition_start(name):
+    match = _PARTITION_NAME.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def create_partition_ddl(start, table=PARTITIONED_TABLE):
+    lower, upper = month_bounds(start)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(lower)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+    )
+
+
+def create_default_partition_ddl(table=PARTITIONED_TABLE):
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {table} DEFAULT"
+
+
+def list_partitions(conn):
+    """Месяцы, которые сейчас читаются через orders: {начало месяца: имя}"""
+    if conn.dialect.name == "postgresql":
+        names = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :table"
+        ), {"table": PARTITIONED_TABLE}).scalars().all()
+        starts = (_partition_start(name) for name in names)
+    else:
+        months = conn.execute(text(
+            f"SELECT DISTINCT strftime('%Y-%m', {PARTITION_KEY}) FROM {PARTITIONED_TABLE}"
+        )).scalars().all()
+        starts = (datetime.strptime(month, "%Y-%m") for month in months if month)
+    return {start: partition_name(start) for start in sorted(s for s in starts if s)}
+
+
+def create_partitions(conn, months_ahead=3, today=None):
+    """Заранее создать разделы с текущего месяца на months_ahead месяцев вперед.
+
+    Раздел нужно создать до того, как в него пойдут строки: иначе они попадут
+    в orders_default, и раздел для этого месяца создать уже не получится.
+    В SQLite создавать нечего - возвращается пустой список.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    existing = list_partitions(conn)
+    current = month_start(today or datetime.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        if start not in existing:
+            conn.execute(text(create_partition_ddl(start)))
+            created.append(partition_name(start))
+    return created
+
+
+def detach_partitions(conn, retain_months=12, today=None):
+    """Отключить месяцы старше retain_months полных месяцев.
+
+    PostgreSQL: ALTER TABLE ... DETACH PARTITION, раздел остается отдельной
+    таблицей с теми же данными. SQLite: строки месяца переносятся из orders в
+    таблицу orders_pYYYY_MM, а их позиции - из order_items в order_items_pYYYY_MM,
+    в той же транзакции, поэтому висящих позиций не остается. Как и в
+    archive.archive_orders, триггер удаления позиций на время переноса
+    снимается: units_sold товаров не меняется.
+    """
+    cutoff = add_months(month_start(today or datetime.now()), -retain_months)
+    detached = []
+    for start, name in list_partitions(conn).items():
+        if start >= cutoff:
+            continue
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        else:
+            lower, upper = month_bounds(start)
+            in_month = f"WHERE {PARTITION_KEY} >= :lower AND {PARTITION_KEY} < :upper"
+            params = {"lower": lower, "upper": upper}
+            items_name = items_partition_name(start)
+            of_month = f"WHERE order_id IN (SELECT id FROM {PARTITIONED_TABLE} {in_month})"
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} AS "
+                              f"SELECT * FROM {PARTITIONED_TABLE} WHERE 0"))
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {items_name} AS "
+                              f"SELECT * FROM {ITEMS_TABLE} WHERE 0"))
+            conn.execute(text(f"INSERT INTO {name} SELECT * FROM {PARTITIONED_TABLE} {in_month}"),
+                         params)
+            conn.execute(text(f"INSERT INTO {items_name} SELECT * FROM {ITEMS_TABLE} {of_month}"),
+                         params)
+
+            # Позиции удаляются раньше заказов: с PRAGMA foreign_keys=ON на
+            # заказы ссылается внешний ключ order_items
+            suspend_trigger = aggregates.triggers_installed(conn)
+            if suspend_trigger:
+                aggregates.drop_trigger(conn, "trg_order_items_delete")
+            conn.execute(text(f"DELETE FROM {ITEMS_TABLE} {of_month}"), params)
+            if suspend_trigger:
+                aggregates.create_trigger(conn, "trg_order_items_delete")
+            conn.execute(text(f"DELETE FROM {PARTITIONED_TABLE} {in_month}"), params)
+        detached.append(name)
+    return detached
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обслуживание помесячных разделов orders")
+    parser.add_argument("--url", default="sqlite:///lab2.db")
+    parser.add_argument("--ahead", type=int, default=3,
+                        help="На сколько месяцев вперед создать разделы")
+    parser.add_argument("--retain", type=int,
+                        help="Отключить месяцы старше указанного числа месяцев")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    with engine.begin() as conn:
+        for name in create_partitions(conn, months_ahead=args.ahead):
+            print(f"✅ Создан раздел {name}")
+        if args.retain is not None:
+            for name in detach_partitions(conn, retain_months=args.retain):
+                print(f"📦 Отключен раздел {name}")
+        print(f"📊 Подключено месяцев: {len(list_partitions(conn))}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
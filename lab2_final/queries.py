@@ -1,17 +1,74 @@
-from database import Address, User
-from sqlalchemy import create_engine, select
+from collections import defaultdict
+
+from database import Address, Locality, User
+from database_extended import Order, Product
+from database_extended import User as SearchableUser
+from engines import get_engine
+from fulltext import to_match_query
+from partitions import month_bounds
+from sqlalchemy import column, literal_column, null, select, table
 from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+class AddressRecord:
+    """Легкая запись адреса только для чтения"""
+
+    __slots__ = ("street", "city", "country")
+
+    def __init__(self, street, city, country):
+        self.street = street
+        self.city = city
+        self.country = country
+
+class UserRecord:
+    """Легкая запись пользователя с адресами, без identity map и отслеживания изменений"""
+
+    __slots__ = ("id", "username", "email", "addresses")
+
+    def __init__(self, id, username, email, addresses):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.addresses = addresses
+
+def iter_user_records(session, batch_size=1000):
+    """Пользователи с адресами через Core: один JOIN, только нужные колонки.
 
+    Строки идут отсортированными по User.id, поэтому группировка по
+    пользователю делается за один проход, а yield_per держит память постоянной.
+    """
+    stmt = (
+        select(User.id, User.username, User.email,
+               Address.street, Locality.city, Locality.country)
+        .outerjoin(Address, Address.user_id == User.id)
+        .outerjoin(Locality, Locality.id == Address.locality_id)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    current = None
+    for user_id, username, email, street, city, country in session.execute(stmt):
+        if current is None or current.id != user_id:
+            if current is not None:
+                yield current
+            current = UserRecord(user_id, username, email, [])
+        if street is not None:
+            current.addresses.append(AddressRecord(street, city, country))
+    if current is not None:
+        yield current
 
-def query_related_data():
-    # Подключаемся к БД
-    engine = create_engine("sqlite:///lab2.db")
-    Session = sessionmaker(bind=engine)
+def query_related_data(mode="orm"):
+    """Вывод пользователей с адресами: mode="orm" (selectinload) или "core" (записи)"""
+    # Подключаемся к БД (движок общий на процесс)
+    Session = sessionmaker(bind=get_engine())
     
     with Session() as session:
-        # Запрос пользователей с их адресами используя selectinload
-        stmt = select(User).options(selectinload(User.addresses))
-        users = session.execute(stmt).scalars().all()
+        if mode == "core":
+            users = iter_user_records(session)
+        else:
+            # Запрос пользователей с их адресами используя selectinload
+            stmt = select(User).options(selectinload(User.addresses))
+            users = session.execute(stmt).scalars().all()
         
         print("=== ПОЛЬЗОВАТЕЛИ С АДРЕСАМИ ===")
         for user in users:
@@ -21,5 +78,114 @@ def query_related_data():
                 print(f"   - {address.street}, {address.city}, {address.country}")
             print("-" * 50)
 
+def iter_users_with_addresses(session, batch_size=1000):
+    """Потоковый обход пользователей с адресами пачками по batch_size.
+
+    Пользователи выбираются keyset-пагинацией по User.id, адреса каждой пачки -
+    одним запросом с IN. После обработки пачки identity map очищается,
+    поэтому потребление памяти не зависит от размера таблицы.
+    """
+    last_id = None
+    while True:
+        stmt = select(User).order_by(User.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(User.id > last_id)
+        users = session.execute(stmt).scalars().all()
+        if not users:
+            return
+
+        user_ids = [user.id for user in users]
+        addresses_by_user = defaultdict(list)
+        addresses_stmt = (
+            select(Address)
+            .where(Address.user_id.in_(user_ids))
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in session.execute(addresses_stmt).scalars().partitions():
+            for address in partition:
+                addresses_by_user[address.user_id].append(address)
+
+        for user in users:
+            # Заполняем связь так же, как это делает selectinload, без ленивой загрузки
+            set_committed_value(user, "addresses", addresses_by_user.get(user.id, []))
+            yield user
+
+        last_id = user_ids[-1]
+        session.expunge_all()
+        if len(users) < batch_size:
+            return
+
+def query_related_data_streaming(batch_size=1000):
+    """Вывод связанных данных с постоянным потреблением памяти"""
+    Session = sessionmaker(bind=get_engine())
+
+    with Session() as session:
+        print("=== ПОЛЬЗОВАТЕЛИ С АДРЕСАМИ (потоковый режим) ===")
+        for user in iter_users_with_addresses(session, batch_size=batch_size):
+            print(f"👤 Пользователь: {user.username} ({user.email})")
+            print("📍 Адреса:")
+            for address in user.addresses:
+                print(f"   - {address.street}, {address.city}, {address.country}")
+            print("-" * 50)
+
+def _search(session, model, fts_name, query, page, count, ranked):
+    match = to_match_query(query)
+    if not match:
+        return []
+
+    fts = table(fts_name, column("rowid"), column("rank"))
+    source_rowid = literal_column(f"{model.__tablename__}.rowid")
+    # Даже выбранный без сортировки rank заставляет FTS5 считать bm25
+    rank = fts.c.rank if ranked else null().label("rank")
+    stmt = (
+        select(model, rank)
+        .select_from(fts)
+        .join(model, source_rowid == fts.c.rowid)
+        .where(literal_column(fts_name).op("MATCH")(match))
+        .order_by(fts.c.rank if ranked else fts.c.rowid)
+        .offset((page - 1) * count)
+        .limit(count)
+    )
+    return session.execute(stmt).all()
+
+def search_products(session, query, page=1, count=20, ranked=True):
+    """Поиск товаров по названию и описанию (FTS5).
+
+    Возвращает строки (Product, rank), отсортированные по релевантности bm25:
+    чем меньше rank, тем лучше совпадение. bm25 считается для всех совпадений,
+    поэтому для очень частых слов ranked=False (порядок вставки, rank = None)
+    намного быстрее.
+    """
+    return _search(session, Product, "products_fts", query, page, count, ranked)
+
+def search_users(session, query, page=1, count=20, ranked=True):
+    """Поиск пользователей по имени и описанию (FTS5), строки (User, rank).
+
+    Модель из database_extended: описание, которое индексирует users_fts,
+    есть только в ней.
+    """
+    return _search(session, SearchableUser, "users_fts", query, page, count, ranked)
+
+def orders_between(session, start, end, user_id=None, status=None):
+    """Заказы за период [start, end), новые первыми.
+
+    Условие на created_at (ключ раздела) есть всегда: PostgreSQL читает только
+    разделы нужных месяцев, SQLite - диапазон индекса по created_at.
+    """
+    stmt = select(Order).where(Order.created_at >= start, Order.created_at < end)
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    if status is not None:
+        stmt = stmt.where(Order.status == status)
+    return session.scalars(stmt.order_by(Order.created_at.desc())).all()
+
+def get_order(session, order_id, created_at):
+    """Заказ по id; created_at (любой момент того же месяца) сужает поиск до одного раздела"""
+    start, end = month_bounds(created_at)
+    stmt = select(Order).where(
+        Order.id == order_id, Order.created_at >= start, Order.created_at < end
+    )
+    return session.scalars(stmt).first()
+
 if __name__ == "__main__":
-    query_related_data()
\ No newline at end of file
+    query_related_data()
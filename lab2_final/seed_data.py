@@ -1,14 +1,12 @@
 from database import Address, User
-from sqlalchemy import create_engine
+from engines import get_engine
+from localities import locality_id
 from sqlalchemy.orm import sessionmaker
 
 
 def seed_initial_data():
-    # Создаем фабрику подключений
-    engine = create_engine(
-        "sqlite:///lab2.db",
-        echo=True  # Логирование SQL-запросов
-    )
+    # Движок общий на процесс, повторный вызов не создает новый пул
+    engine = get_engine(echo=True)  # Логирование SQL-запросов
     
     # Создаем фабрику сессий
     Session = sessionmaker(bind=engine)
@@ -48,8 +46,8 @@ def seed_initial_data():
             address = Address(
                 user_id=addr_data["user"].id,
                 street=addr_data["street"],
-                city=addr_data["city"],
-                country=addr_data["country"],
+                # Город и страна - запись словаря localities (повторно не создается)
+                locality_id=locality_id(session, city=addr_data["city"], country=addr_data["country"]),
                 is_primary=addr_data["is_primary"]
             )
             session.add(address)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregates
+from bulk_seed import seed_bulk_data
+from database_extended import Product
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """База с товарами и заказами 2024 года и установленными триггерами агрегатов"""
+    url = f"sqlite:///{tmp_path / 'lab2.db'}"
+    seed_bulk_data(url=url, users=40, products=15, orders_per_user=3,
+                   create_schema=True, report_interval=60)
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        aggregates.create_triggers(conn)
+    yield engine
+    engine.dispose()
+
+
+def total_units_sold(conn):
+    return conn.execute(select(func.sum(Product.units_sold))).scalar()
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import aggregates
+import archive
+import partitions
+from backfill import BACKFILLS, run_backfill
+from conftest import total_units_sold
+from sqlalchemy import create_engine, text
+
+NOW = datetime(2026, 1, 1)
+
+
+def test_reconcile_after_archive_keeps_units_sold(engine):
+    with engine.begin() as conn:
+        units_before = total_units_sold(conn)
+
+    archive.configure_archive(engine)
+    assert archive.archive_orders(engine, older_than_days=365, now=NOW) > 0
+
+    # Как aggregates.py --reconcile: движок без configure_archive
+    plain_engine = create_engine(engine.url)
+    try:
+        with plain_engine.begin() as conn:
+            assert conn.execute(text("SELECT count(*) FROM order_items_archive")).scalar() > 0
+            assert aggregates.count_drift(conn) == {"orders": 0, "products": 0}
+            aggregates.reconcile_aggregates(conn)
+            assert total_units_sold(conn) == units_before
+    finally:
+        plain_engine.dispose()
+
+
+def test_reconcile_with_archive_in_separate_file(engine, tmp_path):
+    archive_engine = archive.configure_archive(
+        create_engine(engine.url), str(tmp_path / "archive.db")
+    )
+    try:
+        assert archive.archive_orders(archive_engine, older_than_days=365, now=NOW) > 0
+        with archive_engine.begin() as conn:
+            units_before = total_units_sold(conn)
+            assert aggregates.count_drift(conn)["products"] == 0
+            aggregates.reconcile_aggregates(conn)
+            assert total_units_sold(conn) == units_before
+    finally:
+        archive_engine.dispose()
+
+
+def test_reconcile_after_detaching_months_keeps_units_sold(engine):
+    with engine.begin() as conn:
+        units_before = total_units_sold(conn)
+        assert partitions.detach_partitions(conn, retain_months=3, today=datetime(2024, 12, 15))
+
+    with engine.begin() as conn:
+        assert aggregates.count_drift(conn) == {"orders": 0, "products": 0}
+        aggregates.reconcile_aggregates(conn)
+        assert total_units_sold(conn) == units_before
+
+
+def test_units_sold_backfill_after_archive(engine):
+    with engine.begin() as conn:
+        units_before = total_units_sold(conn)
+    archive.configure_archive(engine)
+    archive.archive_orders(engine, older_than_days=365, now=NOW)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET units_sold = 0"))
+
+    table, update_sql = BACKFILLS["product_units_sold"]
+    run_backfill(engine, "product_units_sold", table, update_sql, batch_size=4)
+
+    with engine.begin() as conn:
+        assert total_units_sold(conn) == units_before
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import localities
+import pytest
+from database_extended import Locality
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def locality_count(session):
+    return session.execute(select(func.count()).select_from(Locality)).scalar()
+
+
+def test_existing_then_new_then_existing_on_one_connection(engine, session):
+    city, state, zip_code, country = session.execute(
+        select(Locality.city, Locality.state, Locality.zip_code, Locality.country).limit(1)
+    ).one()
+    localities.cache_for(engine).clear()
+    before = locality_count(session)
+
+    existing = localities.locality_id(session, city, country, state=state, zip_code=zip_code)
+    new = localities.locality_id(session, "Новосибирск", "Россия")
+    assert localities.locality_id(session, city, country, state=state, zip_code=zip_code) == existing
+    assert localities.locality_id(session, "Новосибирск", "Россия") == new
+    assert locality_count(session) == before + 1
+
+
+def test_commit_publishes_and_rollback_discards(engine, session):
+    cache = localities.cache_for(engine)
+    cache.clear()
+
+    localities.locality_id(session, "Тверь", "Россия", state=f"{datetime.now():%H%M%S%f}")
+    session.rollback()
+    assert len(cache) == 0
+
+    locality = localities.locality_id(session, "Тверь", "Россия")
+    session.commit()
+    assert len(cache) == 1
+    with engine.connect() as conn:
+        assert cache.get_id(conn, "Тверь", "Россия") == locality
+        assert cache.hits == 1
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List
+
+from api.services.count_cache import get_count_cache
+from api.services.password_hasher import get_password_hasher
+from api.services.query_stats import get_query_metrics
+from api.services.request_metrics import get_request_metrics
+from api.services.user_cache import get_user_cache
+from litestar import Controller, get
+
+
+# Формат, который ожидает Prometheus при сборе метрик
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+
+class MetricsController(Controller):
+    path = "/metrics"
+    
+    @get("/", media_type=PROMETHEUS_MEDIA_TYPE)
+    async def get_prometheus_metrics(self) -> str:
+        """Метрики HTTP-запросов в текстовом формате Prometheus"""
+        return get_request_metrics().prometheus()
+    
+    @get("/requests")
+    async def get_request_latency_metrics(self) -> Dict[str, Any]:
+        """Квантили задержки, коды ответа и размер ответов по маршрутам"""
+        return get_request_metrics().metrics()
+    
+    @get("/password-hashing")
+    async def get_password_hashing_metrics(self) -> Dict[str, Any]:
+        """Очередь и время хеширования паролей"""
+        return get_password_hasher().metrics()
+    
+    @get("/count-cache")
+    async def get_count_cache_metrics(self) -> Dict[str, Any]:
+        """Попадания и промахи кэша количества пользователей"""
+        return get_count_cache().metrics()
+    
+    @get("/user-cache")
+    async def get_user_cache_metrics(self) -> Dict[str, Any]:
+        """Попадания, промахи и вытеснения кэша пользователей"""
+        return get_user_cache().metrics()
+    
+    @get("/sql")
+    async def get_sql_metrics(self) -> List[Dict[str, Any]]:
+        """Число SQL-запросов и время в БД по маршрутам"""
+        return get_query_metrics().metrics()
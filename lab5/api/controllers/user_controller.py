@@ -1,50 +1,140 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Optional
 
-from api.models.user import UserCreate, UserResponse, UserUpdate
-from api.services.user_service import UserService
-from litestar import Controller, delete, get, post, put
+from api.models.user import (UserCreate, UserPage, UserRead, UserResponse,
+                             UserUpdate)
+from api.services.conditional import (http_date, is_not_modified, page_etag,
+                                      user_etag)
+from api.services.export import EXPORT_MEDIA_TYPES, csv_chunks, ndjson_chunks
+from api.services.pagination import next_cursor
+from api.services.user_service import (BULK_MAX_USERS, UserConflictError,
+                                       UserNotFoundError, UserService)
+from litestar import Controller, Request, Response, delete, get, post, put
 from litestar.di import Provide
-from litestar.exceptions import NotFoundException
+from litestar.exceptions import (HTTPException, NotFoundException,
+                                 ValidationException)
 from litestar.params import Parameter
+from litestar.response import Stream
 from litestar.status_codes import (HTTP_200_OK, HTTP_201_CREATED,
-                                   HTTP_204_NO_CONTENT)
+                                   HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED,
+                                   HTTP_409_CONFLICT)
+from pydantic import ValidationError
 
 
 class UserController(Controller):
+    """statement_budget - сколько SQL-запросов может выполнить обработчик (см. QueryStatsMiddleware)"""
+    
     path = "/users"
     
-    @get("/{user_id:int}")
+    @get("/{user_id:int}", statement_budget=2)
     async def get_user_by_id(
         self,
+        request: Request,
         user_service: UserService,
         user_id: int = Parameter(gt=0),
-    ) -> UserResponse:
-        """Получить пользователя по ID"""
+    ) -> Response[UserRead]:
+        """Получить пользователя по ID.
+        
+        Ответ несет ETag и Last-Modified из updated_at. Условный запрос
+        (If-None-Match или If-Modified-Since) сначала сверяется с версией
+        пользователя - одной колонкой из кэша или БД - и при совпадении
+        получает 304 без чтения всей строки.
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None or if_modified_since is not None:
+            updated_at = await user_service.get_version(user_id)
+            if updated_at is None:
+                raise NotFoundException(detail=f"User with ID {user_id} not found")
+            headers = _version_headers(user_id, updated_at)
+            if is_not_modified(if_none_match, if_modified_since, headers["ETag"], updated_at):
+                return Response(content=b"", status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+        
         user = await user_service.get_by_id(user_id)
         if not user:
             raise NotFoundException(detail=f"User with ID {user_id} not found")
-        return UserResponse.model_validate(user)
+        return Response(UserRead.from_row(user), headers=_version_headers(user_id, user.updated_at))
     
-    @get()
+    # Страница и total_count; для estimate на маленькой таблице PostgreSQL -
+    # еще pg_class перед точным подсчетом
+    @get(statement_budget=3)
     async def get_all_users(
         self,
+        request: Request,
         user_service: UserService,
         count: int = Parameter(gt=0, le=100, default=10),
-        page: int = Parameter(gt=0, default=1)
-    ) -> Dict[str, Any]:
-        """Получить всех пользователей с пагинацией"""
-        users = await user_service.get_by_filter(count=count, page=page)
-        total_count = await user_service.get_total_count()
+        page: int = Parameter(gt=0, default=1),
+        cursor: Optional[str] = Parameter(default=None),
+        order_by: Literal["id", "created_at"] = Parameter(default="id"),
+        include_total: bool = Parameter(default=True),
+        count_strategy: Optional[Literal["exact", "cached", "estimate"]] = Parameter(default=None),
+    ) -> Response[UserPage]:
+        """Получить всех пользователей с пагинацией.
         
-        return {
-            "users": [UserResponse.model_validate(user) for user in users],
-            "total_count": total_count,
-            "page": page,
-            "count": count,
-            "total_pages": (total_count + count - 1) // count if count > 0 else 0
-        }
+        Без cursor страница выбирается по номеру page (OFFSET). С cursor
+        (пустой - с начала) выдача идет по ключу от next_cursor предыдущей
+        страницы и не замедляется на дальних страницах.
+        
+        total_count считается стратегией count_strategy (по умолчанию из
+        USERS_COUNT_STRATEGY); include_total=false убирает подсчет совсем.
+        
+        ETag страницы строится из (id, updated_at) ее строк и total_count:
+        при совпадении с If-None-Match ответ 304 обходится без сериализации.
+        """
+        if cursor is not None:
+            try:
+                users, next_page = await user_service.get_by_cursor(
+                    count=count, cursor=cursor or None, order_by=order_by
+                )
+            except ValueError as e:
+                raise ValidationException(detail=str(e))
+            page = None
+        else:
+            users = await user_service.get_by_filter(count=count, page=page, order_by=order_by)
+            next_page = next_cursor(users, count, order_by)
+        total_count = await user_service.get_total_count(strategy=count_strategy) if include_total else None
+        
+        etag = page_etag(
+            {"count": count, "page": page, "cursor": cursor, "order_by": order_by},
+            users,
+            total_count,
+        )
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if is_not_modified(request.headers.get("if-none-match"), None, etag):
+            return Response(content=b"", status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        return Response(
+            UserPage(
+                users=[UserRead.from_row(user) for user in users],
+                total_count=total_count,
+                page=page,
+                count=count,
+                total_pages=(total_count + count - 1) // count if total_count is not None else None,
+                next_cursor=next_page,
+            ),
+            headers=headers,
+        )
+    
+    @get("/export", statement_budget=1)
+    async def export_users(
+        self,
+        user_service: UserService,
+        export_format: Literal["ndjson", "csv"] = Parameter(query="format", default="ndjson"),
+        batch_size: int = Parameter(gt=0, le=10_000, default=1000),
+    ) -> Stream:
+        """Выгрузить всех пользователей потоком NDJSON или CSV.
+        
+        Строки читаются серверным курсором пачками по batch_size, каждая пачка
+        сразу уходит клиенту: память не растет с размером таблицы.
+        """
+        batches = user_service.iter_export_batches(batch_size)
+        chunks = ndjson_chunks(batches) if export_format == "ndjson" else csv_chunks(batches)
+        return Stream(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+        )
     
-    @post(status_code=HTTP_201_CREATED)
+    @post(status_code=HTTP_201_CREATED, statement_budget=2)
     async def create_user(
         self,
         user_service: UserService,
@@ -54,10 +144,66 @@ class UserController(Controller):
         try:
             user = await user_service.create(data)
             return UserResponse.model_validate(user)
-        except ValueError as e:
-            raise NotFoundException(detail=str(e))
+        except UserConflictError as e:
+            raise HTTPException(status_code=HTTP_409_CONFLICT, detail=str(e))
     
-    @delete("/{user_id:int}", status_code=HTTP_204_NO_CONTENT)
+    @post("/bulk", status_code=HTTP_200_OK, statement_budget=2)
+    async def create_users_bulk(
+        self,
+        user_service: UserService,
+        data: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Создать пользователей пачкой, результат по каждому элементу"""
+        _check_bulk_size(data)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(data)
+        valid = []
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, UserCreate.model_validate(item)))
+            except ValidationError as e:
+                detail = "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                )
+                results[index] = {"status": "invalid", "user": None, "detail": detail}
+        
+        created = await user_service.create_many([user_data for _, user_data in valid])
+        for (index, _), result in zip(valid, created):
+            results[index] = result
+        
+        return {
+            "results": [
+                {
+                    "index": index,
+                    "status": result["status"],
+                    "user": UserResponse.model_validate(result["user"]) if result["user"] is not None else None,
+                    "detail": result["detail"],
+                }
+                for index, result in enumerate(results)
+            ],
+            "created": sum(result["status"] == "created" for result in results),
+            "failed": sum(result["status"] != "created" for result in results),
+        }
+    
+    @delete("/bulk", status_code=HTTP_200_OK, statement_budget=1)
+    async def delete_users_bulk(
+        self,
+        user_service: UserService,
+        data: List[int],
+    ) -> Dict[str, Any]:
+        """Удалить пользователей по списку ID, результат по каждому ID"""
+        _check_bulk_size(data)
+        
+        deleted = await user_service.delete_many(list(set(data)))
+        return {
+            "results": [
+                {"id": user_id, "status": "deleted" if user_id in deleted else "not_found"}
+                for user_id in data
+            ],
+            "deleted": len(deleted),
+        }
+    
+    @delete("/{user_id:int}", status_code=HTTP_204_NO_CONTENT, statement_budget=1)
     async def delete_user(
         self,
         user_service: UserService,
@@ -66,10 +212,10 @@ class UserController(Controller):
         """Удалить пользователя по ID"""
         try:
             await user_service.delete(user_id)
-        except ValueError as e:
+        except UserNotFoundError as e:
             raise NotFoundException(detail=str(e))
     
-    @put("/{user_id:int}")
+    @put("/{user_id:int}", statement_budget=3)
     async def update_user(
         self,
         user_service: UserService,
@@ -80,5 +226,22 @@ class UserController(Controller):
         try:
             user = await user_service.update(user_id, data)
             return UserResponse.model_validate(user)
-        except ValueError as e:
-            raise NotFoundException(detail=str(e))
\ No newline at end of file
+        except UserNotFoundError as e:
+            raise NotFoundException(detail=str(e))
+        except UserConflictError as e:
+            raise HTTPException(status_code=HTTP_409_CONFLICT, detail=str(e))
+
+
+def _version_headers(user_id: int, updated_at) -> Dict[str, str]:
+    return {
+        "ETag": user_etag(user_id, updated_at),
+        "Last-Modified": http_date(updated_at),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _check_bulk_size(data: list) -> None:
+    if not data:
+        raise ValidationException(detail="Empty list")
+    if len(data) > BULK_MAX_USERS:
+        raise ValidationException(detail=f"At most {BULK_MAX_USERS} items per request")
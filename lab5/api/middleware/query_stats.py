@@ -0,0 +1,53 @@
+import logging
+
+from api.services.query_stats import (get_query_metrics, get_statement_budget,
+                                      is_strict_budget, track_queries)
+from litestar.datastructures import MutableScopeHeaders
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+from litestar.types import Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон пути маршрута, например /users/{user_id}"""
+    # Для маршрутов без параметров Litestar кладет пустой path_template,
+    # их путь и есть шаблон
+    return scope.get("path_template") or scope["path"]
+
+
+def route_name(scope: Scope) -> str:
+    """Метод и шаблон пути маршрута, например GET /users/{user_id}"""
+    return f"{scope['method']} {route_template(scope)}"
+
+
+class QueryStatsMiddleware(AbstractMiddleware):
+    """Число SQL-запросов и время в БД на каждый HTTP-запрос.
+    
+    Результат уходит в заголовок Server-Timing и в накопленные метрики
+    маршрута (/metrics/sql). Бюджет запросов задается в opt обработчика
+    (statement_budget=...) или переменной SQL_STATEMENT_BUDGET; превышение
+    пишется в лог, а при SQL_STRICT_BUDGET=1 запрос падает с
+    StatementBudgetExceeded.
+    """
+    
+    scopes = {ScopeType.HTTP}
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_handler = scope.get("route_handler")
+        budget = route_handler.opt.get("statement_budget") if route_handler is not None else None
+        
+        with track_queries(budget if budget is not None else get_statement_budget(), is_strict_budget()) as stats:
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableScopeHeaders.from_message(message).add("Server-Timing", stats.server_timing())
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = route_name(scope)
+                get_query_metrics().record(route, stats)
+                if stats.over_budget and not stats.strict:
+                    logger.warning("%s: %d SQL statements, budget %d", route, stats.count, stats.budget)
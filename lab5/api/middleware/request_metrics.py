@@ -0,0 +1,46 @@
+import time
+
+from api.middleware.query_stats import route_template
+from api.services.request_metrics import get_request_metrics
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestMetricsMiddleware:
+    """Задержка, код ответа и размер тела каждого HTTP-запроса по маршрутам.
+    
+    Задержка считается до отправки последнего куска тела, поэтому потоковые
+    ответы (/users/export) учитываются целиком. Запросы к несуществующим
+    маршрутам не доходят до middleware и не учитываются.
+    
+    Простое ASGI-приложение, а не AbstractMiddleware: та на каждый запрос
+    добавляет еще одну корутину с проверками exclude, а эта middleware
+    стоит на всех маршрутах и должна укладываться в единицы микросекунд.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        metrics = get_request_metrics()
+        status = 500
+        size = 0
+        
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(scope["method"], route_template(scope), status, time.perf_counter() - started, size)
@@ -1,13 +1,38 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
+import msgspec
 from pydantic import BaseModel, ConfigDict, EmailStr
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base  # Используем правильный импорт
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 
 Base = declarative_base()  # Теперь правильный импорт
 
+
+class utcnow(FunctionElement):
+    """Текущее время БД; в SQLite с миллисекундами, а не с точностью до секунды"""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "now()"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -16,7 +41,12 @@ class User(Base):
     username = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # От updated_at зависят ETag и Last-Modified: два обновления в одну
+    # секунду не должны давать одинаковую версию
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=utcnow())
+
+    # Для постраничной выдачи по ключу (created_at, id)
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
 # Pydantic модели
 class UserCreate(BaseModel):
@@ -40,4 +70,31 @@ class UserResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# msgspec-структуры для ответов на чтение: Litestar кодирует их сразу в JSON,
+# без валидации и обхода полей pydantic на каждую строку
+class UserRead(msgspec.Struct, kw_only=True):
+    id: int
+    email: str
+    username: str
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, user: "User") -> "UserRead":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+class UserPage(msgspec.Struct, kw_only=True):
+    users: List[UserRead]
+    total_count: Optional[int]
+    page: Optional[int]
+    count: int
+    total_pages: Optional[int]
+    next_cursor: Optional[str]
@@ -1,8 +1,12 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-import bcrypt
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from api.services.password_hasher import PasswordHasher, get_password_hasher
+from api.services.pagination import SORT_KEYS
+from sqlalchemy import delete, exists, func, or_, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.orm import aliased
 
 # Импортируем внутри функций если нужно
 # from api.models.user import User, UserCreate, UserUpdate
@@ -10,90 +14,198 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 class UserRepository:
     
+    def __init__(self, password_hasher: Optional[PasswordHasher] = None):
+        # bcrypt считается в пуле хешера, а не в event loop
+        self.password_hasher = password_hasher or get_password_hasher()
+    
     async def get_by_id(self, session: AsyncSession, user_id: int) -> Optional["User"]:
         from api.models.user import User
         result = await session.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
     
+    async def get_updated_at(self, session: AsyncSession, user_id: int) -> Optional[datetime]:
+        """Только updated_at пользователя (версия для ETag); None - пользователя нет"""
+        from api.models.user import User
+        result = await session.execute(select(User.updated_at).where(User.id == user_id))
+        row = result.first()
+        return row[0] if row is not None else None
+    
     async def get_by_email(self, session: AsyncSession, email: str) -> Optional["User"]:
         from api.models.user import User
         result = await session.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
     
-    async def get_by_filter(self, session: AsyncSession, count: int = 10, page: int = 1, **kwargs) -> List["User"]:
+    async def get_by_filter(self, session: AsyncSession, count: int = 10, page: int = 1, order_by: str = "id", **kwargs) -> List["User"]:
         from api.models.user import User
         
-        query = select(User)
-        
-        for key, value in kwargs.items():
-            if hasattr(User, key) and value is not None:
-                query = query.where(getattr(User, key) == value)
+        query = self._filtered(select(User), **kwargs)
         
         offset = (page - 1) * count
-        query = query.offset(offset).limit(count)
+        query = query.order_by(*self._sort_columns(order_by)).offset(offset).limit(count)
         
         result = await session.execute(query)
         return result.scalars().all()
     
-    async def get_total_count(self, session: AsyncSession, **kwargs) -> int:
+    async def get_by_cursor(self, session: AsyncSession, count: int = 10, after: Optional[Tuple[Any, ...]] = None, order_by: str = "id", **kwargs) -> List["User"]:
+        """Страница по ключу: строки после after без OFFSET, по индексу"""
         from api.models.user import User
         
-        query = select(func.count(User.id))
+        query = self._filtered(select(User), **kwargs)
+        if after is not None:
+            query = query.where(self._after(order_by, after))
+        
+        query = query.order_by(*self._sort_columns(order_by)).limit(count)
+        result = await session.execute(query)
+        return result.scalars().all()
+    
+    def _filtered(self, query, **kwargs):
+        from api.models.user import User
         
         for key, value in kwargs.items():
             if hasattr(User, key) and value is not None:
                 query = query.where(getattr(User, key) == value)
+        return query
+    
+    def _sort_columns(self, order_by: str) -> list:
+        from api.models.user import User
+        return [getattr(User, column) for column in SORT_KEYS[order_by]]
+    
+    def _after(self, order_by: str, after: Tuple[Any, ...]):
+        from api.models.user import User
+        
+        if order_by == "id":
+            return User.id > after[0]
+        
+        created_at, last_id = after
+        # Время берется из самой строки, пока она существует: SQLite хранит
+        # даты строкой, и значение из курсора может отличаться форматом
+        last = aliased(User)
+        anchor = func.coalesce(
+            select(last.created_at).where(last.id == last_id).scalar_subquery(),
+            created_at,
+        )
+        return tuple_(User.created_at, User.id) > tuple_(anchor, last_id)
+    
+    async def stream_all(self, session: AsyncSession, batch_size: int = 1000) -> AsyncResult:
+        """Все пользователи по порядку id через серверный курсор, без password_hash"""
+        from api.models.user import User
+        
+        query = (
+            select(User.id, User.email, User.username, User.created_at, User.updated_at)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return await session.stream(query)
+    
+    async def get_total_count(self, session: AsyncSession, **kwargs) -> int:
+        from api.models.user import User
+        
+        query = self._filtered(select(func.count(User.id)), **kwargs)
         
         result = await session.execute(query)
         return result.scalar() or 0
     
-    def _hash_password(self, password: str) -> str:
+    async def get_estimated_count(self, session: AsyncSession) -> Optional[int]:
+        """Оценка числа строк по статистике планировщика (только PostgreSQL)"""
+        if session.bind.dialect.name != "postgresql":
+            return None
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass('users')")
+        )
+        estimate = result.scalar()
+        # -1 - таблица еще не анализировалась
+        return estimate if estimate is not None and estimate >= 0 else None
+    
+    async def hash_password(self, password: str) -> str:
         """Хеширование пароля"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        return await self.password_hasher.hash(password)
     
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Проверка пароля"""
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return await self.password_hasher.verify(plain_password, hashed_password)
     
-    async def create(self, session: AsyncSession, user_data: "UserCreate") -> "User":
+    async def create(self, session: AsyncSession, user_data: "UserCreate", password_hash: Optional[str] = None) -> Optional["User"]:
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING: None, если email или username заняты"""
         from api.models.user import User, UserCreate
 
-        # Хеширование пароля
-        hashed_password = self._hash_password(user_data.password)
+        # Хеширование пароля, если сервис не посчитал его заранее
+        hashed_password = password_hash or await self.hash_password(user_data.password)
         
-        user = User(
-            email=user_data.email,
-            username=user_data.username,
-            password_hash=hashed_password
+        stmt = (
+            self._insert(session)
+            .values(email=user_data.email, username=user_data.username, password_hash=hashed_password)
+            .on_conflict_do_nothing()
+            .returning(User)
         )
+        result = await session.scalars(stmt)
+        return result.one_or_none()
+    
+    async def create_many(self, session: AsyncSession, rows: List[Dict[str, str]]) -> List["User"]:
+        """Один многострочный INSERT ... ON CONFLICT DO NOTHING RETURNING.
         
-        session.add(user)
-        await session.commit()
-        await session.refresh(user)
-        return user
+        rows - словари email, username, password_hash; возвращаются только
+        вставленные пользователи, строки с занятыми значениями пропускаются.
+        """
+        from api.models.user import User
+        
+        stmt = self._insert(session).values(rows).on_conflict_do_nothing().returning(User)
+        result = await session.scalars(stmt)
+        return result.all()
     
-    async def update(self, session: AsyncSession, user_id: int, user_data: "UserUpdate") -> "User":
-        from api.models.user import User, UserUpdate
+    async def get_taken(self, session: AsyncSession, emails: List[str], usernames: List[str]) -> Tuple[Set[str], Set[str]]:
+        """Какие из email и username уже заняты - одним запросом с IN"""
+        from api.models.user import User
         
-        user = await self.get_by_id(session, user_id)
-        if not user:
-            raise ValueError(f"User with ID {user_id} not found")
+        result = await session.execute(
+            select(User.email, User.username)
+            .where(or_(User.email.in_(emails), User.username.in_(usernames)))
+        )
+        rows = result.all()
+        return {row.email for row in rows} & set(emails), {row.username for row in rows} & set(usernames)
+    
+    def _insert(self, session: AsyncSession):
+        from api.models.user import User
         
-        update_data = user_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
+        # ON CONFLICT есть только в диалектных insert()
+        dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+        return dialect.insert(User)
+    
+    async def update(self, session: AsyncSession, user_id: int, user_data: "UserUpdate", password_hash: Optional[str] = None) -> Optional["User"]:
+        """UPDATE ... RETURNING: None, если пользователя нет или email/username занят другим"""
+        from api.models.user import User, UserUpdate
+        
+        values = {}
+        for field, value in user_data.model_dump(exclude_unset=True).items():
             if field == 'password' and value:
-                setattr(user, 'password_hash', self._hash_password(value))
-            elif hasattr(user, field) and value is not None:
-                setattr(user, field, value)
-        
-        await session.commit()
-        await session.refresh(user)
-        return user
-    
-    async def delete(self, session: AsyncSession, user_id: int) -> None:
-        user = await self.get_by_id(session, user_id)
-        if user:
-            await session.delete(user)
-            await session.commit()
\ No newline at end of file
+                values['password_hash'] = password_hash or await self.hash_password(value)
+            elif hasattr(User, field) and value is not None:
+                values[field] = value
+        if not values:
+            return await self.get_by_id(session, user_id)
+        
+        stmt = update(User).where(User.id == user_id)
+        # Уникальность проверяется тем же запросом: занятое значение дает 0 строк, а не ошибку
+        other = aliased(User)
+        taken = [getattr(other, field) == values[field] for field in ('email', 'username') if field in values]
+        if taken:
+            stmt = stmt.where(~exists().where(or_(*taken), other.id != user_id))
+        
+        result = await session.scalars(
+            stmt.values(**values).returning(User),
+            execution_options={"populate_existing": True},
+        )
+        return result.one_or_none()
+    
+    async def delete(self, session: AsyncSession, user_id: int) -> bool:
+        """DELETE ... RETURNING: False, если пользователя нет"""
+        from api.models.user import User
+        
+        result = await session.execute(delete(User).where(User.id == user_id).returning(User.id))
+        return result.scalar_one_or_none() is not None
+    
+    async def delete_many(self, session: AsyncSession, user_ids: List[int]) -> Set[int]:
+        """DELETE ... WHERE id IN (...) RETURNING id: идентификаторы удаленных"""
+        from api.models.user import User
+        
+        result = await session.execute(delete(User).where(User.id.in_(user_ids)).returning(User.id))
+        return set(result.scalars().all())
\ No newline at end of file
@@ -0,0 +1,75 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite возвращает время без зоны, но пишет его в UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def user_etag(user_id: int, updated_at: datetime) -> str:
+    """Слабый ETag пользователя: ID и updated_at до микросекунд"""
+    return f'W/"{user_id}-{_as_utc(updated_at):%Y%m%d%H%M%S%f}"'
+
+
+def page_etag(params: Dict[str, Any], users: Iterable[Any], total_count: Optional[int]) -> str:
+    """Слабый ETag страницы списка: параметры запроса, (id, updated_at) строк и total_count.
+
+    Версия коллекции в пределах страницы: вставка, удаление или изменение
+    пользователя на странице меняет набор пар, изменение числа
+    пользователей - total_count.
+    """
+    payload = json.dumps(
+        {
+            "params": params,
+            "rows": [[user.id, f"{_as_utc(user.updated_at):%Y%m%d%H%M%S%f}"] for user in users],
+            "total": total_count,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """Дата для Last-Modified (RFC 7231, точность до секунды)"""
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Для If-None-Match сравнение слабое: префикс W/ не учитывается
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """Можно ли ответить 304 Not Modified.
+
+    If-None-Match главнее: если он есть, If-Modified-Since не смотрится
+    (RFC 7232, раздел 6). Неразборчивая дата в If-Modified-Since игнорируется.
+    """
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
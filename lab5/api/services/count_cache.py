@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# exact - count(*) на каждый запрос; cached - тот же count(*), но не чаще
+# раза в USERS_COUNT_TTL секунд; estimate - оценка планировщика
+# (pg_class.reltuples) для больших таблиц PostgreSQL
+COUNT_STRATEGIES = ("exact", "cached", "estimate")
+
+
+class CountCache:
+    """Точные количества строк с временем жизни ttl секунд"""
+
+    def __init__(self, ttl: float = 10.0):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: int) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self) -> None:
+        """Сбросить все значения: после создания или удаления строк"""
+        with self._lock:
+            self._values.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ttl": self.ttl, "entries": len(self._values),
+                    "hits": self.hits, "misses": self.misses}
+
+
+def get_default_count_strategy() -> str:
+    """Стратегия из USERS_COUNT_STRATEGY, по умолчанию точный подсчет.
+
+    Неизвестное значение - ValueError; create_app() вызывает функцию при
+    старте, чтобы опечатка в окружении не превращала каждый GET /users в 500.
+    """
+    strategy = os.getenv("USERS_COUNT_STRATEGY", "exact")
+    if strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"Unknown count strategy: {strategy}")
+    return strategy
+
+
+def get_estimate_threshold() -> int:
+    """Ниже этого числа строк оценка планировщика заменяется точным подсчетом"""
+    return int(os.getenv("USERS_COUNT_ESTIMATE_THRESHOLD", 100_000))
+
+
+_count_cache: Optional[CountCache] = None
+
+
+def get_count_cache() -> CountCache:
+    """Общий на процесс кэш количеств"""
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache(ttl=float(os.getenv("USERS_COUNT_TTL", 10)))
+    return _count_cache
@@ -0,0 +1,42 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import msgspec
+from api.models.user import UserRead
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_COLUMNS = ("id", "email", "username", "created_at", "updated_at")
+
+_json_encoder = msgspec.json.Encoder()
+
+
+def _isoformat(value: Optional[datetime]) -> str:
+    return value.isoformat() if value is not None else ""
+
+
+async def ndjson_chunks(batches: AsyncIterator[List]) -> AsyncIterator[bytes]:
+    """По куску NDJSON на пачку строк: одна строка JSON на пользователя"""
+    async for batch in batches:
+        yield _json_encoder.encode_lines([UserRead.from_row(row) for row in batch])
+
+
+async def csv_chunks(batches: AsyncIterator[List]) -> AsyncIterator[bytes]:
+    """Заголовок CSV, затем по куску на пачку строк"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (row.id, row.email, row.username, _isoformat(row.created_at), _isoformat(row.updated_at))
+            for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+# Поддерживаемые порядки выдачи: ключ курсора - значения этих колонок
+# последней строки страницы, id всегда последний и делает ключ уникальным
+SORT_KEYS = {
+    "id": ("id",),
+    "created_at": ("created_at", "id"),
+}
+
+
+def encode_cursor(user: Any, order_by: str = "id") -> str:
+    """Непрозрачный курсор на строку, после которой начнется следующая страница"""
+    values = []
+    for column in SORT_KEYS[order_by]:
+        value = getattr(user, column)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    payload = json.dumps({"o": order_by, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str = "id") -> Tuple[Any, ...]:
+    """Значения ключа из курсора; ValueError, если курсор поврежден или от другого порядка"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["k"]
+        if payload["o"] != order_by or len(values) != len(SORT_KEYS[order_by]):
+            raise ValueError
+        key = []
+        for column, value in zip(SORT_KEYS[order_by], values):
+            if column == "id":
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise ValueError
+                key.append(value)
+            else:
+                key.append(datetime.fromisoformat(value))
+        return tuple(key)
+    except (ValueError, TypeError, KeyError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor") from None
+
+
+def next_cursor(users: list, count: int, order_by: str = "id") -> Optional[str]:
+    """Курсор следующей страницы или None, если страница неполная"""
+    if len(users) < count:
+        return None
+    return encode_cursor(users[count - 1], order_by)
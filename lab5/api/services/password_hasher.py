@@ -0,0 +1,140 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import bcrypt
+
+
+def _hash_password(password: bytes, rounds: int) -> Tuple[bytes, float, float]:
+    # time.monotonic общий для всех процессов, поэтому время начала
+    # из процесса пула можно сравнивать со временем постановки в очередь
+    started = time.monotonic()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    return hashed, started, time.monotonic()
+
+
+def _check_password(password: bytes, hashed: bytes) -> Tuple[bool, float, float]:
+    started = time.monotonic()
+    matches = bcrypt.checkpw(password, hashed)
+    return matches, started, time.monotonic()
+
+
+class TimingStats:
+    """Количество, сумма и максимум длительностей в секундах"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """bcrypt вне event loop: пул из max_concurrency потоков или процессов.
+
+    Одновременно считается не больше max_concurrency хешей, остальные ждут в
+    очереди пула, а event loop в это время обслуживает другие запросы.
+    bcrypt отпускает GIL, поэтому потоков достаточно; пул процессов
+    (use_processes=True) полностью изолирует CPU-нагрузку от воркера.
+    """
+
+    def __init__(self, max_concurrency: int = 4, rounds: int = 12, use_processes: bool = False):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.rounds = rounds
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._queue_wait = TimingStats()
+        self._hash_time = TimingStats()
+        self._verify_time = TimingStats()
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        """Настройки из BCRYPT_ROUNDS, PASSWORD_HASH_CONCURRENCY и PASSWORD_HASH_EXECUTOR"""
+        return cls(
+            max_concurrency=int(os.getenv("PASSWORD_HASH_CONCURRENCY", min(4, os.cpu_count() or 1))),
+            rounds=int(os.getenv("BCRYPT_ROUNDS", 12)),
+            use_processes=os.getenv("PASSWORD_HASH_EXECUTOR", "thread") == "process",
+        )
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency, thread_name_prefix="bcrypt"
+                    )
+            return self._executor
+
+    async def _run(self, func, stats: TimingStats, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        queued = time.monotonic()
+        try:
+            result, started, finished = await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self._queue_wait.add(max(started - queued, 0.0))
+            stats.add(finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(_hash_password, self._hash_time, password.encode("utf-8"), self.rounds)
+        return hashed.decode("utf-8")
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            _check_password, self._verify_time,
+            plain_password.encode("utf-8"), hashed_password.encode("utf-8"),
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executor": "process" if self.use_processes else "thread",
+                "max_concurrency": self.max_concurrency,
+                "rounds": self.rounds,
+                "pending": self._pending,
+                "queue_wait": self._queue_wait.as_dict(),
+                "hash_time": self._hash_time.as_dict(),
+                "verify_time": self._verify_time.as_dict(),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Общий на процесс хешер, настроенный из переменных окружения"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher.from_env()
+    return _password_hasher
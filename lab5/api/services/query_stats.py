@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class StatementBudgetExceeded(RuntimeError):
+    """Запрос выполнил больше SQL-запросов, чем разрешено бюджетом"""
+
+
+class QueryStats:
+    """SQL-запросы одного HTTP-запроса: число, время в БД и бюджет"""
+
+    def __init__(self, budget: Optional[int] = None, strict: bool = False):
+        self.count = 0
+        self.db_time = 0.0
+        self.budget = budget
+        self.strict = strict
+        self.over_budget = False
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+        return f'db;dur={self.db_time * 1000:.2f};desc="{self.count} queries"'
+
+
+# Статистика текущего HTTP-запроса. SQLAlchemy выполняет события async-движка
+# в greenlet с контекстом вызывающей задачи, поэтому хуки видят ее значение
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries(budget: Optional[int] = None, strict: bool = False) -> Iterator[QueryStats]:
+    """Относить SQL-запросы внутри блока к новой QueryStats"""
+    stats = QueryStats(budget=budget, strict=strict)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    if stats.budget is not None and stats.count > stats.budget:
+        stats.over_budget = True
+        if stats.strict:
+            raise StatementBudgetExceeded(
+                f"Statement budget {stats.budget} exceeded: {statement.splitlines()[0][:200]}"
+            )
+    # Запросы на одном соединении идут по очереди: хватает одного значения
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.pop("query_started", None)
+    if stats is None or started is None:
+        return
+    stats.db_time += time.perf_counter() - started
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    """Повесить на движок хуки, относящие запросы и время в БД к текущему HTTP-запросу"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+class QueryMetrics:
+    """Накопленные по маршрутам числа SQL-запросов и время в БД"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, stats: QueryStats) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "max_queries": 0, "db_time": 0.0, "over_budget": 0,
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["db_time"] += stats.db_time
+            entry["over_budget"] += stats.over_budget
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "route": route,
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "max_queries": entry["max_queries"],
+                    "avg_db_ms": round(entry["db_time"] / entry["requests"] * 1000, 3),
+                    "total_db_ms": round(entry["db_time"] * 1000, 3),
+                    "over_budget": entry["over_budget"],
+                }
+                for route, entry in sorted(self._routes.items())
+            ]
+
+
+_query_metrics = QueryMetrics()
+
+
+def get_query_metrics() -> QueryMetrics:
+    return _query_metrics
+
+
+def get_statement_budget() -> Optional[int]:
+    """Бюджет запросов по умолчанию из SQL_STATEMENT_BUDGET (пусто - без бюджета)"""
+    value = os.getenv("SQL_STATEMENT_BUDGET")
+    return int(value) if value else None
+
+
+def is_strict_budget() -> bool:
+    """SQL_STRICT_BUDGET=1: превышение бюджета - ошибка, а не предупреждение"""
+    return os.getenv("SQL_STRICT_BUDGET", "") not in ("", "0")
@@ -0,0 +1,144 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Границы корзин гистограмм, последняя - +Inf. Задержки начинаются с 0.1 мс:
+# ответы из кэша и условные запросы укладываются в доли миллисекунды
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: запись - один bisect и два сложения"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Пары (le, число наблюдений <= le) для формата Prometheus"""
+        result, total = [], 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины (как histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.bounds):
+                    return float(self.bounds[-1])
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.bounds[-1])
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "size", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+
+
+class RequestMetrics:
+    """Задержка, коды ответа и размер ответов по маршрутам, плюс запросы в работе.
+
+    Пишется только из event loop, поэтому без блокировок: запись стоит
+    единицы микросекунд (см. benchmark_metrics.py).
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        entry = self._routes.get((method, route))
+        if entry is None:
+            entry = self._routes[(method, route)] = RouteMetrics()
+        entry.latency.observe(seconds)
+        entry.size.observe(size)
+        entry.statuses[status] = entry.statuses.get(status, 0) + 1
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "routes": [
+                {
+                    "method": method,
+                    "route": route,
+                    "requests": entry.latency.count,
+                    **{f"p{round(q * 100)}_ms": round(entry.latency.quantile(q) * 1000, 3) for q in QUANTILES},
+                    "avg_ms": round(entry.latency.sum / entry.latency.count * 1000, 3),
+                    "statuses": {str(status): count for status, count in sorted(entry.statuses.items())},
+                    "avg_response_bytes": round(entry.size.sum / entry.size.count),
+                }
+                for (method, route), entry in sorted(self._routes.items(), key=lambda item: (item[0][1], item[0][0]))
+            ],
+        }
+
+    def prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus 0.0.4"""
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being processed.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Completed requests by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = sorted(self._routes.items(), key=lambda item: (item[0][1], item[0][0]))
+        for (method, route), entry in routes:
+            for status, count in sorted(entry.statuses.items()):
+                lines.append(f'http_requests_total{{{_labels(method, route)},status="{status}"}} {count}')
+        for name, help_text, attribute in (
+            ("http_request_duration_seconds", "Request latency in seconds.", "latency"),
+            ("http_response_size_bytes", "Response body size in bytes.", "size"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), entry in routes:
+                histogram = getattr(entry, attribute)
+                labels = _labels(method, route)
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{_escape(method)}",route="{_escape(route)}"'
+
+
+_request_metrics = RequestMetrics()
+
+
+def get_request_metrics() -> RequestMetrics:
+    return _request_metrics
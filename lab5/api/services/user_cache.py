@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class UserCacheBackend(ABC):
+    """Интерфейс хранилища кэша пользователей.
+
+    Значения - словари колонок пользователя. Методы асинхронные, чтобы
+    общее для нескольких воркеров хранилище (например, Redis) подключалось
+    без изменений в UserService: достаточно реализовать эти методы и
+    передать объект в configure_user_cache().
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def metrics(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryUserCache(UserCacheBackend):
+    """Кэш в памяти процесса: не больше max_size записей, каждая живет ttl секунд.
+
+    При переполнении вытесняется запись, к которой дольше всего не обращались.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_user_cache: Optional[UserCacheBackend] = None
+
+
+def configure_user_cache(backend: UserCacheBackend) -> None:
+    """Заменить хранилище кэша (например, на общее для всех воркеров)"""
+    global _user_cache
+    _user_cache = backend
+
+
+def get_user_cache() -> UserCacheBackend:
+    """Общий на процесс кэш; по умолчанию в памяти, размер и TTL из USER_CACHE_SIZE и USER_CACHE_TTL"""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = InMemoryUserCache(
+            max_size=int(os.getenv("USER_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("USER_CACHE_TTL", 30)),
+        )
+    return _user_cache
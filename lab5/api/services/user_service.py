@@ -1,21 +1,76 @@
-from typing import List, Optional
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from api.models.user import UserCreate, UserUpdate
+from api.services.count_cache import (CountCache, get_count_cache,
+                                      get_default_count_strategy,
+                                      get_estimate_threshold)
+from api.services.pagination import decode_cursor, next_cursor
+from api.services.user_cache import UserCacheBackend, get_user_cache
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Импортируем внутри функций или используем аннотации типов
 
 
+class UserNotFoundError(ValueError):
+    """Пользователя с таким ID нет"""
+
+
+class UserConflictError(ValueError):
+    """Email или username уже заняты"""
+
+
+# Больше строк в одном INSERT упирается в лимит параметров SQLite
+BULK_MAX_USERS = 1000
+
+# Хеш пароля не выходит из БД: в кэше (возможно, общем хранилище) его нет
+CACHE_EXCLUDED_COLUMNS = frozenset({"password_hash"})
+
+
 class UserService:
     
-    def __init__(self, user_repository, db_session: AsyncSession):
+    def __init__(
+        self,
+        user_repository,
+        db_session: AsyncSession,
+        count_cache: Optional[CountCache] = None,
+        user_cache: Optional[UserCacheBackend] = None,
+    ):
         # Используем строку вместо прямого импорта
         self.user_repository = user_repository
         self.db_session = db_session
+        self.count_cache = count_cache or get_count_cache()
+        self.user_cache = user_cache or get_user_cache()
     
     async def get_by_id(self, user_id: int) -> Optional["User"]:
+        """Пользователь по ID через кэш: при промахе читается из БД и кладется в кэш.
+        
+        У пользователя из кэша нет password_hash (CACHE_EXCLUDED_COLUMNS).
+        """
         from api.models.user import User
-        return await self.user_repository.get_by_id(self.db_session, user_id)
+        
+        key = self._cache_key(user_id)
+        cached = await self.user_cache.get(key)
+        if cached is not None:
+            # Отсоединенный от сессии объект: только для чтения
+            return User(**cached)
+        
+        user = await self.user_repository.get_by_id(self.db_session, user_id)
+        if user is not None:
+            await self.user_cache.set(key, {
+                column.key: getattr(user, column.key) for column in User.__table__.columns
+                if column.key not in CACHE_EXCLUDED_COLUMNS
+            })
+        return user
+    
+    async def get_version(self, user_id: int) -> Optional[datetime]:
+        """updated_at пользователя для условных запросов: из кэша или одной колонкой из БД"""
+        cached = await self.user_cache.get(self._cache_key(user_id))
+        if cached is not None:
+            return cached["updated_at"]
+        return await self.user_repository.get_updated_at(self.db_session, user_id)
     
     async def get_by_email(self, email: str) -> Optional["User"]:
         from api.models.user import User
@@ -24,40 +79,173 @@ class UserService:
         result = await self.db_session.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
     
-    async def get_by_filter(self, count: int = 10, page: int = 1, **kwargs) -> List["User"]:
-        return await self.user_repository.get_by_filter(self.db_session, count, page, **kwargs)
+    async def get_by_filter(self, count: int = 10, page: int = 1, order_by: str = "id", **kwargs) -> List["User"]:
+        return await self.user_repository.get_by_filter(self.db_session, count, page, order_by=order_by, **kwargs)
     
-    async def get_total_count(self, **kwargs) -> int:
-        from api.models.user import User
-        from sqlalchemy import func, select
+    async def get_by_cursor(self, count: int = 10, cursor: Optional[str] = None, order_by: str = "id", **kwargs) -> Tuple[List["User"], Optional[str]]:
+        """Страница после курсора и курсор следующей страницы (None - страниц больше нет)"""
+        after = decode_cursor(cursor, order_by) if cursor else None
+        # Лишняя строка показывает, есть ли следующая страница
+        users = await self.user_repository.get_by_cursor(
+            self.db_session, count + 1, after=after, order_by=order_by, **kwargs
+        )
+        return users[:count], next_cursor(users[:count], count, order_by) if len(users) > count else None
+    
+    async def iter_export_batches(self, batch_size: int = 1000) -> AsyncIterator[list]:
+        """Пачки по batch_size строк всех пользователей для потоковой выгрузки.
+        
+        Читает своя сессия: сессия запроса закрывается до того, как Litestar
+        начнет отправлять тело потокового ответа.
+        """
+        async with AsyncSession(self.db_session.bind) as session:
+            result = await self.user_repository.stream_all(session, batch_size)
+            async for batch in result.partitions(batch_size):
+                yield batch
+    
+    async def get_total_count(self, strategy: Optional[str] = None, **kwargs) -> int:
+        """Число пользователей: exact, cached или estimate (см. count_cache)"""
+        strategy = strategy or get_default_count_strategy()
+        filters = tuple(sorted((key, value) for key, value in kwargs.items() if value is not None))
+        
+        if strategy == "estimate" and not filters:
+            estimate = await self.user_repository.get_estimated_count(self.db_session)
+            if estimate is not None and estimate >= get_estimate_threshold():
+                return estimate
+            # Маленькая таблица или не PostgreSQL: оценка неточна, считаем сами
+            strategy = "cached"
         
-        query = select(func.count(User.id))
-        for key, value in kwargs.items():
-            if hasattr(User, key) and value is not None:
-                query = query.where(getattr(User, key) == value)
+        if strategy != "cached":
+            return await self.user_repository.get_total_count(self.db_session, **kwargs)
         
-        result = await self.db_session.execute(query)
-        return result.scalar() or 0
+        key = (str(self.db_session.bind.url), filters)
+        total = self.count_cache.get(key)
+        if total is None:
+            total = await self.user_repository.get_total_count(self.db_session, **kwargs)
+            self.count_cache.set(key, total)
+        return total
     
     async def create(self, user_data: UserCreate) -> "User":
-        # Проверка уникальности email
-        existing_user = await self.get_by_email(user_data.email)
-        if existing_user:
-            raise ValueError(f"User with email {user_data.email} already exists")
+        # Хеш считается до первого запроса: пока работает bcrypt,
+        # сессия не держит соединение из пула
+        password_hash = await self.user_repository.hash_password(user_data.password)
         
-        return await self.user_repository.create(self.db_session, user_data)
+        # Уникальность проверяет сам INSERT ... ON CONFLICT DO NOTHING
+        user = await self.user_repository.create(self.db_session, user_data, password_hash=password_hash)
+        if user is None:
+            raise await self._conflict_error(user_data.email, user_data.username)
+        
+        await self._commit()
+        self.count_cache.invalidate()
+        return user
     
     async def update(self, user_id: int, user_data: UserUpdate) -> "User":
-        # Проверка существования пользователя
-        existing_user = await self.get_by_id(user_id)
-        if not existing_user:
-            raise ValueError(f"User with ID {user_id} not found")
+        password_hash = None
+        if user_data.password:
+            password_hash = await self.user_repository.hash_password(user_data.password)
+        
+        try:
+            user = await self.user_repository.update(self.db_session, user_id, user_data, password_hash=password_hash)
+        except IntegrityError:
+            # Параллельный запрос занял то же значение между проверкой и записью
+            raise UserConflictError("User with this email or username already exists")
+        if user is None:
+            # Запрос не обновил строку: разбираемся почему, только на этом пути
+            if await self.user_repository.get_by_id(self.db_session, user_id) is None:
+                raise UserNotFoundError(f"User with ID {user_id} not found")
+            raise await self._conflict_error(user_data.email, user_data.username)
         
-        return await self.user_repository.update(self.db_session, user_id, user_data)
+        await self._commit()
+        await self.user_cache.delete(self._cache_key(user_id))
+        return user
     
     async def delete(self, user_id: int) -> None:
-        user = await self.get_by_id(user_id)
-        if not user:
-            raise ValueError(f"User with ID {user_id} not found")
+        if not await self.user_repository.delete(self.db_session, user_id):
+            raise UserNotFoundError(f"User with ID {user_id} not found")
+        
+        await self._commit()
+        await self.user_cache.delete(self._cache_key(user_id))
+        self.count_cache.invalidate()
+    
+    async def create_many(self, users_data: List[UserCreate]) -> List[Dict[str, Any]]:
+        """Создать пользователей пачкой; результат - по элементу на каждого из users_data.
+        
+        Пароли хешируются параллельно в пуле хешера до обращения к БД. Затем
+        один запрос с IN находит занятые email и username, и один
+        многострочный INSERT вставляет остальных. Элемент результата:
+        status (created или conflict), user и detail.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(users_data)
+        seen_emails: Set[str] = set()
+        seen_usernames: Set[str] = set()
+        for index, user_data in enumerate(users_data):
+            if user_data.email in seen_emails or user_data.username in seen_usernames:
+                results[index] = self._bulk_conflict("Duplicate email or username in request")
+            seen_emails.add(user_data.email)
+            seen_usernames.add(user_data.username)
         
-        await self.user_repository.delete(self.db_session, user_id)
\ No newline at end of file
+        candidates = [index for index, result in enumerate(results) if result is None]
+        password_hashes = await asyncio.gather(*(
+            self.user_repository.hash_password(users_data[index].password) for index in candidates
+        ))
+        
+        taken_emails, taken_usernames = set(), set()
+        if candidates:
+            taken_emails, taken_usernames = await self.user_repository.get_taken(
+                self.db_session,
+                [users_data[index].email for index in candidates],
+                [users_data[index].username for index in candidates],
+            )
+        rows = []
+        for index, password_hash in zip(candidates, password_hashes):
+            user_data = users_data[index]
+            if user_data.email in taken_emails:
+                results[index] = self._bulk_conflict(f"User with email {user_data.email} already exists")
+            elif user_data.username in taken_usernames:
+                results[index] = self._bulk_conflict(f"User with username {user_data.username} already exists")
+            else:
+                rows.append((index, {"email": user_data.email, "username": user_data.username,
+                                     "password_hash": password_hash}))
+        
+        if rows:
+            created = await self.user_repository.create_many(self.db_session, [row for _, row in rows])
+            created_by_email = {user.email: user for user in created}
+            for index, row in rows:
+                user = created_by_email.get(row["email"])
+                # Строку мог занять параллельный запрос между проверкой и INSERT
+                results[index] = (
+                    {"status": "created", "user": user, "detail": None} if user is not None
+                    else self._bulk_conflict("User with this email or username already exists")
+                )
+            if created:
+                await self._commit()
+                self.count_cache.invalidate()
+        return results
+    
+    async def delete_many(self, user_ids: List[int]) -> Set[int]:
+        """Удалить пользователей одним запросом; возвращает ID удаленных"""
+        deleted = await self.user_repository.delete_many(self.db_session, user_ids)
+        if deleted:
+            await self._commit()
+            for user_id in deleted:
+                await self.user_cache.delete(self._cache_key(user_id))
+            self.count_cache.invalidate()
+        return deleted
+    
+    async def _commit(self) -> None:
+        # Кэши сбрасываются только после COMMIT: иначе параллельное чтение
+        # между сбросом и фиксацией вернуло бы в кэш старую версию строки,
+        # а по ее updated_at условный GET ответил бы 304 на измененного пользователя
+        await self.db_session.commit()
+    
+    @staticmethod
+    def _bulk_conflict(detail: str) -> Dict[str, Any]:
+        return {"status": "conflict", "user": None, "detail": detail}
+    
+    def _cache_key(self, user_id: int) -> str:
+        # В ключе база данных (str(url) скрывает пароль): у тестов и воркеров с разными БД свои записи
+        return f"{self.db_session.bind.url}/users/{user_id}"
+    
+    async def _conflict_error(self, email: Optional[str], username: Optional[str]) -> UserConflictError:
+        if email and await self.get_by_email(email):
+            return UserConflictError(f"User with email {email} already exists")
+        return UserConflictError(f"User with username {username} already exists")
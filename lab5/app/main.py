@@ -1,9 +1,15 @@
 import os
 from typing import AsyncGenerator
 
+from api.controllers.metrics_controller import MetricsController
 from api.controllers.user_controller import UserController
+from api.middleware.query_stats import QueryStatsMiddleware
+from api.middleware.request_metrics import RequestMetricsMiddleware
 from api.models.user import Base
 from api.repositories.user_repository import UserRepository
+from api.services.count_cache import get_default_count_strategy
+from api.services.password_hasher import get_password_hasher
+from api.services.query_stats import instrument_engine
 from api.services.user_service import UserService
 from litestar import Litestar
 from litestar.di import Provide
@@ -31,6 +37,9 @@ engine = create_async_engine(
     pool_recycle=300,
 )
 
+# Число запросов и время в БД относятся к текущему HTTP-запросу (QueryStatsMiddleware)
+instrument_engine(engine)
+
 # Фабрика сессий
 async_session_factory = async_sessionmaker(
     engine,
@@ -72,13 +81,18 @@ async def on_startup():
 async def on_shutdown():
     """Закрытие соединений при завершении приложения"""
     await engine.dispose()
+    get_password_hasher().shutdown()
     if not os.getenv("TESTING"):
         print("✅ Database connections closed")
 
 # Создаем приложение
 def create_app() -> Litestar:
+    # Неверный USERS_COUNT_STRATEGY - ошибка при старте, а не на каждом запросе
+    get_default_count_strategy()
     return Litestar(
-        route_handlers=[UserController],
+        route_handlers=[UserController, MetricsController],
+        # Внешний слой меряет запрос целиком, включая учет SQL
+        middleware=[RequestMetricsMiddleware, QueryStatsMiddleware],
         dependencies={
             "db_session": Provide(provide_db_session),
             "user_repository": Provide(provide_user_repository),
@@ -0,0 +1,75 @@
+# benchmark_bulk.py - создание пользователей: цикл по POST /users против POST /users/bulk
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _hash_seconds(hasher):
+    stats = hasher.metrics()["hash_time"]
+    return stats["count"] * stats["avg_ms"] / 1000
+
+
+def _payload(prefix, count):
+    return [
+        {"email": f"{prefix}{i}@example.com", "username": f"{prefix}{i}", "password": "password123"}
+        for i in range(count)
+    ]
+
+
+async def benchmark(users=500, batch_size=500):
+    from app.main import create_app, engine
+    from api.models.user import Base
+    from api.services.password_hasher import get_password_hasher
+    from httpx import ASGITransport, AsyncClient
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    hasher = get_password_hasher()
+    async with AsyncClient(transport=ASGITransport(app=create_app()), base_url="http://testserver") as client:
+        started = time.perf_counter()
+        hashed_before = _hash_seconds(hasher)
+        for item in _payload("single", users):
+            response = await client.post("/users", json=item)
+            assert response.status_code == 201, response.text
+        single_seconds = time.perf_counter() - started
+        single_hash_seconds = _hash_seconds(hasher) - hashed_before
+
+        started = time.perf_counter()
+        hashed_before = _hash_seconds(hasher)
+        payload = _payload("bulk", users)
+        for start in range(0, users, batch_size):
+            response = await client.post("/users/bulk", json=payload[start:start + batch_size])
+            assert response.json()["created"] == len(payload[start:start + batch_size]), response.text
+        bulk_seconds = time.perf_counter() - started
+        bulk_hash_seconds = _hash_seconds(hasher) - hashed_before
+
+    print(f"🔐 bcrypt rounds={hasher.rounds}, потоков хеширования: {hasher.max_concurrency}")
+    print(f"📊 POST /users в цикле: {users / single_seconds:,.0f} пользователей/с "
+          f"({single_seconds:.2f} с, из них bcrypt {single_hash_seconds:.2f} с)")
+    print(f"📊 POST /users/bulk по {batch_size}: {users / bulk_seconds:,.0f} пользователей/с "
+          f"({bulk_seconds:.2f} с, bcrypt суммарно по потокам {bulk_hash_seconds:.2f} с)")
+    print(f"🚀 Ускорение: в {single_seconds / bulk_seconds:.1f} раз")
+    return {"single_seconds": single_seconds, "bulk_seconds": bulk_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность массового создания пользователей")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    os.environ.pop("TESTING", None)
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark_bulk.db")
+    asyncio.run(benchmark(args.users, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
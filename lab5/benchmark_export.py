@@ -0,0 +1,74 @@
+# benchmark_export.py - память и скорость выгрузки GET /users/export против чтения всей таблицы
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.models.user import User, UserRead
+from api.repositories.user_repository import UserRepository
+from api.services.export import csv_chunks, ndjson_chunks
+from api.services.user_service import UserService
+from benchmark_pagination import seed_users
+from msgspec import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+
+async def _measure(title, produce):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await produce()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"📊 {title}: {size / 1024 / 1024:.1f} МБ за {seconds:.2f} с, "
+          f"пик памяти {peak / 1024 / 1024:.1f} МБ")
+    return peak
+
+
+async def benchmark(url, users=200_000, batch_size=1000):
+    engine = create_async_engine(url)
+    await seed_users(engine, users)
+    try:
+        async with AsyncSession(engine) as session:
+            service = UserService(UserRepository(), session)
+
+            async def stream(chunks):
+                size = 0
+                async for chunk in chunks(service.iter_export_batches(batch_size)):
+                    size += len(chunk)
+                return size
+
+            async def load_all():
+                # Для сравнения: вся таблица в памяти и одно тело ответа
+                users = (await session.scalars(select(User).order_by(User.id))).all()
+                body = json.Encoder().encode_lines([UserRead.from_row(user) for user in users])
+                session.expunge_all()
+                return len(body)
+
+            await _measure(f"NDJSON потоком, пачки по {batch_size}", lambda: stream(ndjson_chunks))
+            await _measure(f"CSV потоком, пачки по {batch_size}", lambda: stream(csv_chunks))
+            await _measure("Вся таблица в памяти", load_all)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка пользователей")
+    parser.add_argument("--url", default=None,
+                        help="URL async-движка (по умолчанию временный файл SQLite)")
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark_export.db"
+    asyncio.run(benchmark(url, args.users, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmark_metrics.py - накладные расходы RequestMetricsMiddleware на запрос
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.middleware.request_metrics import RequestMetricsMiddleware
+from api.services.request_metrics import RequestMetrics
+from litestar import Litestar, get
+
+
+@get("/ping/{item_id:int}")
+async def ping(item_id: int) -> dict:
+    return {"id": item_id}
+
+
+def passthrough(app):
+    async def middleware(scope, receive, send):
+        await app(scope, receive, send)
+    return middleware
+
+
+def make_app(with_metrics):
+    # С любой middleware Litestar один раз добавляет в стек маршрута
+    # ExceptionHandlerMiddleware. В приложении уже есть QueryStatsMiddleware,
+    # поэтому и база сравнения - приложение с пустой middleware
+    return Litestar(route_handlers=[ping], middleware=[RequestMetricsMiddleware if with_metrics else passthrough])
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _stub_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b'{"id":1}'})
+
+
+def _scope(i):
+    path = f"/ping/{i}"
+    return {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+
+async def _run_requests(app, requests):
+    # ASGI-приложение вызывается напрямую: без HTTP-клиента в замере остается
+    # только работа Litestar и middleware
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(_scope(i), _receive, _send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def _compare(plain, measured, requests, rounds):
+    """Лучшее время на запрос (мкс) для двух приложений; раунды чередуются,
+    чтобы дрейф частоты CPU и соседи по машине не попали в разницу"""
+    await _run_requests(plain, requests // 10)
+    await _run_requests(measured, requests // 10)
+    plain_us, measured_us = [], []
+    for _ in range(rounds):
+        plain_us.append(await _run_requests(plain, requests))
+        measured_us.append(await _run_requests(measured, requests))
+    return min(plain_us), min(measured_us)
+
+
+def observe_cost(repeats):
+    metrics = RequestMetrics()
+    started = time.perf_counter()
+    for i in range(repeats):
+        metrics.observe("GET", "/ping/{item_id:int}", 200, 0.0004 + i % 7 * 0.001, 27)
+    return (time.perf_counter() - started) / repeats * 1_000_000
+
+
+async def benchmark(requests=5000, rounds=21):
+    # Сама middleware вокруг заглушки, которая сразу отвечает
+    stub_us, wrapped_us = await _compare(
+        _stub_app, RequestMetricsMiddleware(app=_stub_app), requests * 4, rounds
+    )
+    print(f"📊 RequestMetricsMiddleware вокруг заглушки: +{wrapped_us - stub_us:.1f} мкс на запрос")
+    print(f"📊 RequestMetrics.observe: {observe_cost(requests * 10):.2f} мкс")
+
+    # Целиком через Litestar: сюда входит и стоимость лишнего слоя middleware
+    plain_us, measured_us = await _compare(make_app(False), make_app(True), requests, rounds)
+    print(f"📊 Запрос через Litestar без метрик: {plain_us:.1f} мкс, с метриками: "
+          f"{measured_us:.1f} мкс (+{measured_us - plain_us:.1f} мкс)")
+    return {"middleware_us": wrapped_us - stub_us, "plain_us": plain_us, "measured_us": measured_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Накладные расходы метрик запросов")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=21)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
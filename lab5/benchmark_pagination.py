@@ -0,0 +1,89 @@
+# benchmark_pagination.py - дальняя страница GET /users: OFFSET против курсора
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.models.user import Base, User
+from api.repositories.user_repository import UserRepository
+from api.services.pagination import decode_cursor, encode_cursor
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+
+async def seed_users(engine, total, batch_size=10_000):
+    """Пользователи без bcrypt (для выборки страниц хеш не важен), по одному в минуту"""
+    first_created = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        existing = (await conn.execute(select(User.id).limit(1))).first()
+        if existing:
+            return
+        for start in range(0, total, batch_size):
+            await conn.execute(insert(User), [
+                {"email": f"user{i}@example.com", "username": f"user{i}", "password_hash": "x",
+                 "created_at": first_created + timedelta(minutes=i)}
+                for i in range(start, min(start + batch_size, total))
+            ])
+    print(f"✅ Создано пользователей: {total}")
+
+
+async def _timed(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        users = await func()
+        timings.append(time.perf_counter() - started)
+    return users, statistics.median(timings) * 1000
+
+
+async def benchmark(url, users=110_000, page=10_000, count=10, repeats=20):
+    engine = create_async_engine(url)
+    repository = UserRepository()
+    await seed_users(engine, users)
+    results = {}
+    try:
+        async with AsyncSession(engine) as session:
+            for order_by in ("id", "created_at"):
+                # Курсор на последнюю строку предыдущей страницы (вне замера)
+                previous = await repository.get_by_filter(session, count=count, page=page - 1, order_by=order_by)
+                after = decode_cursor(encode_cursor(previous[-1], order_by), order_by)
+
+                by_offset, offset_ms = await _timed(
+                    lambda: repository.get_by_filter(session, count=count, page=page, order_by=order_by), repeats
+                )
+                by_cursor, cursor_ms = await _timed(
+                    lambda: repository.get_by_cursor(session, count=count, after=after, order_by=order_by), repeats
+                )
+                assert [user.id for user in by_offset] == [user.id for user in by_cursor]
+                results[order_by] = {"offset_ms": offset_ms, "cursor_ms": cursor_ms}
+                print(f"📊 order_by={order_by}, страница {page} по {count}: "
+                      f"OFFSET {offset_ms:.2f} мс, курсор {cursor_ms:.2f} мс "
+                      f"(в {offset_ms / cursor_ms:.0f} раз быстрее)")
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение OFFSET и курсора на дальней странице")
+    parser.add_argument("--url", default=None,
+                        help="URL async-движка (по умолчанию временный файл SQLite)")
+    parser.add_argument("--users", type=int, default=110_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark_pagination.db"
+    asyncio.run(benchmark(url, args.users, args.page, args.count, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
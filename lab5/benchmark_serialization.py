@@ -0,0 +1,79 @@
+# benchmark_serialization.py - кодирование страницы GET /users: pydantic против msgspec
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.models.user import User, UserPage, UserRead, UserResponse
+from litestar.contrib.pydantic import PydanticInitPlugin
+from litestar.serialization import encode_json, get_serializer
+
+
+def make_rows(count):
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        User(id=i, email=f"user{i}@example.com", username=f"user{i}", password_hash="x",
+             created_at=created_at + timedelta(minutes=i), updated_at=created_at + timedelta(minutes=i))
+        for i in range(1, count + 1)
+    ]
+
+
+def pydantic_page(rows, serializer):
+    # Прежний путь: model_validate на каждую строку и нетипизированный dict
+    return encode_json({
+        "users": [UserResponse.model_validate(user) for user in rows],
+        "total_count": 100_000,
+        "page": 1,
+        "count": len(rows),
+        "total_pages": 100_000 // len(rows),
+        "next_cursor": None,
+    }, serializer)
+
+
+def msgspec_page(rows, serializer):
+    return encode_json(UserPage(
+        users=[UserRead.from_row(user) for user in rows],
+        total_count=100_000,
+        page=1,
+        count=len(rows),
+        total_pages=100_000 // len(rows),
+        next_cursor=None,
+    ), serializer)
+
+
+def _median_us(func, rows, serializer, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(rows, serializer)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1_000_000
+
+
+def benchmark(page_size=100, repeats=2000):
+    rows = make_rows(page_size)
+    # Тот же сериализатор, что у приложения с подключенным плагином pydantic
+    serializer = get_serializer(PydanticInitPlugin.encoders())
+    assert pydantic_page(rows, serializer) == msgspec_page(rows, serializer)
+
+    pydantic_us = _median_us(pydantic_page, rows, serializer, repeats)
+    msgspec_us = _median_us(msgspec_page, rows, serializer, repeats)
+    print(f"📊 Страница из {page_size} пользователей: pydantic {pydantic_us:.0f} мкс, "
+          f"msgspec {msgspec_us:.0f} мкс (в {pydantic_us / msgspec_us:.1f} раз быстрее)")
+    return {"pydantic_us": pydantic_us, "msgspec_us": msgspec_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время кодирования страницы пользователей")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    benchmark(args.page_size, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
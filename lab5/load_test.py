@@ -0,0 +1,128 @@
+# load_test.py - задержка GET /users/{id}, пока POST /users занят хешированием паролей
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))] * 1000
+
+
+def _report(title, latencies):
+    print(f"📊 {title}: {len(latencies)} запросов, "
+          f"p50 {_percentile(latencies, 50):.2f} мс, "
+          f"p95 {_percentile(latencies, 95):.2f} мс, "
+          f"max {max(latencies) * 1000:.2f} мс")
+
+
+async def _measure_gets(client, user_ids, duration):
+    latencies = []
+    deadline = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = await client.get(f"/users/{user_ids[i % len(user_ids)]}")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        i += 1
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def _post_users(client, prefix, stop):
+    i = 0
+    while not stop.is_set():
+        response = await client.post("/users", json={
+            "email": f"{prefix}-{i}@example.com",
+            "username": f"{prefix}-{i}",
+            "password": "password123",
+        })
+        assert response.status_code == 201, response.text
+        i += 1
+    return i
+
+
+async def run_load_test(writers=16, duration=3.0, inline=False):
+    """GET-задержка без нагрузки и при writers параллельных POST /users"""
+    from app.main import create_app, engine
+    from api.models.user import Base
+    from api.services import password_hasher
+    from httpx import ASGITransport, AsyncClient
+
+    hasher = password_hasher.get_password_hasher()
+    if inline:
+        # Для сравнения: bcrypt прямо в event loop, как было раньше
+        async def run_inline(func, stats, *args):
+            result, started, finished = func(*args)
+            stats.add(finished - started)
+            return result
+        hasher._run = run_inline
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # ASGITransport выполняет запросы в том же event loop, что и приложение:
+    # заблокированный loop сразу виден по задержке GET
+    transport = ASGITransport(app=create_app())
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        responses = await asyncio.gather(*(client.post("/users", json={
+            "email": f"reader-{i}@example.com",
+            "username": f"reader-{i}",
+            "password": "password123",
+        }) for i in range(20)))
+        user_ids = [response.json()["id"] for response in responses]
+
+        baseline = await _measure_gets(client, user_ids, duration)
+
+        stop = asyncio.Event()
+        posters = [asyncio.create_task(_post_users(client, f"writer{w}", stop))
+                   for w in range(writers)]
+        loaded = await _measure_gets(client, user_ids, duration)
+        stop.set()
+        created = sum(await asyncio.gather(*posters))
+
+    mode = "inline" if inline else f"{hasher.metrics()['executor']} pool"
+    print(f"🔐 bcrypt rounds={hasher.rounds}, режим: {mode}, "
+          f"max_concurrency={hasher.max_concurrency}")
+    _report("GET без нагрузки", baseline)
+    _report(f"GET при {writers} параллельных POST", loaded)
+    print(f"✅ POST /users: {created} за {duration} с ({created / duration:.1f} в секунду)")
+    if not inline:
+        metrics = hasher.metrics()
+        print(f"⏳ Ожидание в очереди: среднее {metrics['queue_wait']['avg_ms']} мс, "
+              f"max {metrics['queue_wait']['max_ms']} мс")
+        print(f"⏱️ Хеширование: среднее {metrics['hash_time']['avg_ms']} мс")
+    return {
+        "baseline_p95_ms": _percentile(baseline, 95),
+        "loaded_p95_ms": _percentile(loaded, 95),
+        "posts_per_second": created / duration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест хеширования паролей")
+    parser.add_argument("--writers", type=int, default=16,
+                        help="Сколько клиентов одновременно создают пользователей")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--inline", action="store_true",
+                        help="Считать bcrypt в event loop (для сравнения)")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Отдельная файловая БД: в :memory: у каждого соединения своя база
+    workdir = tempfile.mkdtemp()
+    os.environ.pop("TESTING", None)
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{workdir}/load_test.db")
+    asyncio.run(run_load_test(args.writers, args.duration, args.inline))
+
+
+if __name__ == "__main__":
+    main()
@@ -128,4 +128,45 @@ def real_test_app(user_service):
 def real_test_client(real_test_app):
     """TestClient с реальными зависимостями"""
     from litestar.testing import TestClient
-    return TestClient(app=real_test_app)
\ No newline at end of file
+    return TestClient(app=real_test_app)
+
+@pytest.fixture
+async def db_test_client(engine, setup_database):
+    """AsyncClient приложения с настоящей БД и провайдерами как в app.main"""
+    from api.controllers.metrics_controller import MetricsController
+    from api.controllers.user_controller import UserController
+    from api.middleware.query_stats import QueryStatsMiddleware
+    from api.middleware.request_metrics import RequestMetricsMiddleware
+    from api.repositories.user_repository import UserRepository
+    from api.services.password_hasher import PasswordHasher
+    from api.services.query_stats import instrument_engine
+    from api.services.user_service import UserService
+    from httpx import ASGITransport, AsyncClient
+    
+    instrument_engine(engine)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    hasher = PasswordHasher(max_concurrency=1, rounds=4)
+    
+    async def provide_db_session():
+        async with session_factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+    
+    async def provide_user_service(db_session: AsyncSession) -> UserService:
+        return UserService(UserRepository(hasher), db_session)
+    
+    app = Litestar(
+        route_handlers=[UserController, MetricsController],
+        middleware=[RequestMetricsMiddleware, QueryStatsMiddleware],
+        dependencies={
+            "db_session": Provide(provide_db_session),
+            "user_service": Provide(provide_user_service),
+        },
+    )
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    hasher.shutdown()
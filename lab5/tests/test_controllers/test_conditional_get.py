@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event
+
+
+class TestConditionalGet:
+    """Тесты для ETag, Last-Modified и ответов 304"""
+    
+    @pytest.mark.asyncio
+    async def test_user_etag(self, db_test_client):
+        """Тест 304 по If-None-Match и нового ETag после обновления"""
+        client = db_test_client
+        user_id = (await client.post("/users", json={
+            "email": "etag@example.com", "username": "etag", "password": "pass"
+        })).json()["id"]
+        
+        response = await client.get(f"/users/{user_id}")
+        etag = response.headers["etag"]
+        assert response.status_code == 200
+        assert etag.startswith('W/"')
+        assert "last-modified" in response.headers
+        
+        response = await client.get(f"/users/{user_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        
+        await client.put(f"/users/{user_id}", json={"username": "etag-renamed"})
+        response = await client.get(f"/users/{user_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["username"] == "etag-renamed"
+        assert response.headers["etag"] != etag
+    
+    @pytest.mark.asyncio
+    async def test_if_modified_since(self, db_test_client):
+        """Тест 304 по If-Modified-Since"""
+        client = db_test_client
+        user_id = (await client.post("/users", json={
+            "email": "ims@example.com", "username": "ims", "password": "pass"
+        })).json()["id"]
+        last_modified = (await client.get(f"/users/{user_id}")).headers["last-modified"]
+        
+        response = await client.get(f"/users/{user_id}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        
+        response = await client.get(f"/users/{user_id}", headers={
+            "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"
+        })
+        assert response.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_version_lookup(self, engine, db_test_client):
+        """Тест условного запроса: читается только updated_at, без всей строки"""
+        from api.services.user_cache import get_user_cache
+        
+        client = db_test_client
+        user_id = (await client.post("/users", json={
+            "email": "version@example.com", "username": "version", "password": "pass"
+        })).json()["id"]
+        etag = (await client.get(f"/users/{user_id}")).headers["etag"]
+        await get_user_cache().clear()
+        
+        statements = []
+        
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+        try:
+            response = await client.get(f"/users/{user_id}", headers={"If-None-Match": etag})
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+        
+        assert response.status_code == 304
+        assert len(statements) == 1
+        assert "password_hash" not in statements[0]
+        assert "updated_at" in statements[0]
+    
+    @pytest.mark.asyncio
+    async def test_missing_user(self, db_test_client):
+        """Тест условного запроса к несуществующему пользователю"""
+        response = await db_test_client.get("/users/999999", headers={"If-None-Match": "*"})
+        
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_page_etag(self, db_test_client):
+        """Тест ETag страницы списка: 304, пока страница не изменилась"""
+        client = db_test_client
+        params = {"count": 100, "count_strategy": "exact"}
+        etag = (await client.get("/users", params=params)).headers["etag"]
+        
+        response = await client.get("/users", params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        await client.post("/users", json={"email": "page-etag@example.com", "username": "page-etag", "password": "pass"})
+        response = await client.get("/users", params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+async def create_users(client, prefix):
+    response = await client.post("/users/bulk", json=[
+        {"email": f"{prefix}{i}@example.com", "username": f"{prefix},{i}", "password": "pass"} for i in range(5)
+    ])
+    assert response.json()["created"] == 5
+
+
+class TestUserExport:
+    """Тесты для потоковой выгрузки пользователей"""
+    
+    @pytest.mark.asyncio
+    async def test_ndjson(self, db_test_client):
+        """Тест выгрузки NDJSON мелкими пачками"""
+        client = db_test_client
+        await create_users(client, "export-ndjson")
+        total = (await client.get("/users", params={"count_strategy": "exact"})).json()["total_count"]
+        
+        response = await client.get("/users/export", params={"batch_size": 2})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == total
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert "password_hash" not in rows[0]
+        assert {"export-ndjson,0", "export-ndjson,4"} <= {row["username"] for row in rows}
+    
+    @pytest.mark.asyncio
+    async def test_csv(self, db_test_client):
+        """Тест выгрузки CSV: заголовок и экранирование"""
+        client = db_test_client
+        await create_users(client, "export-csv")
+        
+        ndjson = (await client.get("/users/export")).text.splitlines()
+        response = await client.get("/users/export", params={"format": "csv", "batch_size": 3})
+        
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="users.csv"'
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == len(ndjson)
+        assert {"export-csv,0", "export-csv,4"} <= {row["username"] for row in rows}
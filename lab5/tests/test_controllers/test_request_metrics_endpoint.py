@@ -0,0 +1,40 @@
+import pytest
+from api.services.request_metrics import get_request_metrics
+
+
+class TestRequestMetricsEndpoint:
+    """Тесты для метрик HTTP-запросов и эндпоинта Prometheus"""
+    
+    @pytest.mark.asyncio
+    async def test_prometheus_endpoint(self, db_test_client):
+        """Тест сбора метрик по шаблону маршрута и формата /metrics"""
+        client = db_test_client
+        get_request_metrics().reset()
+        await client.get("/users/999999")
+        await client.get("/users/999998")
+        await client.get("/users", params={"count": 5})
+        
+        response = await client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/users/{user_id}",status="404"} 2' in text
+        assert 'http_requests_total{method="GET",route="/users",status="200"} 1' in text
+        # Сам запрос к /metrics еще выполняется
+        assert "http_requests_in_flight 1" in text
+    
+    @pytest.mark.asyncio
+    async def test_requests_summary(self, db_test_client):
+        """Тест квантилей и размера ответа в /metrics/requests"""
+        client = db_test_client
+        get_request_metrics().reset()
+        body = (await client.get("/users", params={"count": 5})).content
+        
+        summary = (await client.get("/metrics/requests")).json()
+        
+        route = next(route for route in summary["routes"] if route["route"] == "/users")
+        assert route["requests"] == 1
+        assert route["statuses"] == {"200": 1}
+        assert route["avg_response_bytes"] == len(body)
+        assert 0 < route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
@@ -0,0 +1,107 @@
+import re
+
+import pytest
+from api.middleware.query_stats import QueryStatsMiddleware
+from api.repositories.user_repository import UserRepository
+from api.services.count_cache import get_count_cache
+from api.services.query_stats import (QueryStats, get_query_metrics,
+                                      instrument_engine, track_queries)
+from httpx import ASGITransport, AsyncClient
+from litestar import Litestar, get
+from sqlalchemy import text
+
+
+class TestSqlInstrumentation:
+    """Тесты для учета SQL-запросов по HTTP-запросам"""
+    
+    @pytest.mark.asyncio
+    async def test_track_queries(self, engine, setup_database):
+        """Тест хуков движка: запросы считаются только внутри track_queries"""
+        instrument_engine(engine)
+        
+        with track_queries() as stats:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 3"))
+        
+        assert stats.count == 2
+        assert stats.db_time > 0
+    
+    def test_server_timing(self):
+        """Тест значения Server-Timing"""
+        stats = QueryStats()
+        stats.count, stats.db_time = 3, 0.0125
+        
+        assert stats.server_timing() == 'db;dur=12.50;desc="3 queries"'
+    
+    @pytest.mark.asyncio
+    async def test_server_timing_header_and_metrics(self, db_test_client):
+        """Тест заголовка Server-Timing и метрик по маршрутам"""
+        client = db_test_client
+        get_query_metrics().reset()
+        user_id = (await client.post("/users", json={
+            "email": "timing@example.com", "username": "timing", "password": "pass"
+        })).json()["id"]
+        
+        response = await client.get(f"/users/{user_id}")
+        await client.get("/users", params={"count_strategy": "exact"})
+        
+        assert re.fullmatch(r'db;dur=[\d.]+;desc="\d+ queries"', response.headers["server-timing"])
+        metrics = {entry["route"]: entry for entry in (await client.get("/metrics/sql")).json()}
+        assert metrics["POST /users"]["requests"] == 1
+        assert metrics["POST /users"]["max_queries"] == 1
+        assert metrics["GET /users"]["max_queries"] == 2
+        assert metrics["GET /users"]["over_budget"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_estimate_fallback_within_budget(self, db_test_client, monkeypatch):
+        """Тест: estimate на маленькой таблице (pg_class, точный count, страница) укладывается в бюджет"""
+        async def get_estimated_count(self, session):
+            # Как на PostgreSQL: запрос к pg_class и оценка ниже порога
+            await session.execute(text("SELECT 5"))
+            return 5
+        
+        monkeypatch.setattr(UserRepository, "get_estimated_count", get_estimated_count)
+        monkeypatch.setenv("SQL_STRICT_BUDGET", "1")
+        get_count_cache().invalidate()
+        get_query_metrics().reset()
+        
+        response = await db_test_client.get("/users", params={"count_strategy": "estimate"})
+        
+        assert response.status_code == 200
+        metrics = {entry["route"]: entry for entry in get_query_metrics().metrics()}
+        assert metrics["GET /users"]["max_queries"] == 3
+        assert metrics["GET /users"]["over_budget"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_strict_budget(self, engine, setup_database, monkeypatch):
+        """Тест строгого режима: превышение бюджета - ошибка запроса"""
+        instrument_engine(engine)
+        
+        @get("/n-plus-one", statement_budget=2)
+        async def n_plus_one() -> dict:
+            async with engine.connect() as conn:
+                for i in range(3):
+                    await conn.execute(text(f"SELECT {i}"))
+            return {}
+        
+        @get("/within-budget", statement_budget=2)
+        async def within_budget() -> dict:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return {}
+        
+        app = Litestar(route_handlers=[n_plus_one, within_budget], middleware=[QueryStatsMiddleware])
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+            get_query_metrics().reset()
+            monkeypatch.delenv("SQL_STRICT_BUDGET", raising=False)
+            assert (await client.get("/n-plus-one")).status_code == 200
+            
+            monkeypatch.setenv("SQL_STRICT_BUDGET", "1")
+            assert (await client.get("/n-plus-one")).status_code == 500
+            assert (await client.get("/within-budget")).status_code == 200
+        
+        metrics = {entry["route"]: entry for entry in get_query_metrics().metrics()}
+        assert metrics["GET /n-plus-one"]["over_budget"] == 2
@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import event
+
+
+class StatementCounter:
+    """Считает SQL-запросы и COMMIT на движке"""
+    
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements = []
+        self.commits = 0
+    
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _on_commit(self, conn):
+        self.commits += 1
+    
+    def reset(self):
+        self.statements.clear()
+        self.commits = 0
+    
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine, "commit", self._on_commit)
+        return self
+    
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine, "commit", self._on_commit)
+
+
+@pytest.fixture
+async def counted_client(engine, db_test_client):
+    with StatementCounter(engine) as counter:
+        yield db_test_client, counter
+
+
+class TestStatementCount:
+    """Число запросов к БД на каждый эндпоинт записи"""
+    
+    @pytest.mark.asyncio
+    async def test_write_endpoints(self, counted_client):
+        client, counter = counted_client
+        payload = {"email": "counted-write@example.com", "username": "counted-write", "password": "pass"}
+        
+        counter.reset()
+        response = await client.post("/users", json=payload)
+        assert response.status_code == 201
+        assert len(counter.statements) == 1
+        assert counter.statements[0].lstrip().upper().startswith("INSERT")
+        assert counter.commits == 1
+        user_id = response.json()["id"]
+        
+        counter.reset()
+        response = await client.get(f"/users/{user_id}")
+        assert response.status_code == 200
+        assert len(counter.statements) == 1
+        
+        counter.reset()
+        response = await client.put(f"/users/{user_id}", json={"username": "counted-renamed"})
+        assert response.status_code == 200
+        assert response.json()["username"] == "counted-renamed"
+        assert len(counter.statements) == 1
+        assert counter.statements[0].lstrip().upper().startswith("UPDATE")
+        assert counter.commits == 1
+        
+        counter.reset()
+        response = await client.delete(f"/users/{user_id}")
+        assert response.status_code == 204
+        assert len(counter.statements) == 1
+        assert counter.statements[0].lstrip().upper().startswith("DELETE")
+        assert counter.commits == 1
+    
+    @pytest.mark.asyncio
+    async def test_conflicts_and_misses(self, counted_client):
+        client, counter = counted_client
+        payload = {"email": "counted-dup@example.com", "username": "counted-dup", "password": "pass"}
+        assert (await client.post("/users", json=payload)).status_code == 201
+        other = await client.post("/users", json={**payload, "email": "counted-other@example.com", "username": "counted-other"})
+        
+        # Конфликт: INSERT без строки и запрос, чтобы назвать занятое поле
+        counter.reset()
+        response = await client.post("/users", json=payload)
+        assert response.status_code == 409
+        assert "counted-dup@example.com" in response.json()["detail"]
+        assert len(counter.statements) == 2
+        assert counter.commits == 0
+        
+        counter.reset()
+        response = await client.put(f"/users/{other.json()['id']}", json={"email": payload["email"]})
+        assert response.status_code == 409
+        assert len(counter.statements) == 3
+        
+        counter.reset()
+        response = await client.put("/users/999999", json={"username": "nobody"})
+        assert response.status_code == 404
+        assert len(counter.statements) == 2
+        
+        counter.reset()
+        response = await client.delete("/users/999999")
+        assert response.status_code == 404
+        assert len(counter.statements) == 1
+        assert counter.commits == 0
+    
+    @pytest.mark.asyncio
+    async def test_bulk_endpoints(self, counted_client):
+        client, counter = counted_client
+        assert (await client.post("/users", json={
+            "email": "bulk-taken@example.com", "username": "bulk-taken", "password": "pass",
+        })).status_code == 201
+        payload = [
+            {"email": f"bulk{i}@example.com", "username": f"bulk{i}", "password": "pass"} for i in range(5)
+        ] + [
+            {"email": "bulk-taken@example.com", "username": "bulk-new", "password": "pass"},
+            {"email": "bulk0@example.com", "username": "bulk-dup", "password": "pass"},
+            {"email": "not-an-email", "username": "bulk-bad", "password": "pass"},
+        ]
+        
+        # Один запрос с IN и один многострочный INSERT на всю пачку
+        counter.reset()
+        response = await client.post("/users/bulk", json=payload)
+        assert response.status_code == 200
+        assert len(counter.statements) == 2
+        assert counter.commits == 1
+        body = response.json()
+        assert body["created"] == 5
+        assert [result["status"] for result in body["results"]] == ["created"] * 5 + ["conflict", "conflict", "invalid"]
+        
+        ids = [result["user"]["id"] for result in body["results"][:5]]
+        counter.reset()
+        response = await client.request("DELETE", "/users/bulk", json=ids + [999999])
+        assert response.status_code == 200
+        assert len(counter.statements) == 1
+        assert response.json()["deleted"] == 5
+        assert response.json()["results"][-1] == {"id": 999999, "status": "not_found"}
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+import msgspec
+from api.models.user import User, UserPage, UserRead, UserResponse
+
+
+def make_user():
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return User(id=1, email="test@example.com", username="testuser", password_hash="hash",
+                created_at=created_at, updated_at=created_at)
+
+
+class TestUserRead:
+    """Тесты для msgspec-структур ответов"""
+    
+    def test_from_row(self):
+        """Тест: структура строится из строки без пароля"""
+        user_read = UserRead.from_row(make_user())
+        
+        assert user_read.id == 1
+        assert user_read.email == "test@example.com"
+        assert "password_hash" not in msgspec.structs.asdict(user_read)
+    
+    def test_same_json_as_pydantic(self):
+        """Тест: JSON совпадает с прежним ответом UserResponse"""
+        user = make_user()
+        
+        assert msgspec.json.decode(msgspec.json.encode(UserRead.from_row(user))) == \
+            UserResponse.model_validate(user).model_dump(mode="json")
+    
+    def test_page(self):
+        """Тест типизированной страницы"""
+        page = UserPage(users=[UserRead.from_row(make_user())], total_count=None, page=None,
+                        count=10, total_pages=None, next_cursor="abc")
+        data = msgspec.json.decode(msgspec.json.encode(page))
+        
+        assert list(data) == ["users", "total_count", "page", "count", "total_pages", "next_cursor"]
+        assert data["users"][0]["username"] == "testuser"
@@ -95,4 +95,26 @@ class TestUserRepository:
         
         # Проверяем что пользователь удален
         deleted_user = await user_repository.get_by_id(session, user.id)
-        assert deleted_user is None
\ No newline at end of file
+        assert deleted_user is None
+    
+    @pytest.mark.asyncio
+    async def test_get_by_cursor(self, session: AsyncSession, user_repository: UserRepository):
+        """Тест постраничной выдачи по ключу: те же строки, что и по OFFSET"""
+        for i in range(5):
+            await user_repository.create(
+                session, UserCreate(email=f"cursor{i}@example.com", username=f"cursor{i}", password="pass")
+            )
+        
+        for order_by in ("id", "created_at"):
+            expected = await user_repository.get_by_filter(session, count=1000, page=1, order_by=order_by)
+            
+            seen, after = [], None
+            while True:
+                users = await user_repository.get_by_cursor(session, count=2, after=after, order_by=order_by)
+                if not users:
+                    break
+                seen.extend(users)
+                last = users[-1]
+                after = (last.id,) if order_by == "id" else (last.created_at, last.id)
+            
+            assert [user.id for user in seen] == [user.id for user in expected]
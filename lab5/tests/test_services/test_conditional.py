@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from api.services.conditional import (http_date, is_not_modified, page_etag,
+                                      user_etag)
+
+UPDATED_AT = datetime(2024, 1, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+class TestConditional:
+    """Тесты для ETag и условных запросов"""
+    
+    def test_user_etag(self):
+        """Тест ETag пользователя: меняется вместе с updated_at"""
+        etag = user_etag(7, UPDATED_AT)
+        
+        assert etag == 'W/"7-20240101123015250000"'
+        assert user_etag(7, UPDATED_AT.replace(tzinfo=None)) == etag
+        assert user_etag(7, UPDATED_AT + timedelta(milliseconds=1)) != etag
+    
+    def test_http_date(self):
+        """Тест даты Last-Modified"""
+        assert http_date(UPDATED_AT) == "Mon, 01 Jan 2024 12:30:15 GMT"
+    
+    def test_if_none_match(self):
+        """Тест If-None-Match: слабое сравнение, список и *"""
+        etag = user_etag(7, UPDATED_AT)
+        
+        assert is_not_modified(etag, None, etag)
+        assert is_not_modified('"7-20240101123015250000"', None, etag)
+        assert is_not_modified(f'W/"other", {etag}', None, etag)
+        assert is_not_modified("*", None, etag)
+        assert not is_not_modified('W/"other"', None, etag)
+    
+    def test_if_modified_since(self):
+        """Тест If-Modified-Since с точностью до секунды"""
+        etag = user_etag(7, UPDATED_AT)
+        
+        assert is_not_modified(None, http_date(UPDATED_AT), etag, UPDATED_AT)
+        assert not is_not_modified(None, http_date(UPDATED_AT - timedelta(seconds=1)), etag, UPDATED_AT)
+        assert not is_not_modified(None, "not a date", etag, UPDATED_AT)
+        # If-None-Match главнее If-Modified-Since
+        assert not is_not_modified('W/"other"', http_date(UPDATED_AT), etag, UPDATED_AT)
+    
+    def test_page_etag(self):
+        """Тест ETag страницы: строки, total_count и параметры"""
+        users = [SimpleNamespace(id=1, updated_at=UPDATED_AT), SimpleNamespace(id=2, updated_at=UPDATED_AT)]
+        etag = page_etag({"count": 2}, users, 10)
+        
+        assert page_etag({"count": 2}, list(users), 10) == etag
+        assert page_etag({"count": 2}, users[:1], 10) != etag
+        assert page_etag({"count": 2}, users, 11) != etag
+        assert page_etag({"count": 3}, users, 10) != etag
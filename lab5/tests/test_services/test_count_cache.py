@@ -0,0 +1,61 @@
+import time
+
+import pytest
+from api.models.user import UserCreate
+from api.services.count_cache import CountCache, get_default_count_strategy
+from api.services.user_service import UserService
+
+
+class TestCountCache:
+    """Тесты для кэша количества пользователей"""
+
+    def test_default_strategy_is_exact(self, monkeypatch):
+        monkeypatch.delenv("USERS_COUNT_STRATEGY", raising=False)
+        assert get_default_count_strategy() == "exact"
+
+    def test_unknown_strategy_fails_at_startup(self, monkeypatch):
+        from app.main import create_app
+
+        monkeypatch.setenv("USERS_COUNT_STRATEGY", "approximate")
+        with pytest.raises(ValueError):
+            create_app()
+    
+    def test_ttl(self):
+        """Тест истечения значения"""
+        cache = CountCache(ttl=0.05)
+        cache.set("users", 10)
+        
+        assert cache.get("users") == 10
+        time.sleep(0.06)
+        assert cache.get("users") is None
+        assert cache.metrics()["hits"] == 1
+        assert cache.metrics()["misses"] == 1
+    
+    def test_invalidate(self):
+        """Тест сброса кэша"""
+        cache = CountCache(ttl=60)
+        cache.set("users", 10)
+        cache.invalidate()
+        
+        assert cache.get("users") is None
+    
+    @pytest.mark.asyncio
+    async def test_cached_strategy(self, session, user_repository):
+        """Тест: cached не ходит в БД повторно и сбрасывается при создании"""
+        service = UserService(user_repository, session, CountCache(ttl=60))
+        
+        exact = await service.get_total_count(strategy="exact")
+        assert await service.get_total_count(strategy="cached") == exact
+        assert service.count_cache.metrics()["misses"] == 1
+        assert await service.get_total_count(strategy="cached") == exact
+        assert service.count_cache.metrics()["hits"] == 1
+        
+        await service.create(UserCreate(email="counted@example.com", username="counted", password="pass"))
+        assert await service.get_total_count(strategy="cached") == exact + 1
+    
+    @pytest.mark.asyncio
+    async def test_estimate_falls_back_to_exact(self, session, user_repository):
+        """Тест: без статистики PostgreSQL оценка заменяется подсчетом"""
+        service = UserService(user_repository, session, CountCache(ttl=60))
+        
+        assert await service.get_total_count(strategy="estimate") == await service.get_total_count(strategy="exact")
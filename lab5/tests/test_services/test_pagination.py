@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from api.services.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+class TestCursor:
+    """Тесты для курсоров постраничной выдачи"""
+    
+    def test_roundtrip_by_id(self):
+        """Тест курсора по id"""
+        cursor = encode_cursor(SimpleNamespace(id=42))
+        
+        assert decode_cursor(cursor) == (42,)
+    
+    def test_roundtrip_by_created_at(self):
+        """Тест курсора по (created_at, id)"""
+        created_at = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+        cursor = encode_cursor(SimpleNamespace(id=7, created_at=created_at), "created_at")
+        
+        assert decode_cursor(cursor, "created_at") == (created_at, 7)
+    
+    @pytest.mark.parametrize("cursor", ["", "garbage", "e30", "WzFd"])
+    def test_invalid_cursor(self, cursor):
+        """Тест поврежденного курсора"""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
+    
+    def test_cursor_for_other_order(self):
+        """Тест курсора от другого порядка сортировки"""
+        cursor = encode_cursor(SimpleNamespace(id=1))
+        
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "created_at")
+    
+    def test_next_cursor(self):
+        """Тест курсора следующей страницы"""
+        users = [SimpleNamespace(id=i) for i in range(1, 4)]
+        
+        assert decode_cursor(next_cursor(users, 3)) == (3,)
+        assert next_cursor(users[:2], 3) is None
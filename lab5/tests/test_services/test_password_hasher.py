@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+from api.services.password_hasher import PasswordHasher
+
+
+class TestPasswordHasher:
+    """Тесты для хеширования паролей в пуле"""
+    
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        """Тест хеширования и проверки пароля"""
+        hasher = PasswordHasher(max_concurrency=2, rounds=4)
+        try:
+            hashed = await hasher.hash("password123")
+            
+            assert hashed.startswith("$2b$04$")
+            assert await hasher.verify("password123", hashed) is True
+            assert await hasher.verify("wrong", hashed) is False
+        finally:
+            hasher.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_metrics(self):
+        """Тест метрик очереди и времени хеширования"""
+        hasher = PasswordHasher(max_concurrency=1, rounds=4)
+        try:
+            await asyncio.gather(*(hasher.hash(f"password{i}") for i in range(3)))
+            metrics = hasher.metrics()
+            
+            assert metrics["max_concurrency"] == 1
+            assert metrics["rounds"] == 4
+            assert metrics["pending"] == 0
+            assert metrics["hash_time"]["count"] == 3
+            assert metrics["queue_wait"]["count"] == 3
+            # При одном потоке последние хеши ждали предыдущие
+            assert metrics["queue_wait"]["max_ms"] > 0
+        finally:
+            hasher.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self):
+        """Тест: пока считаются хеши, event loop продолжает работать"""
+        hasher = PasswordHasher(max_concurrency=2, rounds=10)
+        ticks = []
+        
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.005)
+        
+        task = asyncio.create_task(ticker())
+        try:
+            await asyncio.gather(*(hasher.hash("password123") for _ in range(4)))
+        finally:
+            task.cancel()
+            hasher.shutdown()
+        
+        gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+        assert len(ticks) > 5
+        assert max(gaps) < 0.05
+    
+    def test_invalid_concurrency(self):
+        """Тест проверки лимита параллельности"""
+        with pytest.raises(ValueError):
+            PasswordHasher(max_concurrency=0)
@@ -0,0 +1,75 @@
+import pytest
+from api.services.request_metrics import (LATENCY_BUCKETS, Histogram,
+                                          RequestMetrics)
+
+
+class TestHistogram:
+    """Тесты для гистограммы с фиксированными корзинами"""
+    
+    def test_buckets(self):
+        """Тест корзин: граница включается, большие значения - в +Inf"""
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 10, 50):
+            histogram.observe(value)
+        
+        assert histogram.cumulative() == [("1", 2), ("10", 4), ("+Inf", 5)]
+        assert histogram.count == 5
+        assert histogram.sum == 66.5
+    
+    def test_quantile(self):
+        """Тест оценки квантилей интерполяцией внутри корзины"""
+        histogram = Histogram((10, 20, 30))
+        for value in range(1, 31):
+            histogram.observe(value)
+        
+        assert histogram.quantile(0.5) == pytest.approx(15)
+        assert histogram.quantile(0.95) == pytest.approx(28.5)
+        assert Histogram((10,)).quantile(0.5) == 0.0
+    
+    def test_quantile_above_last_bucket(self):
+        """Тест квантиля в корзине +Inf: последняя конечная граница"""
+        histogram = Histogram(LATENCY_BUCKETS)
+        histogram.observe(60)
+        
+        assert histogram.quantile(0.99) == LATENCY_BUCKETS[-1]
+
+
+class TestRequestMetrics:
+    """Тесты для метрик запросов по маршрутам"""
+    
+    def test_metrics(self):
+        """Тест сводки по маршруту: квантили, коды ответа, размер"""
+        metrics = RequestMetrics()
+        for _ in range(99):
+            metrics.observe("GET", "/users", 200, 0.002, 1000)
+        metrics.observe("GET", "/users", 500, 2.0, 20)
+        
+        route = metrics.metrics()["routes"][0]
+        assert route["requests"] == 100
+        assert route["statuses"] == {"200": 99, "500": 1}
+        assert 1 < route["p50_ms"] <= 2.5
+        assert route["p99_ms"] <= 2.5
+        assert route["avg_response_bytes"] == 990
+    
+    def test_prometheus(self):
+        """Тест текстового формата Prometheus"""
+        metrics = RequestMetrics()
+        metrics.in_flight = 2
+        metrics.observe("GET", '/users/{user_id}', 404, 0.0003, 50)
+        
+        text = metrics.prometheus()
+        
+        assert text.endswith("\n")
+        assert "http_requests_in_flight 2" in text
+        assert 'http_requests_total{method="GET",route="/users/{user_id}",status="404"} 1' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/users/{user_id}",le="0.0005"} 1' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/users/{user_id}",le="0.00025"} 0' in text
+        assert 'http_response_size_bytes_count{method="GET",route="/users/{user_id}"} 1' in text
+        assert "# TYPE http_request_duration_seconds histogram" in text
+    
+    def test_label_escaping(self):
+        """Тест экранирования значений меток"""
+        metrics = RequestMetrics()
+        metrics.observe("GET", '/a"b\\c', 200, 0.001, 1)
+        
+        assert 'route="/a\\"b\\\\c"' in metrics.prometheus()
@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from api.models.user import UserUpdate
+from api.repositories.user_repository import UserRepository
+from api.services.user_cache import InMemoryUserCache, UserCacheBackend
+from api.services.user_service import UserService
+
+
+def make_user(user_id):
+    return SimpleNamespace(
+        id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}",
+        password_hash="hash", created_at=None, updated_at=None,
+    )
+
+
+class TestInMemoryUserCache:
+    """Тесты для кэша пользователей в памяти"""
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Тест вытеснения давно не использованной записи"""
+        cache = InMemoryUserCache(max_size=2, ttl=60)
+        await cache.set("a", {"id": 1})
+        await cache.set("b", {"id": 2})
+        await cache.get("a")
+        await cache.set("c", {"id": 3})
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"id": 1}
+        assert cache.metrics()["evictions"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        """Тест истечения записи"""
+        cache = InMemoryUserCache(max_size=10, ttl=0.05)
+        await cache.set("a", {"id": 1})
+        await asyncio.sleep(0.06)
+        
+        assert await cache.get("a") is None
+        metrics = cache.metrics()
+        assert metrics["expirations"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["size"] == 0
+    
+    def test_backend_is_abstract(self):
+        """Тест: хранилище без реализации методов не создается"""
+        with pytest.raises(TypeError):
+            UserCacheBackend()
+
+
+class TestUserServiceCache:
+    """Тесты для чтения пользователя через кэш"""
+    
+    def make_service(self):
+        mock_repo = AsyncMock(spec=UserRepository)
+        mock_session = AsyncMock()
+        mock_session.bind.url = "sqlite+aiosqlite://"
+        mock_repo.get_by_id.side_effect = lambda session, user_id: make_user(user_id)
+        return UserService(mock_repo, mock_session, user_cache=InMemoryUserCache(max_size=10, ttl=60)), mock_repo
+    
+    @pytest.mark.asyncio
+    async def test_read_through(self):
+        """Тест: повторное чтение не ходит в репозиторий"""
+        service, mock_repo = self.make_service()
+        
+        first = await service.get_by_id(1)
+        second = await service.get_by_id(1)
+        
+        assert first.email == second.email == "user1@example.com"
+        assert mock_repo.get_by_id.call_count == 1
+        assert service.user_cache.metrics()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_invalidate_on_update_and_delete(self):
+        """Тест сброса записи при обновлении и удалении"""
+        service, mock_repo = self.make_service()
+        mock_repo.update.return_value = make_user(1)
+        mock_repo.delete.return_value = True
+        
+        await service.get_by_id(1)
+        await service.update(1, UserUpdate(username="renamed"))
+        await service.get_by_id(1)
+        await service.delete(1)
+        await service.get_by_id(1)
+        
+        assert mock_repo.get_by_id.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_password_hash_not_cached(self):
+        """Тест: хеш пароля в кэш не попадает"""
+        service, _ = self.make_service()
+        
+        await service.get_by_id(1)
+        
+        cached = await service.user_cache.get(service._cache_key(1))
+        assert cached["email"] == "user1@example.com"
+        assert "password_hash" not in cached
+    
+    @pytest.mark.asyncio
+    async def test_invalidate_after_commit(self):
+        """Тест: запись сбрасывается после COMMIT, а не до него"""
+        service, mock_repo = self.make_service()
+        mock_repo.update.return_value = make_user(1)
+        await service.get_by_id(1)
+        cached_at_commit = []
+        
+        async def commit():
+            cached_at_commit.append(await service.user_cache.get(service._cache_key(1)) is not None)
+        service.db_session.commit.side_effect = commit
+        
+        await service.update(1, UserUpdate(username="renamed"))
+        
+        assert cached_at_commit == [True]
+        assert await service.user_cache.get(service._cache_key(1)) is None
@@ -46,7 +46,8 @@ class TestUserService:
             assert result.id == 1
             assert result.email == "test@example.com"
             mock_repo.create.assert_called_once()
-            mock_get_by_email.assert_called_once_with("test@example.com")
+            # Уникальность проверяет INSERT ... ON CONFLICT, отдельного запроса нет
+            mock_get_by_email.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_create_user_duplicate_email(self):
@@ -59,6 +60,7 @@ class TestUserService:
             mock_user = Mock()
             mock_user.email = "existing@example.com"
             mock_get_by_email.return_value = mock_user
+            mock_repo.create.return_value = None  # INSERT не вставил строку
             
             service = UserService(mock_repo, mock_session)
             service.get_by_email = mock_get_by_email
@@ -96,6 +98,7 @@ class TestUserService:
         mock_session = AsyncMock()
         
         mock_repo.get_by_id.return_value = None
+        mock_repo.update.return_value = None  # UPDATE не нашел строку
         
         service = UserService(mock_repo, mock_session)
         update_data = UserUpdate(username="newusername")